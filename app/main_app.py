@@ -5,7 +5,6 @@ import streamlit as st
 import pandas as pd
 import sys
 import time
-import threading
 import subprocess
 from pathlib import Path
 from typing import List
@@ -14,13 +13,14 @@ from typing import List
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.generation.enhanced_rag_chain import EnhancedRAGChain
+from src.generation.prompts import ConversationHistory
 from src.retrieval.vector_store import VectorStore
 from src.retrieval.retriever import Retriever
 from src.feedback.store import FeedbackStore
 from src.feedback.models import Feedback, FeedbackType
-from src.feedback.feedback_learner import FeedbackLearner
+from src.feedback.feedback_learner import get_feedback_learner
 from src.analytics.query_logger import QueryLogger
-from src.analytics.response_cache import ResponseCache
+from src.analytics.response_cache import get_response_cache
 
 # Page config
 st.set_page_config(
@@ -33,6 +33,9 @@ st.set_page_config(
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+if "history" not in st.session_state:
+    st.session_state.history = ConversationHistory()
+
 if "feedback_given" not in st.session_state:
     st.session_state.feedback_given = set()
 
@@ -104,18 +107,6 @@ def get_query_logger():
     return QueryLogger()
 
 
-@st.cache_resource
-def get_response_cache():
-    """Initialize response cache."""
-    return ResponseCache()
-
-
-@st.cache_resource
-def get_feedback_learner():
-    """Initialize feedback learner."""
-    return FeedbackLearner()
-
-
 def save_feedback(query: str, response: str, feedback_type: FeedbackType, log_id: int = None, chunk_ids: List[str] = None):
     """Save user feedback and apply automatic learning actions."""
     try:
@@ -216,6 +207,9 @@ def render_chat_tab():
     # Chat input
     if prompt := st.chat_input("Ask a question about Near Partner..."):
         st.session_state.messages.append({"role": "user", "content": prompt})
+        # Follow-up answers depend on the conversation, so only the first
+        # question of a conversation is cached
+        use_cache = settings["use_cache"] and not len(st.session_state.history)
 
         with st.chat_message("user"):
             st.markdown(prompt)
@@ -227,7 +221,7 @@ def render_chat_tab():
             try:
                 # Check cache first
                 cached_response = None
-                if settings["use_cache"]:
+                if use_cache:
                     cached_response = cache.get(prompt, settings)
 
                 if cached_response:
@@ -246,6 +240,8 @@ def render_chat_tab():
                         "sources": cached_response["sources"],
                         "cached": True
                     })
+                    st.session_state.history.append("user", prompt)
+                    st.session_state.history.append("assistant", cached_response["answer"])
 
                 else:
                     # Generate new response
@@ -254,45 +250,32 @@ def render_chat_tab():
                         use_hybrid=settings["use_hybrid"]
                     )
 
-                    result_container = {"result": None, "error": None, "done": False}
-
-                    # Build conversation history for multi-turn context
-                    history = [
-                        {"role": m["role"], "content": m["content"]}
-                        for m in st.session_state.messages[-10:]  # Last 5 turns
-                        if m["role"] in ("user", "assistant")
-                    ]
+                    thinking_placeholder.markdown("⏳ *Thinking...*")
+                    start_time = time.time()
 
-                    def run_query():
+                    # Render tokens as they arrive; the generator returns the full result
+                    stream = rag_chain.query_stream(
+                        question=prompt,
+                        top_k=settings["top_k"],
+                        temperature=settings["temperature"],
+                        use_hyde=settings["use_hyde"],
+                        conversation_history=st.session_state.history,
+                        evaluate_confidence=settings.get("evaluate_confidence", False),
+                        use_cache=use_cache
+                    )
+                    partial = ""
+                    while True:
                         try:
-                            result_container["result"] = rag_chain.query(
-                                question=prompt,
-                                top_k=settings["top_k"],
-                                temperature=settings["temperature"],
-                                use_hyde=settings["use_hyde"],
-                                conversation_history=history,
-                                evaluate_confidence=settings.get("evaluate_confidence", False)
-                            )
-                        except Exception as e:
-                            result_container["error"] = e
-                        finally:
-                            result_container["done"] = True
-
-                    query_thread = threading.Thread(target=run_query)
-                    query_thread.start()
-
-                    start_time = time.time()
-                    while not result_container["done"]:
-                        elapsed = int(time.time() - start_time)
-                        thinking_placeholder.markdown(f"⏳ *Thinking for {elapsed} seconds...*")
-                        time.sleep(0.5)
+                            token = next(stream)
+                        except StopIteration as stop:
+                            result = stop.value
+                            break
+                        if not partial:
+                            thinking_placeholder.empty()
+                        partial += token
+                        response_placeholder.markdown(partial + "▌")
 
                     thinking_placeholder.empty()
-
-                    if result_container["error"]:
-                        raise result_container["error"]
-
-                    result = result_container["result"]
                     elapsed_total = round(time.time() - start_time, 1)
 
                     response_placeholder.markdown(result.answer)
@@ -318,10 +301,6 @@ def render_chat_tab():
                             for source in result.sources:
                                 st.markdown(f"- [{source['title']}]({source['url']}) by {source['author']}")
 
-                    # Cache the response
-                    if settings["use_cache"]:
-                        cache.set(prompt, settings, result.answer, result.sources)
-
                     st.session_state.messages.append({
                         "role": "assistant",
                         "content": result.answer,
@@ -330,6 +309,8 @@ def render_chat_tab():
                         "log_id": getattr(result, 'log_id', None),
                         "cached": False
                     })
+                    st.session_state.history.append("user", prompt)
+                    st.session_state.history.append("assistant", result.answer)
 
                 st.rerun()
 
@@ -354,6 +335,7 @@ def render_chat_tab():
 
         if st.button("🗑️ Clear Chat"):
             st.session_state.messages = []
+            st.session_state.history.clear()
             st.session_state.feedback_given = set()
             st.rerun()
 
@@ -575,7 +557,7 @@ def render_settings_tab():
         evaluate_confidence = st.toggle(
             "Auto-Quality Evaluation",
             value=st.session_state.settings.get("evaluate_confidence", False),
-            help="Automatically evaluate response confidence (adds ~1-2s per query)"
+            help="Have the model rate its confidence alongside the answer (a few extra tokens)"
         )
 
         show_confidence = st.toggle(
@@ -12,6 +12,7 @@ import json
 import time
 import os
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import List, Dict, Optional
 
 # Configuration
@@ -23,7 +24,7 @@ HEADERS = {
 REQUEST_TIMEOUT = 15
 DELAY_BETWEEN_REQUESTS = 2
 
-OUTPUT_FILE = "nearpartner_company_pages.json"
+OUTPUT_FILE = str(Path(__file__).parent / "nearpartner_company_pages.json")
 
 # Company pages to scrape with their categories
 COMPANY_PAGES = [
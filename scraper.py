@@ -20,7 +20,7 @@ from typing import List, Dict, Optional, Set
 # CONFIGURATION
 BASE_URL = "https://www.nearpartner.com"
 BLOG_BASE = f"{BASE_URL}/blog/"
-OUTPUT_FILE = "nearpartner_blog_posts.json"
+OUTPUT_FILE = str(Path(__file__).parent / "nearpartner_blog_posts.json")
 HEADERS = {
     "User-Agent": "NearPartnerBlogScraper/1.0 (+https://nearpartner.com; internal use)",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
@@ -54,7 +54,14 @@ def export_sqlite_table(db_path: str, table: str, output_file: Path) -> int:
             rows = conn.execute(f"SELECT * FROM {table}").fetchall()
 
         data = [dict(row) for row in rows]
-        output_file.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        for row in data:
+            # Cached sources are UTF-8 JSON; other BLOBs (hashes, embeddings) are binary
+            if isinstance(row.get("sources"), bytes):
+                row["sources"] = row["sources"].decode("utf-8")
+        output_file.write_text(
+            json.dumps(data, ensure_ascii=False, indent=2, default=lambda v: v.hex()),
+            encoding="utf-8"
+        )
         print(f"  ✓ Exported {len(data)} rows from {table} to {output_file}")
         return len(data)
     except Exception as e:
@@ -22,7 +22,7 @@ from src.ingestion import IngestPipeline
 from src.config import config
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Ingest content into vector store")
     parser.add_argument(
         "--incremental",
@@ -39,7 +39,7 @@ def main():
         action="store_true",
         help="Only ingest company pages"
     )
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     print("=" * 60)
     print("Near Partner Knowledge Base Ingestion")
@@ -1,15 +1,28 @@
 """
 Query logging for analytics and continuous improvement.
 """
+import atexit
 import sqlite3
 import json
+import queue
+import threading
+import time
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
 from pathlib import Path
 from ..config import config
 
 
+# A NULL id lets SQLite assign one (synchronous log()); log_async() supplies its own
+_SQL_INSERT_LOG = """
+    INSERT INTO query_logs
+    (id, timestamp, query, expanded_query, retrieval_scores, avg_retrieval_score,
+     num_chunks_retrieved, response_time_ms, feedback, model_used)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
 @dataclass
 class QueryLog:
     """A logged query with metadata."""
@@ -31,12 +44,27 @@ class QueryLogger:
     """
 
     def __init__(self, db_path: str = None):
+        config.ensure_dirs()
         self.db_path = db_path or str(config.data_dir / "query_logs.db")
         self._init_db()
 
+        # Background writer for log_async(), started on first use
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._write_q: "queue.Queue[Tuple]" = queue.Queue(maxsize=1024)
+        self._writer: Optional[threading.Thread] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection; WAL lets the writer thread commit without blocking readers."""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
     def _init_db(self):
         """Initialize the database schema."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS query_logs (
@@ -65,38 +93,115 @@ class QueryLogger:
         model_used: str = None
     ) -> int:
         """Log a query and its retrieval performance. Returns the log ID."""
-        avg_score = sum(retrieval_scores) / len(retrieval_scores) if retrieval_scores else 0
-
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO query_logs
-                (timestamp, query, expanded_query, retrieval_scores, avg_retrieval_score,
-                 num_chunks_retrieved, response_time_ms, feedback, model_used)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                datetime.now(timezone.utc).isoformat(),
-                query,
-                expanded_query,
-                json.dumps(retrieval_scores),
-                avg_score,
-                len(retrieval_scores),
-                response_time_ms,
-                None,
-                model_used or config.llm_model
+            cursor.execute(_SQL_INSERT_LOG, self._make_row(
+                None, query, retrieval_scores, response_time_ms, expanded_query, model_used
             ))
             conn.commit()
             return cursor.lastrowid
 
+    def log_async(
+        self,
+        query: str,
+        retrieval_scores: List[float],
+        response_time_ms: int,
+        expanded_query: str = None,
+        model_used: str = None
+    ) -> int:
+        """
+        Queue a query log for the background writer and return its ID immediately.
+
+        The ID is allocated here (microsecond timestamp, increasing per process)
+        so callers can still pass it to update_feedback(). Falls back to a
+        synchronous write if the queue is full.
+        """
+        with self._lock:
+            log_id = max(self._last_id + 1, time.time_ns() // 1000)
+            self._last_id = log_id
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._drain_writes, name="QueryLoggerWriter", daemon=True
+                )
+                self._writer.start()
+                atexit.register(self.flush)
+
+        row = self._make_row(
+            log_id, query, retrieval_scores, response_time_ms, expanded_query, model_used
+        )
+        try:
+            self._write_q.put_nowait(row)
+        except queue.Full:
+            self.log_many([row])
+        return log_id
+
+    def log_many(self, rows: List[Tuple]):
+        """Insert several rows built by _make_row() in one transaction."""
+        with self._connect() as conn:
+            conn.executemany(_SQL_INSERT_LOG, rows)
+            conn.commit()
+
+    def flush(self):
+        """Block until all queued logs have been written."""
+        if self._writer is not None:
+            self._write_q.join()
+
+    def _drain_writes(self, max_batch: int = 100, linger: float = 0.05):
+        """Writer thread: insert queued logs in batches."""
+        while True:
+            batch = [self._write_q.get()]
+            deadline = time.monotonic() + linger
+            while len(batch) < max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._write_q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self.log_many(batch)
+            except Exception as e:
+                print(f"[QueryLogger] Failed to write {len(batch)} queued logs: {e}")
+            finally:
+                for _ in batch:
+                    self._write_q.task_done()
+
+    @staticmethod
+    def _make_row(
+        log_id: Optional[int],
+        query: str,
+        retrieval_scores: List[float],
+        response_time_ms: int,
+        expanded_query: Optional[str],
+        model_used: Optional[str]
+    ) -> Tuple:
+        """Build the INSERT parameters for one query log."""
+        avg_score = sum(retrieval_scores) / len(retrieval_scores) if retrieval_scores else 0
+        return (
+            log_id,
+            datetime.now(timezone.utc).isoformat(),
+            query,
+            expanded_query,
+            json.dumps(retrieval_scores),
+            avg_score,
+            len(retrieval_scores),
+            response_time_ms,
+            None,
+            model_used or config.llm_model
+        )
+
     def update_feedback(self, log_id: int, feedback: str):
         """Update feedback for a logged query."""
-        with sqlite3.connect(self.db_path) as conn:
+        self.flush()  # the row may still be queued by log_async()
+        with self._connect() as conn:
             conn.execute("UPDATE query_logs SET feedback = ? WHERE id = ?", (feedback, log_id))
             conn.commit()
 
     def get_recent(self, limit: int = 100) -> List[QueryLog]:
         """Get recent query logs."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             rows = conn.execute(
                 "SELECT * FROM query_logs ORDER BY timestamp DESC LIMIT ?", (limit,)
             ).fetchall()
@@ -104,7 +209,7 @@ class QueryLogger:
 
     def get_low_score_queries(self, threshold: float = 0.5, limit: int = 50) -> List[QueryLog]:
         """Get queries with low retrieval scores (potential knowledge gaps)."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             rows = conn.execute(
                 "SELECT * FROM query_logs WHERE avg_retrieval_score < ? ORDER BY avg_retrieval_score ASC LIMIT ?",
                 (threshold, limit)
@@ -113,7 +218,7 @@ class QueryLogger:
 
     def get_negative_feedback_queries(self, limit: int = 50) -> List[QueryLog]:
         """Get queries that received negative feedback."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             rows = conn.execute(
                 "SELECT * FROM query_logs WHERE feedback = 'negative' ORDER BY timestamp DESC LIMIT ?",
                 (limit,)
@@ -122,7 +227,7 @@ class QueryLogger:
 
     def get_common_queries(self, limit: int = 20) -> List[Dict[str, Any]]:
         """Get most common queries."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             rows = conn.execute("""
                 SELECT query, COUNT(*) as count, AVG(avg_retrieval_score) as avg_score
                 FROM query_logs GROUP BY query ORDER BY count DESC LIMIT ?
@@ -131,7 +236,7 @@ class QueryLogger:
 
     def get_stats(self) -> Dict[str, Any]:
         """Get overall statistics."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             row = conn.execute("""
                 SELECT
                     COUNT(*) as total_queries,
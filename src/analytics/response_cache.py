@@ -1,13 +1,135 @@
 """
 Response caching to reduce LLM calls.
 """
+import atexit
 import sqlite3
+import threading
+import weakref
 import json
 import hashlib
+import queue
+import struct
+from collections import Counter
+from collections.abc import Mapping
+from functools import lru_cache
+from pathlib import Path
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Sequence, Tuple
 from ..config import config
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+def _dump_sources(sources: list):
+    """Serialize sources for storage (orjson bytes when available)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(sources)
+    return json.dumps(sources)
+
+
+def _load_sources(data) -> list:
+    """Deserialize stored sources; accepts both BLOB and legacy TEXT rows."""
+    if not data:
+        return []
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Open caches whose queued responses and hit counts are flushed at interpreter exit
+_open_caches = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open_caches():
+    for cache in list(_open_caches):
+        cache.flush()  # the writer is a daemon thread; don't drop queued responses
+        cache._flush_hits()
+
+
+class _CachedResult(Mapping):
+    """
+    Exact-match cache hit that decodes sources only when they are read.
+
+    A read-only Mapping with the keys of the dict get() used to return
+    (answer, sources, cached), so dict(result) and **result keep working.
+    """
+
+    __slots__ = ("answer", "_sources_blob", "cached", "_decoded")
+    _KEYS = ("answer", "sources", "cached")
+
+    def __init__(self, answer: str, sources_blob):
+        self.answer = answer
+        self._sources_blob = sources_blob
+        self.cached = True
+        self._decoded = None
+
+    @property
+    def sources(self) -> list:
+        if self._decoded is None:
+            self._decoded = _load_sources(self._sources_blob)
+            self._sources_blob = None
+        return self._decoded
+
+    def __getitem__(self, key: str):
+        if key in self._KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+
+@lru_cache(maxsize=1024)
+def _normalize_query(query: str) -> str:
+    """Strip and lowercase a query, skipping lower() when it is already lowercase ASCII."""
+    stripped = query.strip()
+    if stripped.isascii() and stripped.islower():
+        return stripped
+    return stripped.lower()
+
+
+def _query_key(query: str) -> str:
+    """Settings-independent key for a query; matches FeedbackLearner._hash_query."""
+    return hashlib.blake2b(_normalize_query(query).encode(), digest_size=16).hexdigest()
+
+
+# top_k, use_expansion, use_hybrid, use_hyde
+_SETTINGS_STRUCT = struct.Struct("<I???")
+
+# SQL run on every lookup/write, kept as constants: sqlite3's per-connection
+# statement cache is keyed by the SQL text, so these are prepared only once
+_SQL_GET = """
+    SELECT response, sources, id FROM response_cache
+    WHERE query_hash = ? AND created_at >= ?
+"""
+
+_SQL_UPSERT_RESPONSE = """
+    INSERT INTO response_cache
+    (query_hash, query, query_key, settings_hash, response, sources, embedding, created_at, hit_count)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)
+    ON CONFLICT(query_hash) DO UPDATE SET
+        response = excluded.response,
+        sources = excluded.sources,
+        embedding = COALESCE(excluded.embedding, embedding),
+        created_at = excluded.created_at,
+        hit_count = 1
+    RETURNING id
+"""
+
 
 class ResponseCache:
     """
@@ -24,60 +146,121 @@ class ResponseCache:
             db_path: Path to SQLite database
             ttl_hours: Time-to-live for cached responses in hours
         """
+        config.ensure_dirs()
         self.db_path = db_path or str(config.data_dir / "response_cache.db")
         self.ttl_hours = ttl_hours
+        # One persistent connection shared across calls (and with FeedbackLearner
+        # for invalidation); the lock serializes access from worker threads.
+        self._lock = threading.RLock()
+        self.conn = self._connect()
+        # Semantic tier: normalized query embeddings of cached rows, loaded
+        # lazily. SQLite stays authoritative; hits are re-read from the table.
+        self._emb_ids: List[int] = []
+        self._emb_settings: List[bytes] = []
+        self._emb_matrix = None
+        self._emb_loaded = False
+        # Hit counts are kept in memory (row id -> hits) so lookups stay
+        # read-only; written by _flush_hits() before anything reads hit_count
+        self._pending_hits: Counter = Counter()
+        # Write-behind queue for set_async; the writer thread is started on
+        # first use so short-lived instances never spawn one.
+        self._write_q: queue.Queue = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
         self._init_db()
+        # Refresh planner statistics for the indexes when they are stale
+        with self._lock:
+            self.conn.execute("PRAGMA optimize")
+        _open_caches.add(self)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the persistent database connection."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # WAL: readers don't block on writers and commits skip the per-write fsync
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache
+        conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+        return conn
+
+    def close(self):
+        """Flush queued writes, checkpoint the WAL and close the database connection."""
+        self.flush()
+        _open_caches.discard(self)
+        with self._lock:
+            self._flush_hits()
+            self.conn.execute("PRAGMA optimize")  # recommended before closing
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.close()
 
     def _init_db(self):
         """Initialize the database schema."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS response_cache (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                query_hash TEXT UNIQUE NOT NULL,
-                query TEXT NOT NULL,
-                settings_hash TEXT NOT NULL,
-                response TEXT NOT NULL,
-                sources TEXT,
-                created_at TEXT NOT NULL,
-                hit_count INTEGER DEFAULT 1
-            )
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_query_hash ON response_cache(query_hash)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_created_at ON response_cache(created_at)
-        """)
-
-        conn.commit()
-        conn.close()
-
-    def _hash_query(self, query: str, settings: Dict[str, Any]) -> str:
-        """Generate a hash for the query + settings combination."""
-        # Normalize query
-        normalized = query.lower().strip()
-
-        # Include relevant settings in hash
-        settings_str = json.dumps({
-            "top_k": settings.get("top_k", 5),
-            "use_expansion": settings.get("use_expansion", True),
-            "use_hybrid": settings.get("use_hybrid", True),
-            "use_hyde": settings.get("use_hyde", False)
-        }, sort_keys=True)
-
-        combined = f"{normalized}|{settings_str}"
-        return hashlib.sha256(combined.encode()).hexdigest()[:32]
-
-    def _hash_settings(self, settings: Dict[str, Any]) -> str:
-        """Generate a hash for settings only."""
-        settings_str = json.dumps(settings, sort_keys=True)
-        return hashlib.sha256(settings_str.encode()).hexdigest()[:16]
-
-    def get(self, query: str, settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._lock, self.conn:
+            cursor = self.conn.cursor()
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    query_hash BLOB UNIQUE NOT NULL,
+                    query TEXT NOT NULL,
+                    query_key TEXT,
+                    settings_hash BLOB NOT NULL,
+                    response TEXT NOT NULL,
+                    sources BLOB,
+                    embedding BLOB,
+                    created_at TEXT NOT NULL,
+                    hit_count INTEGER DEFAULT 1
+                )
+            """)
+
+            # Older databases lack query_key; add and backfill it
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(response_cache)")]
+            if "query_key" not in columns:
+                self.conn.create_function("query_key", 1, _query_key, deterministic=True)
+                cursor.execute("ALTER TABLE response_cache ADD COLUMN query_key TEXT")
+                cursor.execute("UPDATE response_cache SET query_key = query_key(query)")
+            if "embedding" not in columns:
+                cursor.execute("ALTER TABLE response_cache ADD COLUMN embedding BLOB")
+
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_query_hash ON response_cache(query_hash)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_query_key ON response_cache(query_key)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_created_at ON response_cache(created_at)
+            """)
+
+    def _cutoff(self) -> str:
+        """Oldest created_at that is still live; ISO UTC strings compare in time order."""
+        return (datetime.now(timezone.utc) - timedelta(hours=self.ttl_hours)).isoformat()
+
+    def _hash_query(self, query: str, settings: Dict[str, Any]) -> bytes:
+        """Key for the query + settings combination: a 16-byte BLAKE2b digest."""
+        h = hashlib.blake2b(_normalize_query(query).encode(), digest_size=16)
+        h.update(b"|")
+        h.update(self._hash_settings(settings))
+        return h.digest()
+
+    def _hash_settings(self, settings: Dict[str, Any]) -> bytes:
+        """The settings that affect the answer, packed into a fixed 7-byte key."""
+        top_k = settings.get("top_k", 5)
+        flags = (
+            bool(settings.get("use_expansion", True)),
+            bool(settings.get("use_hybrid", True)),
+            bool(settings.get("use_hyde", False))
+        )
+        try:
+            if top_k == int(top_k):  # 5.0 from JSON keys the same as 5
+                return _SETTINGS_STRUCT.pack(int(top_k), *flags)
+        except (TypeError, ValueError, OverflowError, struct.error):
+            pass
+        # Anything else (None, 2.5, out of range) gets a JSON key, never 7 bytes long
+        return json.dumps([top_k, *flags]).encode()
+
+    def get(self, query: str, settings: Dict[str, Any]) -> Optional[_CachedResult]:
         """
         Get cached response if available and not expired.
 
@@ -86,45 +269,26 @@ class ResponseCache:
             settings: Current settings
 
         Returns:
-            Cached response dict or None
+            Cached response (answer, sources, cached; dict-style access) or None
         """
         query_hash = self._hash_query(query, settings)
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        # Check for cached response
-        cursor.execute("""
-            SELECT response, sources, created_at, id FROM response_cache
-            WHERE query_hash = ?
-        """, (query_hash,))
-
-        row = cursor.fetchone()
-
-        if row:
-            response, sources, created_at, cache_id = row
-
-            # Check if expired
-            created = datetime.fromisoformat(created_at)
-            if datetime.now(timezone.utc) - created < timedelta(hours=self.ttl_hours):
-                # Update hit count
-                cursor.execute("""
-                    UPDATE response_cache SET hit_count = hit_count + 1 WHERE id = ?
-                """, (cache_id,))
-                conn.commit()
-                conn.close()
-
-                return {
-                    "answer": response,
-                    "sources": json.loads(sources) if sources else [],
-                    "cached": True
-                }
-            else:
-                # Expired, delete it
-                cursor.execute("DELETE FROM response_cache WHERE id = ?", (cache_id,))
-                conn.commit()
-
-        conn.close()
+        with self._lock:
+            cursor = self.conn.cursor()
+
+            # Check for a live cached response; expired rows stay invisible until
+            # clear_expired() (daily scheduler job) range-deletes them
+            cursor.execute(_SQL_GET, (query_hash, self._cutoff()))
+
+            row = cursor.fetchone()
+
+            if row:
+                response, sources, cache_id = row
+
+                self._count_hit(cache_id)
+
+                return _CachedResult(response, sources)
+
         return None
 
     def set(
@@ -132,7 +296,8 @@ class ResponseCache:
         query: str,
         settings: Dict[str, Any],
         response: str,
-        sources: list
+        sources: list,
+        embedding: Optional[Sequence[float]] = None
     ):
         """
         Cache a response.
@@ -142,85 +307,310 @@ class ResponseCache:
             settings: Current settings
             response: LLM response
             sources: List of sources
+            embedding: Query embedding, enables semantic lookups for this entry
         """
-        query_hash = self._hash_query(query, settings)
+        self._write_entries([(query, settings, response, sources, embedding)])
+
+    def set_async(
+        self,
+        query: str,
+        settings: Dict[str, Any],
+        response: str,
+        sources: list,
+        embedding: Optional[Sequence[float]] = None
+    ):
+        """
+        Queue a response for a background writer and return immediately.
+
+        Takes the same arguments as set(). Queued entries are written in
+        batches, one transaction per batch; until then lookups miss them.
+        """
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._drain_writes, name="ResponseCacheWriter", daemon=True
+                )
+                self._writer.start()
+
+        self._write_q.put((query, settings, response, sources, embedding))
+
+    def flush(self):
+        """Block until all queued responses have been written."""
+        if self._writer is not None:
+            self._write_q.join()
+
+    def _drain_writes(self, max_batch: int = 64):
+        """Writer thread: write queued responses in batches."""
+        while True:
+            batch = [self._write_q.get()]
+            while len(batch) < max_batch:
+                try:
+                    batch.append(self._write_q.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._write_entries(batch)
+            except Exception as e:
+                print(f"[ResponseCache] Failed to write {len(batch)} queued responses: {e}")
+            finally:
+                for _ in batch:
+                    self._write_q.task_done()
+
+    def _write_entries(self, entries: List[Tuple[str, Dict[str, Any], str, list, Optional[Sequence[float]]]]):
+        """Upsert (query, settings, response, sources, embedding) entries in one transaction."""
+        now = datetime.now(timezone.utc).isoformat()
+
+        with self._lock, self.conn:
+            for query, settings, response, sources, embedding in entries:
+                settings_hash = self._hash_settings(settings)
+                vector = self._to_unit_vector(embedding) if embedding is not None else None
+
+                # Upsert keeps the row id stable and an embedding stored by an earlier set()
+                cache_id = self.conn.execute(_SQL_UPSERT_RESPONSE, (
+                    self._hash_query(query, settings),
+                    query,
+                    _query_key(query),
+                    settings_hash,
+                    response,
+                    _dump_sources(sources),
+                    vector.tobytes() if vector is not None else None,
+                    now
+                )).fetchone()[0]
+                self._pending_hits.pop(cache_id, None)  # the upsert reset hit_count
+
+                if vector is not None and self._emb_loaded:
+                    self._add_embedding(cache_id, settings_hash, vector)
+
+    # =========================================================================
+    # SEMANTIC TIER
+    # =========================================================================
+
+    @staticmethod
+    def _to_unit_vector(embedding: Sequence[float]):
+        """Convert an embedding to a normalized float32 vector (None without numpy)."""
+        if not NUMPY_AVAILABLE:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _load_embeddings(self):
+        """Load stored embeddings into the in-memory matrix (caller holds the lock)."""
+        rows = self.conn.execute(
+            "SELECT id, settings_hash, embedding FROM response_cache WHERE embedding IS NOT NULL"
+        ).fetchall()
+
+        self._emb_ids, self._emb_settings, vectors = [], [], []
+        for cache_id, settings_hash, blob in rows:
+            vector = np.frombuffer(blob, dtype=np.float32)
+            if vectors and vector.shape != vectors[0].shape:
+                continue  # Embedding model changed; skip stale dimensions
+            self._emb_ids.append(cache_id)
+            self._emb_settings.append(settings_hash)
+            vectors.append(vector)
+
+        self._emb_matrix = np.vstack(vectors) if vectors else None
+        self._emb_loaded = True
+
+    def _add_embedding(self, cache_id: int, settings_hash: bytes, vector):
+        """Insert or replace one row of the in-memory matrix (caller holds the lock)."""
+        if self._emb_matrix is not None and vector.shape[0] != self._emb_matrix.shape[1]:
+            return
+        if cache_id in self._emb_ids:
+            index = self._emb_ids.index(cache_id)
+            self._emb_settings[index] = settings_hash
+            self._emb_matrix[index] = vector
+            return
+
+        self._emb_ids.append(cache_id)
+        self._emb_settings.append(settings_hash)
+        row = vector[np.newaxis, :]
+        self._emb_matrix = row.copy() if self._emb_matrix is None else np.vstack([self._emb_matrix, row])
+
+    def _reset_embeddings(self):
+        """Forget the in-memory matrix so it is reloaded on the next lookup."""
+        with self._lock:
+            self._emb_ids, self._emb_settings = [], []
+            self._emb_matrix = None
+            self._emb_loaded = False
+
+    def get_similar(
+        self,
+        embedding: Sequence[float],
+        settings: Dict[str, Any],
+        threshold: float = 0.95
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached response for a near-duplicate query.
+
+        Args:
+            embedding: Embedding of the new query
+            settings: Current settings (only entries with the same settings match)
+            threshold: Minimum cosine similarity for a hit
+
+        Returns:
+            Cached response dict (with "similarity") or None
+        """
+        vector = self._to_unit_vector(embedding)
+        if vector is None:
+            return None
         settings_hash = self._hash_settings(settings)
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT OR REPLACE INTO response_cache
-            (query_hash, query, settings_hash, response, sources, created_at, hit_count)
-            VALUES (?, ?, ?, ?, ?, ?, 1)
-        """, (
-            query_hash,
-            query,
-            settings_hash,
-            response,
-            json.dumps(sources),
-            datetime.now(timezone.utc).isoformat()
-        ))
-
-        conn.commit()
-        conn.close()
+        with self._lock:
+            if not self._emb_loaded:
+                self._load_embeddings()
+            if self._emb_matrix is None or vector.shape[0] != self._emb_matrix.shape[1]:
+                return None
+
+            similarities = self._emb_matrix @ vector
+            mask = np.fromiter(
+                (h == settings_hash for h in self._emb_settings), dtype=bool, count=len(self._emb_settings)
+            )
+            similarities[~mask] = -1.0
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < threshold:
+                return None
+
+            row = self.conn.execute("""
+                SELECT response, sources, created_at >= ? FROM response_cache WHERE id = ?
+            """, (self._cutoff(), self._emb_ids[best])).fetchone()
+            if row is None:
+                # Invalidated through another instance; resync on next lookup
+                self._emb_loaded = False
+                return None
+
+            response, sources, live = row
+            if not live:
+                return None
+
+            self._count_hit(self._emb_ids[best])
+
+        return {
+            "answer": response,
+            "sources": _load_sources(sources),
+            "cached": True,
+            "similarity": similarity
+        }
+
+    # =========================================================================
+    # HIT COUNTS
+    # =========================================================================
+
+    def _count_hit(self, cache_id: int):
+        """Record a hit in memory, flushing once enough have accumulated (lock held)."""
+        self._pending_hits[cache_id] += 1
+        if len(self._pending_hits) >= 256:
+            self._flush_hits()
+
+    def _flush_hits(self):
+        """Write pending hit counts in one transaction."""
+        with self._lock:
+            if not self._pending_hits:
+                return
+            pending = list(self._pending_hits.items())
+            self._pending_hits.clear()
+            try:
+                with self.conn:
+                    self.conn.executemany(
+                        "UPDATE response_cache SET hit_count = hit_count + ? WHERE id = ?",
+                        [(hits, cache_id) for cache_id, hits in pending]
+                    )
+            except sqlite3.Error as e:
+                # Hit counts are statistics only; never fail a lookup over them
+                print(f"[ResponseCache] Could not write hit counts: {e}")
+
+    def invalidate_by_hash(self, query_key: str) -> int:
+        """
+        Delete every cached response for a query, whatever its settings.
+
+        Args:
+            query_key: Settings-independent query key (FeedbackLearner._hash_query)
+
+        Returns:
+            Number of entries deleted
+        """
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM response_cache WHERE query_key = ?", (query_key,)
+            )
+            if cursor.rowcount:
+                self._reset_embeddings()
+            return cursor.rowcount
 
     def clear(self):
         """Clear all cached responses."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM response_cache")
-        conn.commit()
-        conn.close()
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM response_cache")
+            self._pending_hits.clear()
+            self._reset_embeddings()
 
     def clear_expired(self):
         """Clear only expired responses."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cutoff = (datetime.now(timezone.utc) - timedelta(hours=self.ttl_hours)).isoformat()
-        cursor.execute("DELETE FROM response_cache WHERE created_at < ?", (cutoff,))
-
-        deleted = cursor.rowcount
-        conn.commit()
-        conn.close()
-
-        return deleted
+        with self._lock, self.conn:
+            # Range delete on idx_created_at
+            cursor = self.conn.execute("DELETE FROM response_cache WHERE created_at < ?", (self._cutoff(),))
+            if cursor.rowcount:
+                self._reset_embeddings()
+        # Runs daily from the scheduler: keep planner stats current as the table churns
+        with self._lock:
+            self.conn.execute("PRAGMA optimize")
+        return cursor.rowcount
 
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT
-                COUNT(*) as total_entries,
-                SUM(hit_count) as total_hits,
-                AVG(hit_count) as avg_hits_per_entry
-            FROM response_cache
-        """)
-
-        row = cursor.fetchone()
-        conn.close()
+        self.flush()  # include responses still queued by set_async()
+        with self._lock:
+            self._flush_hits()
+            total_entries, total_hits, avg_hits = self.conn.execute("""
+                SELECT
+                    COUNT(*),
+                    COALESCE(SUM(hit_count), 0),
+                    COALESCE(AVG(hit_count), 0)
+                FROM response_cache
+            """).fetchone()
 
         return {
-            "total_entries": row[0] or 0,
-            "total_hits": row[1] or 0,
-            "avg_hits_per_entry": round(row[2] or 0, 2)
+            "total_entries": total_entries,
+            "total_hits": total_hits,
+            "avg_hits_per_entry": round(avg_hits, 2)
         }
 
     def get_recent(self, limit: int = 20) -> list:
         """Get recent cached queries."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._lock:
+            self._flush_hits()
+            rows = self.conn.execute("""
+                SELECT query, hit_count, created_at FROM response_cache
+                ORDER BY created_at DESC
+                LIMIT ?
+            """, (limit,)).fetchall()
 
-        cursor.execute("""
-            SELECT query, hit_count, created_at FROM response_cache
-            ORDER BY created_at DESC
-            LIMIT ?
-        """, (limit,))
+        return [{"query": r[0], "hits": r[1], "created": r[2]} for r in rows]
 
-        rows = cursor.fetchall()
-        conn.close()
 
-        return [{"query": r[0], "hits": r[1], "created": r[2]} for r in rows]
+@lru_cache(maxsize=None)
+def _shared_cache(db_path: str, ttl_hours: int) -> ResponseCache:
+    return ResponseCache(db_path=db_path, ttl_hours=ttl_hours)
+
+
+def get_response_cache(db_path: str = None, ttl_hours: int = 24) -> ResponseCache:
+    """
+    Get the shared ResponseCache for a database.
+
+    One instance (and one SQLite connection) per db_path, so every caller and
+    thread reuses the same open connection and warm page cache.
+
+    Args:
+        db_path: Path to SQLite database (defaults to data/response_cache.db)
+        ttl_hours: Time-to-live for cached responses in hours
+
+    Returns:
+        Shared ResponseCache instance
+    """
+    path = Path(db_path) if db_path else config.data_dir / "response_cache.db"
+    return _shared_cache(str(path.resolve()), ttl_hours)
+
+
+get_response_cache.cache_clear = _shared_cache.cache_clear
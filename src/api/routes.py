@@ -3,28 +3,27 @@ API routes for the chatbot.
 """
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from datetime import datetime, timezone
 import json
-import ollama
 
 from .schemas import (
     ChatRequest, ChatResponse, Source,
     FeedbackRequest, FeedbackResponse,
-    SourceListResponse, HealthResponse
+    SourceListResponse, HealthResponse, SOURCE_LIST_ADAPTER
 )
 from ..generation.enhanced_rag_chain import EnhancedRAGChain
+from ..ollama_client import get_client
 from ..retrieval.vector_store import VectorStore
-from ..analytics.response_cache import ResponseCache
-from ..feedback.feedback_learner import FeedbackLearner
-from ..config import config
+from ..analytics.response_cache import get_response_cache
+from ..feedback.feedback_learner import get_feedback_learner
 
 router = APIRouter()
 
 # Initialize components (lazy loading)
 _rag_chain = None
 _vector_store = None
-_response_cache = None
-_feedback_learner = None
+_feedback_store = None
 
 
 def get_rag_chain() -> EnhancedRAGChain:
@@ -47,20 +46,14 @@ def get_vector_store() -> VectorStore:
     return _vector_store
 
 
-def get_response_cache() -> ResponseCache:
-    """Get or create response cache instance."""
-    global _response_cache
-    if _response_cache is None:
-        _response_cache = ResponseCache()
-    return _response_cache
-
+def get_feedback_store():
+    """Get or create feedback store instance."""
+    from ..feedback.store import FeedbackStore
 
-def get_feedback_learner() -> FeedbackLearner:
-    """Get or create feedback learner instance."""
-    global _feedback_learner
-    if _feedback_learner is None:
-        _feedback_learner = FeedbackLearner()
-    return _feedback_learner
+    global _feedback_store
+    if _feedback_store is None:
+        _feedback_store = FeedbackStore()
+    return _feedback_store
 
 
 def _sanitize_input(text: str, max_length: int = 1000) -> str:
@@ -74,8 +67,13 @@ def _sanitize_input(text: str, max_length: int = 1000) -> str:
     return text
 
 
+# Handlers that block on Ollama, Chroma or SQLite are plain `def`: FastAPI runs
+# them in its worker threadpool instead of stalling the event loop for every
+# other request. /chat/stream stays async; Starlette iterates its sync
+# generator in the threadpool.
+
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+def chat(request: ChatRequest):
     """
     Send a message and get a response from the chatbot.
     """
@@ -87,16 +85,19 @@ async def chat(request: ChatRequest):
         rag_chain = get_rag_chain()
         cache = get_response_cache()
 
-        # Check cache first
+        # Check cache first (follow-up answers depend on the conversation)
         settings = {"top_k": request.top_k, "use_expansion": True, "use_hybrid": True, "use_hyde": False}
-        cached = cache.get(sanitized, settings)
+        cached = None if request.conversation_history else cache.get(sanitized, settings)
+        if cached:
+            try:
+                cached_sources = SOURCE_LIST_ADAPTER.validate_python(cached.get("sources", []))
+            except ValidationError:
+                # Written by older code with a different source shape: treat as a miss
+                cached = None
         if cached:
             return ChatResponse(
                 answer=cached["answer"],
-                sources=[
-                    Source(title=s.get("title", ""), author=s.get("author", ""), url=s.get("url", ""))
-                    for s in cached.get("sources", [])
-                ],
+                sources=cached_sources,
                 query=sanitized,
                 cached=True,
                 log_id=None,
@@ -110,9 +111,6 @@ async def chat(request: ChatRequest):
             conversation_history=request.conversation_history
         )
 
-        # Cache the result
-        cache.set(sanitized, settings, result.answer, result.sources)
-
         return ChatResponse(
             answer=result.answer,
             sources=[
@@ -147,12 +145,12 @@ async def chat_stream(request: ChatRequest):
 
     def generate():
         try:
-            from ..generation.rag_chain import RAGChain
-            rag_chain = RAGChain()
-            for event in rag_chain.query_stream(
+            rag_chain = get_rag_chain()
+            for event in rag_chain.query_events(
                 question=sanitized,
                 top_k=request.top_k,
-                temperature=request.temperature
+                temperature=request.temperature,
+                conversation_history=request.conversation_history
             ):
                 yield f"data: {json.dumps(event)}\n\n"
         except Exception as e:
@@ -165,15 +163,14 @@ async def chat_stream(request: ChatRequest):
 
 
 @router.post("/feedback", response_model=FeedbackResponse)
-async def submit_feedback(request: FeedbackRequest):
+def submit_feedback(request: FeedbackRequest):
     """
     Submit feedback on a chatbot response and trigger automatic learning.
     """
-    from ..feedback.store import FeedbackStore
     from ..feedback.models import Feedback, FeedbackType as FBType
 
     try:
-        store = FeedbackStore()
+        store = get_feedback_store()
 
         feedback = Feedback(
             id="",
@@ -191,7 +188,8 @@ async def submit_feedback(request: FeedbackRequest):
         cache = get_response_cache()
         is_positive = request.feedback_type.value == "thumbs_up"
 
-        learner.process_feedback(
+        # Learning writes happen on the learner's background writer
+        learner.process_feedback_async(
             query=request.query,
             is_positive=is_positive,
             chunk_ids=request.chunk_ids or [],
@@ -212,7 +210,7 @@ async def submit_feedback(request: FeedbackRequest):
 
 
 @router.get("/sources", response_model=SourceListResponse)
-async def list_sources():
+def list_sources():
     """
     List all sources in the knowledge base.
     """
@@ -241,14 +239,13 @@ async def list_sources():
 
 
 @router.get("/health", response_model=HealthResponse)
-async def health_check():
+def health_check():
     """
     Check the health of the chatbot service.
     """
     ollama_connected = False
     try:
-        client = ollama.Client(host=config.ollama_base_url)
-        client.list()
+        get_client().list()
         ollama_connected = True
     except Exception:
         pass
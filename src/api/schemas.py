@@ -2,7 +2,7 @@
 Pydantic models for API request/response schemas.
 """
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator
 from datetime import datetime
 from enum import Enum
 
@@ -27,13 +27,16 @@ class ChatRequest(BaseModel):
     @field_validator("message")
     @classmethod
     def message_not_empty(cls, v: str) -> str:
-        if not v.strip():
+        v = v.strip()
+        if not v:
             raise ValueError("Message cannot be empty or whitespace only")
-        return v.strip()
+        return v
 
 
 class Source(BaseModel):
     """Source reference from a blog post."""
+    model_config = ConfigDict(frozen=True)
+
     title: str
     author: str
     url: str
@@ -68,6 +71,10 @@ class FeedbackRequest(BaseModel):
     log_id: Optional[int] = Field(None, description="Log entry ID for analytics update")
 
 
+# Validates cached source dicts in one pass instead of building Source objects one by one
+SOURCE_LIST_ADAPTER = TypeAdapter(List[Source])
+
+
 class FeedbackResponse(BaseModel):
     """Response model for feedback endpoint."""
     success: bool
@@ -3,6 +3,9 @@ Central configuration for the Near Partner RAG Chatbot.
 """
 from pathlib import Path
 from dataclasses import dataclass
+from typing import ClassVar
+
+__all__ = ["Config", "config"]
 
 
 @dataclass
@@ -21,6 +24,9 @@ class Config:
     ollama_base_url: str = "http://localhost:11434"
     llm_model: str = "gemma2:2b"  # Faster on CPU
     embedding_model: str = "nomic-embed-text"
+    embedding_concurrency: int = 4  # Embedding batches in flight at once during ingestion
+    # How long Ollama keeps models (and their prompt KV cache) loaded between requests
+    ollama_keep_alive: str = "30m"
 
     # Chunking settings (in characters; ~1200 chars ≈ 300-400 tokens)
     chunk_size: int = 1200
@@ -29,6 +35,12 @@ class Config:
     # Retrieval settings
     top_k: int = 3  # Number of chunks to retrieve (less = faster)
     similarity_threshold: float = 0.0  # Disabled - let LLM decide relevance
+    retrieval_cache_size: int = 512  # Recent queries whose results Retriever can reuse
+    retrieval_cache_threshold: float = 0.95  # Cosine similarity for reusing a cached result set
+
+    # Generation settings
+    max_chunk_chars: int = 1500  # Per-chunk cap in the prompt; bounds LLM prefill
+    max_prompt_tokens: int = 2048  # Context budget (~4 chars/token); lowest-ranked chunks dropped first
 
     # ChromaDB collection name
     collection_name: str = "nearpartner_knowledge"
@@ -39,10 +51,20 @@ class Config:
     api_host: str = "127.0.0.1"
     api_port: int = 8000
 
-    def __post_init__(self):
-        """Ensure directories exist."""
+    _dirs_ready: ClassVar[bool] = False
+
+    def ensure_dirs(self):
+        """
+        Ensure data directories exist.
+
+        Called by the stores on first use rather than at import time, so
+        importing config never touches the filesystem. Repeated calls are no-ops.
+        """
+        if Config._dirs_ready:
+            return
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.chroma_db_path.mkdir(parents=True, exist_ok=True)
+        Config._dirs_ready = True
 
 
 # Global config instance
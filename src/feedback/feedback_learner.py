@@ -9,77 +9,303 @@ Implements:
 """
 import sqlite3
 import json
+import re
 import hashlib
+import threading
+import queue
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
 from ..config import config
 
 
+# Words too common in this knowledge base to say anything about similarity
+_STOPWORDS = frozenset({
+    "what", "where", "which", "does", "have", "this", "that", "with",
+    "from", "about", "into", "your", "near", "partner"
+})
+_WORD_RE = re.compile(r"\w{4,}")
+
+
+@lru_cache(maxsize=256)
+def _dump_chunk_ids(chunk_ids: Tuple[str, ...]) -> str:
+    """Compact JSON for a chunk id list; memoized since the same chunks recur."""
+    return json.dumps(chunk_ids, separators=(",", ":"), ensure_ascii=False)
+
+
+# Boost/penalize a chunk, accumulating onto any existing row
+_SQL_UPSERT_CHUNK = """
+    INSERT INTO chunk_adjustments
+    (chunk_id, score_adjustment, positive_count, negative_count, last_updated)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(chunk_id) DO UPDATE SET
+        score_adjustment = score_adjustment + excluded.score_adjustment,
+        positive_count = positive_count + excluded.positive_count,
+        negative_count = negative_count + excluded.negative_count,
+        last_updated = excluded.last_updated
+"""
+
+# Count a negative feedback; promote 'monitoring' to 'pending' at the threshold
+_SQL_FLAG_QUERY = """
+    INSERT INTO flagged_queries
+    (query, query_hash, negative_count, flag_reason, status, created_at)
+    VALUES (?, ?, 1, NULL, 'monitoring', ?)
+    ON CONFLICT(query_hash) DO UPDATE SET
+        negative_count = negative_count + 1,
+        flag_reason = CASE
+            WHEN status = 'monitoring' AND negative_count + 1 >= ? THEN ?
+            ELSE flag_reason
+        END,
+        status = CASE
+            WHEN status = 'monitoring' AND negative_count + 1 >= ? THEN 'pending'
+            ELSE status
+        END
+    RETURNING negative_count, status
+"""
+
+# Record a successful query and the chunks that answered it
+_SQL_UPSERT_MAPPING = """
+    INSERT INTO query_mappings
+    (original_query, query_hash, successful_chunks, positive_count, created_at, last_used)
+    VALUES (?, ?, ?, 1, ?, ?)
+    ON CONFLICT(query_hash) DO UPDATE SET
+        positive_count = positive_count + 1,
+        successful_chunks = excluded.successful_chunks,
+        last_used = excluded.last_used
+"""
+
+# Top learned queries sharing words with the user query
+_SQL_SIMILAR_QUERIES_FTS = """
+    SELECT qm.original_query, qm.successful_chunks, qm.positive_count
+    FROM query_mappings_fts f
+    JOIN query_mappings qm ON qm.id = f.rowid
+    WHERE query_mappings_fts MATCH ?
+    ORDER BY qm.positive_count DESC
+    LIMIT 10
+"""
+
+# Chunk boosts summed over the same top similar queries
+_SQL_LEARNED_BOOSTS_FTS = """
+    WITH similar AS (
+        SELECT qm.successful_chunks, qm.positive_count
+        FROM query_mappings_fts f
+        JOIN query_mappings qm ON qm.id = f.rowid
+        WHERE query_mappings_fts MATCH ?
+        ORDER BY qm.positive_count DESC
+        LIMIT 10
+    )
+    SELECT je.value, SUM(0.05 * s.positive_count)
+    FROM similar s, json_each(s.successful_chunks) je
+    GROUP BY je.value
+"""
+
+# Learning statistics in one statement
+_SQL_STATS = """
+    SELECT c.total, c.boosted, c.penalized, f.by_status, m.total, m.positives
+    FROM (
+        SELECT
+            COUNT(*) AS total,
+            SUM(CASE WHEN score_adjustment > 0 THEN 1 ELSE 0 END) AS boosted,
+            SUM(CASE WHEN score_adjustment < 0 THEN 1 ELSE 0 END) AS penalized
+        FROM chunk_adjustments
+    ) c,
+    (
+        SELECT json_group_object(status, n) AS by_status
+        FROM (SELECT status, COUNT(*) AS n FROM flagged_queries GROUP BY status)
+    ) f,
+    (
+        SELECT COUNT(*) AS total, SUM(positive_count) AS positives
+        FROM query_mappings
+    ) m
+"""
+
+
 class FeedbackLearner:
     """
     Learns from user feedback to improve the RAG system automatically.
     """
 
     def __init__(self, db_path: str = None):
+        config.ensure_dirs()
         self.db_path = db_path or str(config.data_dir / "feedback_learning.db")
+        # One persistent connection shared across calls; the lock serializes
+        # access from FastAPI/Streamlit worker threads.
+        self._lock = threading.RLock()
+        self._conn = self._connect()
+        # In-memory view of chunk_adjustments: chunk_id -> adjustment, or None
+        # when the chunk is known to have no row. Writes update it in place.
+        self._adj_cache: Dict[str, Optional[float]] = {}
+        self._adj_cache_full = False
+        # Changes when another connection (e.g. the API or Streamlit process)
+        # commits, which the in-memory cache would not otherwise see
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        # Write-behind queue for process_feedback_async; the writer thread
+        # is started on first use so short-lived instances never spawn one.
+        self._write_q: queue.Queue = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
         self._init_db()
 
+    def _connect(self) -> sqlite3.Connection:
+        """Open the persistent database connection."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache
+        return conn
+
+    @contextmanager
+    def _write_txn(self):
+        """
+        Hold the lock for one write transaction on the persistent connection.
+
+        Adjustments are written through to the in-memory cache before commit,
+        so a rolled-back transaction drops the whole cache.
+        """
+        with self._lock:
+            try:
+                with self._conn:
+                    yield self._conn.cursor()
+            except BaseException:
+                self.invalidate_adjustment_cache()
+                raise
+
+    def close(self):
+        """Flush queued feedback and close the database connection."""
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
     def _init_db(self):
         """Initialize the database schema."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._lock, self._conn:
+            cursor = self._conn.cursor()
 
-        # Chunk adjustments - boost or penalize specific chunks
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS chunk_adjustments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                chunk_id TEXT UNIQUE NOT NULL,
-                score_adjustment REAL DEFAULT 0,
-                positive_count INTEGER DEFAULT 0,
-                negative_count INTEGER DEFAULT 0,
-                last_updated TEXT NOT NULL
+            # Chunk adjustments - boost or penalize specific chunks
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS chunk_adjustments (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    chunk_id TEXT UNIQUE NOT NULL,
+                    score_adjustment REAL DEFAULT 0,
+                    positive_count INTEGER DEFAULT 0,
+                    negative_count INTEGER DEFAULT 0,
+                    last_updated TEXT NOT NULL
+                )
+            """)
+
+            # Flagged queries - queries needing review
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS flagged_queries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    query TEXT NOT NULL,
+                    query_hash TEXT UNIQUE NOT NULL,
+                    negative_count INTEGER DEFAULT 1,
+                    flag_reason TEXT,
+                    status TEXT DEFAULT 'pending',
+                    created_at TEXT NOT NULL,
+                    resolved_at TEXT
+                )
+            """)
+
+            # Query mappings - learned good query expansions
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS query_mappings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    original_query TEXT NOT NULL,
+                    query_hash TEXT NOT NULL,
+                    successful_chunks TEXT,
+                    positive_count INTEGER DEFAULT 1,
+                    created_at TEXT NOT NULL,
+                    last_used TEXT NOT NULL
+                )
+            """)
+
+            # Indexes
+            # Covering index: adjustment lookups are answered from the index alone.
+            # It supersedes idx_chunk_id, which duplicated the UNIQUE autoindex.
+            cursor.execute("DROP INDEX IF EXISTS idx_chunk_id")
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_chunk_adj_cov ON chunk_adjustments(chunk_id, score_adjustment)"
             )
-        """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_query_hash ON flagged_queries(query_hash)")
+            # get_flagged_queries: one index range scan, already in report order
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_flag_status ON flagged_queries(status, negative_count DESC)"
+            )
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_mapping_hash ON query_mappings(query_hash)")
 
-        # Flagged queries - queries needing review
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS flagged_queries (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                query TEXT NOT NULL,
-                query_hash TEXT UNIQUE NOT NULL,
-                negative_count INTEGER DEFAULT 1,
-                flag_reason TEXT,
-                status TEXT DEFAULT 'pending',
-                created_at TEXT NOT NULL,
-                resolved_at TEXT
+            # UPSERTs on query_mappings need query_hash to be unique; drop any
+            # duplicates left over from the old check-then-insert code first.
+            cursor.execute("""
+                DELETE FROM query_mappings
+                WHERE id NOT IN (SELECT MAX(id) FROM query_mappings GROUP BY query_hash)
+            """)
+            cursor.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_mapping_hash_unique ON query_mappings(query_hash)"
             )
-        """)
 
-        # Query mappings - learned good query expansions
+            # Full-text index over learned queries, kept in sync by triggers
+            self._fts_available = self._init_fts(cursor)
+
+            # Version 1 switched query hashes from SHA-256 to BLAKE2b; rehash stored rows
+            if cursor.execute("PRAGMA user_version").fetchone()[0] < 1:
+                self._conn.create_function("hash_query", 1, self._hash_query, deterministic=True)
+                cursor.execute("UPDATE flagged_queries SET query_hash = hash_query(query)")
+                cursor.execute("UPDATE query_mappings SET query_hash = hash_query(original_query)")
+                cursor.execute("PRAGMA user_version = 1")
+
+    def _init_fts(self, cursor) -> bool:
+        """Create the FTS5 shadow of query_mappings. Returns False if FTS5 is unavailable."""
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='query_mappings_fts'"
+        ).fetchone()
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS query_mappings_fts USING fts5(
+                    original_query,
+                    content='query_mappings',
+                    content_rowid='id',
+                    tokenize='porter unicode61'
+                )
+            """)
+        except sqlite3.OperationalError:
+            print("[FeedbackLearner] FTS5 not available, falling back to LIKE search")
+            return False
+
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS query_mappings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                original_query TEXT NOT NULL,
-                query_hash TEXT NOT NULL,
-                successful_chunks TEXT,
-                positive_count INTEGER DEFAULT 1,
-                created_at TEXT NOT NULL,
-                last_used TEXT NOT NULL
-            )
+            CREATE TRIGGER IF NOT EXISTS query_mappings_ai AFTER INSERT ON query_mappings BEGIN
+                INSERT INTO query_mappings_fts(rowid, original_query) VALUES (new.id, new.original_query);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS query_mappings_ad AFTER DELETE ON query_mappings BEGIN
+                INSERT INTO query_mappings_fts(query_mappings_fts, rowid, original_query)
+                VALUES ('delete', old.id, old.original_query);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS query_mappings_au AFTER UPDATE OF original_query ON query_mappings BEGIN
+                INSERT INTO query_mappings_fts(query_mappings_fts, rowid, original_query)
+                VALUES ('delete', old.id, old.original_query);
+                INSERT INTO query_mappings_fts(rowid, original_query) VALUES (new.id, new.original_query);
+            END
         """)
 
-        # Indexes
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_chunk_id ON chunk_adjustments(chunk_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_query_hash ON flagged_queries(query_hash)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_mapping_hash ON query_mappings(query_hash)")
-
-        conn.commit()
-        conn.close()
+        if not exists:
+            # Index rows learned before the FTS table existed
+            cursor.execute("INSERT INTO query_mappings_fts(query_mappings_fts) VALUES ('rebuild')")
+        return True
 
     def _hash_query(self, query: str) -> str:
         """Generate hash for a query."""
         normalized = query.lower().strip()
-        return hashlib.sha256(normalized.encode()).hexdigest()[:32]
+        # Only used as a lookup key, so a fast non-cryptographic-strength digest is enough
+        return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
 
     # =========================================================================
     # 1. CACHE INVALIDATION
@@ -97,22 +323,8 @@ class FeedbackLearner:
             True if cache was invalidated
         """
         try:
-            # Get all possible cache entries for this query (any settings)
-            conn = sqlite3.connect(cache.db_path)
-            cursor = conn.cursor()
-
-            # Find and delete matching cache entries
-            query_lower = query.lower().strip()
-            cursor.execute("""
-                DELETE FROM response_cache
-                WHERE LOWER(query) = ?
-            """, (query_lower,))
-
-            deleted = cursor.rowcount
-            conn.commit()
-            conn.close()
-
-            return deleted > 0
+            # Point delete on the cache's indexed, settings-independent query key
+            return cache.invalidate_by_hash(self._hash_query(query)) > 0
         except Exception as e:
             print(f"[FeedbackLearner] Cache invalidation failed: {e}")
             return False
@@ -131,109 +343,135 @@ class FeedbackLearner:
             chunk_id: The chunk identifier
             is_positive: True for positive feedback, False for negative
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        # Check if chunk exists
-        cursor.execute("SELECT * FROM chunk_adjustments WHERE chunk_id = ?", (chunk_id,))
-        row = cursor.fetchone()
+        with self._write_txn() as cursor:
+            self._adjust_chunk_scores(cursor, [chunk_id], is_positive)
 
+    def _adjust_chunk_scores(
+        self,
+        cursor: sqlite3.Cursor,
+        chunk_ids: List[str],
+        is_positive: bool,
+        now: Optional[str] = None
+    ):
+        """Boost or penalize chunks with a single UPSERT, inside a _write_txn()."""
         adjustment = 0.1 if is_positive else -0.15  # Penalize more than boost
+        positive, negative = (1, 0) if is_positive else (0, 1)
+        now = now or datetime.now(timezone.utc).isoformat()
 
-        if row:
-            # Update existing
-            if is_positive:
-                cursor.execute("""
-                    UPDATE chunk_adjustments
-                    SET score_adjustment = score_adjustment + ?,
-                        positive_count = positive_count + 1,
-                        last_updated = ?
-                    WHERE chunk_id = ?
-                """, (adjustment, datetime.now(timezone.utc).isoformat(), chunk_id))
+        cursor.executemany(
+            _SQL_UPSERT_CHUNK,
+            [(chunk_id, adjustment, positive, negative, now) for chunk_id in chunk_ids]
+        )
+        # Read the new totals back into the cache; callers hold self._lock
+        # until commit, so no reader sees them before they are durable
+        unique = list(dict.fromkeys(chunk_ids))
+        for i in range(0, len(unique), 500):  # stay under SQLite's parameter limit
+            part = unique[i:i + 500]
+            self._adj_cache.update(cursor.execute(
+                f"SELECT chunk_id, score_adjustment FROM chunk_adjustments WHERE chunk_id IN ({','.join('?' * len(part))})",
+                part
+            ).fetchall())
+
+    def invalidate_adjustment_cache(self, chunk_ids: Optional[List[str]] = None):
+        """
+        Drop cached adjustments so the next read goes to the database.
+
+        Args:
+            chunk_ids: Chunks to invalidate, or None to clear the whole cache
+        """
+        with self._lock:
+            if chunk_ids is None:
+                self._adj_cache.clear()
             else:
-                cursor.execute("""
-                    UPDATE chunk_adjustments
-                    SET score_adjustment = score_adjustment + ?,
-                        negative_count = negative_count + 1,
-                        last_updated = ?
-                    WHERE chunk_id = ?
-                """, (adjustment, datetime.now(timezone.utc).isoformat(), chunk_id))
-        else:
-            # Insert new
-            cursor.execute("""
-                INSERT INTO chunk_adjustments
-                (chunk_id, score_adjustment, positive_count, negative_count, last_updated)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                chunk_id,
-                adjustment,
-                1 if is_positive else 0,
-                0 if is_positive else 1,
-                datetime.now(timezone.utc).isoformat()
-            ))
-
-        conn.commit()
-        conn.close()
+                for chunk_id in chunk_ids:
+                    self._adj_cache.pop(chunk_id, None)
+            self._adj_cache_full = False
+
+    def _sync_adjustment_cache(self):
+        """Drop the adjustment cache if another connection has written since it was filled."""
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._data_version = version
+            self._adj_cache.clear()
+            self._adj_cache_full = False
 
     def get_chunk_adjustment(self, chunk_id: str) -> float:
         """Get the score adjustment for a chunk."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute(
-            "SELECT score_adjustment FROM chunk_adjustments WHERE chunk_id = ?",
-            (chunk_id,)
-        )
-        row = cursor.fetchone()
-        conn.close()
-
-        return row[0] if row else 0.0
+        return self.get_chunk_adjustments([chunk_id]).get(chunk_id, 0.0)
 
     def get_all_chunk_adjustments(self) -> Dict[str, float]:
         """Get all chunk adjustments as a dictionary."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT chunk_id, score_adjustment FROM chunk_adjustments")
-        rows = cursor.fetchall()
-        conn.close()
-
-        return {row[0]: row[1] for row in rows}
+        with self._lock:
+            self._sync_adjustment_cache()
+            if not self._adj_cache_full:
+                rows = self._conn.execute(
+                    "SELECT chunk_id, score_adjustment FROM chunk_adjustments"
+                ).fetchall()
+                self._adj_cache = dict(rows)
+                self._adj_cache_full = True
+
+            return {k: v for k, v in self._adj_cache.items() if v is not None}
+
+    def get_chunk_adjustments(self, chunk_ids: List[str]) -> Dict[str, float]:
+        """Get adjustments for the given chunks only, served from memory when cached."""
+        with self._lock:
+            self._sync_adjustment_cache()
+            if not self._adj_cache_full:
+                missing = [cid for cid in set(chunk_ids) if cid not in self._adj_cache]
+                if missing:
+                    placeholders = ",".join("?" * len(missing))
+                    rows = dict(self._conn.execute(
+                        f"SELECT chunk_id, score_adjustment FROM chunk_adjustments WHERE chunk_id IN ({placeholders})",
+                        missing
+                    ).fetchall())
+                    for cid in missing:
+                        self._adj_cache[cid] = rows.get(cid)
+
+            return {
+                cid: self._adj_cache[cid]
+                for cid in chunk_ids
+                if self._adj_cache.get(cid) is not None
+            }
 
     def apply_adjustments_to_results(
         self,
-        results: List[Dict[str, Any]]
+        results: List[Dict[str, Any]],
+        top_k: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Apply learned adjustments to retrieval results.
 
         Args:
             results: List of retrieval results
+            top_k: Keep only the best top_k results (all when None)
 
         Returns:
             Results with adjusted scores, re-sorted
         """
-        adjustments = self.get_all_chunk_adjustments()
+        adjustments = self.get_chunk_adjustments([r.get("id", "") for r in results])
 
         if not adjustments:
-            return results
-
-        for result in results:
-            chunk_id = result.get("id", "")
-            if chunk_id in adjustments:
-                # Apply adjustment to the score
-                original_score = result.get("combined_score", result.get("semantic_score", 0.5))
-                adjustment = adjustments[chunk_id]
-                result["adjusted_score"] = max(0, min(1, original_score + adjustment))
-                result["had_adjustment"] = True
-            else:
-                result["adjusted_score"] = result.get("combined_score", result.get("semantic_score", 0.5))
-                result["had_adjustment"] = False
+            return results if top_k is None else results[:top_k]
 
-        # Re-sort by adjusted score
-        results.sort(key=lambda x: x.get("adjusted_score", 0), reverse=True)
+        # Add and clamp in one NumPy pass; unadjusted scores are kept as-is
+        n = len(results)
+        base = np.fromiter(
+            (r.get("combined_score", r.get("semantic_score", 0.5)) for r in results),
+            dtype=np.float64, count=n
+        )
+        had = np.fromiter((r.get("id", "") in adjustments for r in results), dtype=bool, count=n)
+        delta = np.fromiter((adjustments.get(r.get("id", ""), 0.0) for r in results), dtype=np.float64, count=n)
+        adjusted = np.where(had, np.clip(base + delta, 0, 1), base)
 
-        return results
+        for result, score, flag in zip(results, adjusted.tolist(), had.tolist()):
+            result["adjusted_score"] = score
+            result["had_adjustment"] = flag
+
+        # Re-sort by adjusted score (stable, so ties keep retrieval order)
+        order = np.argsort(-adjusted, kind="stable")
+        if top_k is not None:
+            order = order[:top_k]
+        return [results[i] for i in order.tolist()]
 
     # =========================================================================
     # 3. AUTO-FLAGGING REPEATED ISSUES
@@ -250,45 +488,36 @@ class FeedbackLearner:
         Returns:
             Flag reason if flagged, None otherwise
         """
-        query_hash = self._hash_query(query)
-
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        # Check existing flags
-        cursor.execute(
-            "SELECT negative_count, status FROM flagged_queries WHERE query_hash = ?",
-            (query_hash,)
-        )
-        row = cursor.fetchone()
-
-        if row:
-            negative_count, status = row
-            new_count = negative_count + 1
-
-            cursor.execute("""
-                UPDATE flagged_queries
-                SET negative_count = ?
-                WHERE query_hash = ?
-            """, (new_count, query_hash))
-
-            conn.commit()
-            conn.close()
-
-            if new_count >= threshold and status == 'pending':
-                return f"Query has {new_count} negative feedbacks"
-            return None
-        else:
-            # First negative - insert but don't flag yet
-            cursor.execute("""
-                INSERT INTO flagged_queries
-                (query, query_hash, negative_count, flag_reason, status, created_at)
-                VALUES (?, ?, 1, NULL, 'monitoring', ?)
-            """, (query, query_hash, datetime.now(timezone.utc).isoformat()))
+        with self._lock, self._conn:
+            return self._flag_query(self._conn.cursor(), query, threshold)
 
-            conn.commit()
-            conn.close()
-            return None
+    def _flag_query(
+        self,
+        cursor: sqlite3.Cursor,
+        query: str,
+        threshold: int = 2,
+        now: Optional[str] = None
+    ) -> Optional[str]:
+        """Record a negative feedback for a query on the given cursor."""
+        query_hash = self._hash_query(query)
+        now = now or datetime.now(timezone.utc).isoformat()
+        flag_reason = f"Received {threshold} negative feedbacks"
+
+        # First negative inserts a 'monitoring' row; repeats increment the count
+        # and promote the row to 'pending' once the threshold is reached.
+        cursor.execute(_SQL_FLAG_QUERY, (
+            query,
+            query_hash,
+            now,
+            threshold,
+            flag_reason,
+            threshold
+        ))
+        new_count, status = cursor.fetchone()
+
+        if new_count >= threshold and status == 'pending':
+            return f"Query has {new_count} negative feedbacks"
+        return None
 
     def update_flag_status(
         self,
@@ -299,34 +528,30 @@ class FeedbackLearner:
         """Update flag status based on negative count."""
         query_hash = self._hash_query(query)
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._lock, self._conn:
+            cursor = self._conn.cursor()
 
-        if negative_count >= threshold:
-            cursor.execute("""
-                UPDATE flagged_queries
-                SET status = 'pending',
-                    flag_reason = ?
-                WHERE query_hash = ?
-            """, (f"Received {negative_count} negative feedbacks", query_hash))
-
-        conn.commit()
-        conn.close()
+            if negative_count >= threshold:
+                cursor.execute("""
+                    UPDATE flagged_queries
+                    SET status = 'pending',
+                        flag_reason = ?
+                    WHERE query_hash = ?
+                """, (f"Received {negative_count} negative feedbacks", query_hash))
 
     def get_flagged_queries(self, status: str = 'pending') -> List[Dict[str, Any]]:
         """Get all flagged queries with given status."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._lock:
+            cursor = self._conn.cursor()
 
-        cursor.execute("""
-            SELECT query, negative_count, flag_reason, created_at, status
-            FROM flagged_queries
-            WHERE status = ?
-            ORDER BY negative_count DESC
-        """, (status,))
+            cursor.execute("""
+                SELECT query, negative_count, flag_reason, created_at, status
+                FROM flagged_queries
+                WHERE status = ?
+                ORDER BY negative_count DESC
+            """, (status,))
 
-        rows = cursor.fetchall()
-        conn.close()
+            rows = cursor.fetchall()
 
         return [{
             "query": row[0],
@@ -339,18 +564,16 @@ class FeedbackLearner:
     def resolve_flag(self, query: str, resolution: str = 'resolved'):
         """Mark a flagged query as resolved."""
         query_hash = self._hash_query(query)
+        now = datetime.now(timezone.utc).isoformat()
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._lock, self._conn:
+            cursor = self._conn.cursor()
 
-        cursor.execute("""
-            UPDATE flagged_queries
-            SET status = ?, resolved_at = ?
-            WHERE query_hash = ?
-        """, (resolution, datetime.now(timezone.utc).isoformat(), query_hash))
-
-        conn.commit()
-        conn.close()
+            cursor.execute("""
+                UPDATE flagged_queries
+                SET status = ?, resolved_at = ?
+                WHERE query_hash = ?
+            """, (resolution, now, query_hash))
 
     # =========================================================================
     # 4. QUERY MAPPING LEARNING
@@ -370,40 +593,34 @@ class FeedbackLearner:
             query: The original query
             successful_chunk_ids: IDs of chunks that led to good response
         """
+        with self._lock, self._conn:
+            self._learn_successful_query(self._conn.cursor(), query, successful_chunk_ids)
+
+    def _learn_successful_query(
+        self,
+        cursor: sqlite3.Cursor,
+        query: str,
+        successful_chunk_ids: List[str],
+        now: Optional[str] = None
+    ):
+        """Store a successful query-chunk mapping on the given cursor."""
         query_hash = self._hash_query(query)
+        chunks_json = _dump_chunk_ids(tuple(successful_chunk_ids))
+        now = now or datetime.now(timezone.utc).isoformat()
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor.execute(_SQL_UPSERT_MAPPING, (query, query_hash, chunks_json, now, now))
 
-        # Check if mapping exists
-        cursor.execute(
-            "SELECT id, positive_count FROM query_mappings WHERE query_hash = ?",
-            (query_hash,)
-        )
-        row = cursor.fetchone()
+    @staticmethod
+    def _match_words(query: str) -> List[str]:
+        """Distinct words of a query worth matching on (skips short words and stopwords)."""
+        words = dict.fromkeys(_WORD_RE.findall(query.lower()))
+        return [w for w in words if w not in _STOPWORDS]
 
-        chunks_json = json.dumps(successful_chunk_ids)
-        now = datetime.now(timezone.utc).isoformat()
-
-        if row:
-            # Update existing
-            cursor.execute("""
-                UPDATE query_mappings
-                SET positive_count = positive_count + 1,
-                    successful_chunks = ?,
-                    last_used = ?
-                WHERE query_hash = ?
-            """, (chunks_json, now, query_hash))
-        else:
-            # Insert new
-            cursor.execute("""
-                INSERT INTO query_mappings
-                (original_query, query_hash, successful_chunks, positive_count, created_at, last_used)
-                VALUES (?, ?, ?, 1, ?, ?)
-            """, (query, query_hash, chunks_json, now, now))
-
-        conn.commit()
-        conn.close()
+    @staticmethod
+    def _fts_match(words: List[str]) -> str:
+        """Build an FTS5 MATCH expression that ORs the quoted words."""
+        # Quote each term so punctuation can't be parsed as FTS syntax
+        return " OR ".join('"' + w.replace('"', '""') + '"' for w in words)
 
     def get_similar_successful_queries(self, query: str) -> List[Dict[str, Any]]:
         """
@@ -411,42 +628,34 @@ class FeedbackLearner:
 
         This can be used to boost chunks that worked for similar queries.
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
         # For now, simple keyword matching
         # Could be enhanced with embedding similarity
-        words = query.lower().split()
-
-        results = []
-        for word in words:
-            if len(word) > 3:  # Skip short words
-                cursor.execute("""
+        words = self._match_words(query)
+        if not words:
+            return []
+
+        with self._lock:
+            if self._fts_available:
+                rows = self._conn.execute(
+                    _SQL_SIMILAR_QUERIES_FTS, (self._fts_match(words),)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(f"""
                     SELECT original_query, successful_chunks, positive_count
                     FROM query_mappings
-                    WHERE LOWER(original_query) LIKE ?
+                    WHERE {" OR ".join(["LOWER(original_query) LIKE ?"] * len(words))}
                     ORDER BY positive_count DESC
-                    LIMIT 5
-                """, (f"%{word}%",))
-
-                for row in cursor.fetchall():
-                    results.append({
-                        "query": row[0],
-                        "chunk_ids": json.loads(row[1]) if row[1] else [],
-                        "positive_count": row[2]
-                    })
-
-        conn.close()
-
-        # Deduplicate
-        seen = set()
-        unique_results = []
-        for r in results:
-            if r["query"] not in seen:
-                seen.add(r["query"])
-                unique_results.append(r)
-
-        return unique_results
+                    LIMIT 10
+                """, [f"%{w}%" for w in words]).fetchall()
+
+        return [
+            {
+                "query": row[0],
+                "chunk_ids": json.loads(row[1]) if row[1] else [],
+                "positive_count": row[2]
+            }
+            for row in rows
+        ]
 
     def get_learned_chunk_boosts(self, query: str) -> Dict[str, float]:
         """
@@ -454,18 +663,28 @@ class FeedbackLearner:
 
         Returns dict of chunk_id -> boost amount
         """
-        similar = self.get_similar_successful_queries(query)
+        if not self._fts_available:
+            similar = self.get_similar_successful_queries(query)
 
-        boosts = {}
-        for item in similar:
-            boost_amount = 0.05 * item["positive_count"]  # More positives = more boost
-            for chunk_id in item["chunk_ids"]:
-                if chunk_id in boosts:
+            boosts = defaultdict(float)
+            for item in similar:
+                boost_amount = 0.05 * item["positive_count"]  # More positives = more boost
+                for chunk_id in item["chunk_ids"]:
                     boosts[chunk_id] += boost_amount
-                else:
-                    boosts[chunk_id] = boost_amount
 
-        return boosts
+            return dict(boosts)
+
+        words = self._match_words(query)
+        if not words:
+            return {}
+
+        # Same top-10 similar queries, aggregated in SQL via json_each
+        with self._lock:
+            rows = self._conn.execute(
+                _SQL_LEARNED_BOOSTS_FTS, (self._fts_match(words),)
+            ).fetchall()
+
+        return dict(rows)
 
     # =========================================================================
     # COMBINED FEEDBACK PROCESSING
@@ -490,6 +709,7 @@ class FeedbackLearner:
         Returns:
             Dict with actions taken
         """
+        chunk_ids = tuple(chunk_ids)
         actions = {
             "cache_invalidated": False,
             "chunks_adjusted": [],
@@ -498,35 +718,114 @@ class FeedbackLearner:
             "query_learned": False
         }
 
+        # Cache lives in a separate database, so invalidate it up front
+        if not is_positive and cache:
+            actions["cache_invalidated"] = self.invalidate_cache_for_query(query, cache)
+
+        # All learning writes for one feedback event share a single transaction
+        # and a single timestamp
+        now = datetime.now(timezone.utc).isoformat()
+        with self._write_txn() as cursor:
+            cursor.execute("BEGIN IMMEDIATE")
+            self._apply_feedback(cursor, query, is_positive, chunk_ids, now, actions)
+
+        return actions
+
+    def _apply_feedback(
+        self,
+        cursor: sqlite3.Cursor,
+        query: str,
+        is_positive: bool,
+        chunk_ids: Tuple[str, ...],
+        now: str,
+        actions: Dict[str, Any]
+    ):
+        """Apply the learning writes for one feedback event on the given cursor."""
+        if chunk_ids:
+            # Boost (positive) or penalize (negative) the chunks that were used
+            self._adjust_chunk_scores(cursor, chunk_ids, is_positive, now)
+            actions["chunks_adjusted"].extend(chunk_ids)
+
         if is_positive:
-            # Positive feedback actions
-            # 1. Boost the chunks that were used
-            for chunk_id in chunk_ids:
-                self.adjust_chunk_score(chunk_id, is_positive=True)
-                actions["chunks_adjusted"].append(chunk_id)
-
-            # 2. Learn the successful query-chunk mapping
-            self.learn_successful_query(query, chunk_ids)
+            if not chunk_ids:
+                # Nothing was retrieved (or the answer came from cache): nothing to learn
+                return
+            # Learn the successful query-chunk mapping
+            self._learn_successful_query(cursor, query, chunk_ids, now=now)
             actions["query_learned"] = True
-
         else:
-            # Negative feedback actions
-            # 1. Invalidate cache
-            if cache:
-                actions["cache_invalidated"] = self.invalidate_cache_for_query(query, cache)
-
-            # 2. Penalize the chunks that were used
-            for chunk_id in chunk_ids:
-                self.adjust_chunk_score(chunk_id, is_positive=False)
-                actions["chunks_adjusted"].append(chunk_id)
-
-            # 3. Check if query should be flagged
-            flag_reason = self.flag_query_if_needed(query)
+            # Check if query should be flagged
+            flag_reason = self._flag_query(cursor, query, now=now)
             if flag_reason:
                 actions["query_flagged"] = True
                 actions["flag_reason"] = flag_reason
 
-        return actions
+    def process_feedback_async(
+        self,
+        query: str,
+        is_positive: bool,
+        chunk_ids: List[str],
+        cache=None
+    ):
+        """
+        Queue feedback for a background writer and return immediately.
+
+        Events are applied in batches, one transaction per batch. Use
+        process_feedback() when the caller needs the actions taken.
+
+        Args:
+            query: The user query
+            is_positive: True for positive feedback
+            chunk_ids: IDs of chunks used in the response
+            cache: ResponseCache instance (optional)
+        """
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._drain_writes, name="FeedbackLearnerWriter", daemon=True
+                )
+                self._writer.start()
+
+        self._write_q.put((query, is_positive, tuple(chunk_ids), cache))
+
+    def flush(self):
+        """Block until all queued feedback has been written."""
+        if self._writer is not None:
+            self._write_q.join()
+
+    def _drain_writes(self, max_batch: int = 64):
+        """Writer thread: apply queued feedback in batches."""
+        while True:
+            batch = [self._write_q.get()]
+            while len(batch) < max_batch:
+                try:
+                    batch.append(self._write_q.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._flush_batch(batch)
+            except Exception as e:
+                print(f"[FeedbackLearner] Failed to write {len(batch)} queued feedback events: {e}")
+            finally:
+                for _ in batch:
+                    self._write_q.task_done()
+
+    def _flush_batch(self, batch: List[Tuple[str, bool, Tuple[str, ...], Any]]):
+        """Apply a batch of queued feedback events in one transaction."""
+        # Cache lives in a separate database, so invalidate it up front
+        for query, is_positive, _, cache in batch:
+            if not is_positive and cache:
+                self.invalidate_cache_for_query(query, cache)
+
+        now = datetime.now(timezone.utc).isoformat()
+        with self._write_txn() as cursor:
+            cursor.execute("BEGIN IMMEDIATE")
+            for query, is_positive, chunk_ids, _ in batch:
+                actions = {"chunks_adjusted": []}
+                self._apply_feedback(cursor, query, is_positive, chunk_ids, now, actions)
+                if actions.get("flag_reason"):
+                    print(f"[FeedbackLearner] Query flagged: {actions['flag_reason']}")
 
     # =========================================================================
     # STATISTICS
@@ -534,30 +833,13 @@ class FeedbackLearner:
 
     def get_stats(self) -> Dict[str, Any]:
         """Get learning statistics."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        # Chunk adjustments
-        cursor.execute("""
-            SELECT
-                COUNT(*) as total_chunks,
-                SUM(CASE WHEN score_adjustment > 0 THEN 1 ELSE 0 END) as boosted_chunks,
-                SUM(CASE WHEN score_adjustment < 0 THEN 1 ELSE 0 END) as penalized_chunks
-            FROM chunk_adjustments
-        """)
-        chunk_stats = cursor.fetchone()
-
-        # Flagged queries
-        cursor.execute("""
-            SELECT status, COUNT(*) FROM flagged_queries GROUP BY status
-        """)
-        flag_stats = {row[0]: row[1] for row in cursor.fetchall()}
+        # One statement, one snapshot: each table is scanned once in a derived table
+        with self._lock:
+            row = self._conn.execute(_SQL_STATS).fetchone()
 
-        # Query mappings
-        cursor.execute("SELECT COUNT(*), SUM(positive_count) FROM query_mappings")
-        mapping_stats = cursor.fetchone()
-
-        conn.close()
+        chunk_stats = row[0:3]
+        flag_stats = json.loads(row[3]) if row[3] else {}
+        mapping_stats = row[4:6]
 
         return {
             "chunks": {
@@ -571,3 +853,25 @@ class FeedbackLearner:
                 "total_positive_signals": mapping_stats[1] or 0
             }
         }
+
+
+@lru_cache(maxsize=None)
+def _shared_learner(db_path: str) -> FeedbackLearner:
+    return FeedbackLearner(db_path=db_path)
+
+
+def get_feedback_learner(db_path: str = None) -> FeedbackLearner:
+    """
+    Get the shared FeedbackLearner for a database.
+
+    The learner that records feedback and the one that ranks results must be
+    the same instance, or rankings keep serving stale cached adjustments.
+
+    Args:
+        db_path: Path to SQLite database (defaults to data/feedback_learning.db)
+
+    Returns:
+        Shared FeedbackLearner instance
+    """
+    path = Path(db_path) if db_path else config.data_dir / "feedback_learning.db"
+    return _shared_learner(str(path.resolve()))
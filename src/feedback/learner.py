@@ -3,13 +3,57 @@ Feedback-based learning and improvement system.
 
 This module analyzes user feedback to improve the chatbot over time.
 """
+import re
+import sqlite3
+import time
+from functools import wraps
 from typing import List, Dict, Any, Optional
 from collections import Counter
 from datetime import datetime, timedelta
-from .models import Feedback, FeedbackType, FeedbackStats, QueryPattern
+from .models import FeedbackType, FeedbackStats, QueryPattern
 from .store import FeedbackStore
 
 
+# Words too common in questions to say anything about what went wrong
+STOP = frozenset({
+    "what", "when", "where", "which", "this", "that", "with", "from", "your", "about",
+})
+_TOKEN_RE = re.compile(r"\w{4,}")
+
+# Columns needed to report knowledge gaps (a superset of what pattern mining reads)
+_GAP_FIELDS = ("query", "comment", "created_at")
+
+
+def _ttl_cached(seconds: float = 60):
+    """
+    Memoize a read-only method per instance for `seconds`.
+
+    Entries are also keyed on the store's write generation, so any add()
+    through the store invalidates them. Calls with unhashable arguments
+    (e.g. pre-fetched feedback lists) bypass the cache.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            key = (method.__name__, args, tuple(sorted(kwargs.items())))
+            try:
+                hash(key)
+            except TypeError:
+                return method(self, *args, **kwargs)
+
+            now = time.monotonic()
+            generation = self.store.generation
+            hit = self._memo.get(key)
+            if hit and hit[0] == generation and now - hit[1] < seconds:
+                return hit[2]
+
+            value = method(self, *args, **kwargs)
+            self._memo[key] = (generation, now, value)
+            return value
+        return wrapper
+    return decorator
+
+
 class FeedbackLearner:
     """
     Analyzes feedback to identify patterns and suggest improvements.
@@ -23,7 +67,9 @@ class FeedbackLearner:
             store: FeedbackStore instance
         """
         self.store = store or FeedbackStore()
+        self._memo: Dict[tuple, tuple] = {}
 
+    @_ttl_cached()
     def get_performance_summary(self) -> Dict[str, Any]:
         """
         Get overall performance summary.
@@ -42,19 +88,44 @@ class FeedbackLearner:
             "knowledge_gaps_reported": stats.missing_info
         }
 
-    def identify_problem_patterns(self, min_count: int = 2) -> List[QueryPattern]:
+    @_ttl_cached()
+    def identify_problem_patterns(
+        self,
+        min_count: int = 2,
+        negative: Optional[List[sqlite3.Row]] = None
+    ) -> List[QueryPattern]:
         """
         Identify query patterns that lead to negative feedback.
 
         Args:
             min_count: Minimum occurrences to be considered a pattern
+            negative: Pre-fetched thumbs-down and correction rows with a
+                "query" field (fetched if None)
 
         Returns:
             List of problematic patterns
         """
+        if negative is None and self.store.fts_available:
+            # Let SQLite tokenize and count the negative queries
+            return [
+                QueryPattern(
+                    pattern=word,
+                    feedback_type=FeedbackType.THUMBS_DOWN,
+                    count=count,
+                    example_queries=examples,
+                    suggested_action=f"Review content related to '{word}' - users report issues"
+                )
+                for word, count, examples in self.store.get_negative_query_terms(
+                    min_count=min_count, exclude=STOP
+                )
+            ]
+
         # Get negative feedback
-        negative = self.store.get_by_type(FeedbackType.THUMBS_DOWN, limit=500)
-        negative.extend(self.store.get_by_type(FeedbackType.CORRECTION, limit=500))
+        if negative is None:
+            by_type = self.store.get_fields_by_types(
+                [FeedbackType.THUMBS_DOWN, FeedbackType.CORRECTION], ("query",), limit_per_type=500
+            )
+            negative = by_type[FeedbackType.THUMBS_DOWN] + by_type[FeedbackType.CORRECTION]
 
         if not negative:
             return []
@@ -63,16 +134,15 @@ class FeedbackLearner:
         word_counts = Counter()
         query_examples = {}
 
-        for fb in negative:
+        for row in negative:
             # Simple word extraction (could be improved with NLP)
-            words = fb.query.lower().split()
-            for word in words:
-                if len(word) > 3:  # Skip short words
-                    word_counts[word] += 1
-                    if word not in query_examples:
-                        query_examples[word] = []
-                    if len(query_examples[word]) < 3:
-                        query_examples[word].append(fb.query)
+            query = row["query"]
+            toks = [t for t in _TOKEN_RE.findall(query.lower()) if t not in STOP]
+            word_counts.update(toks)
+            for t in set(toks):
+                ex = query_examples.setdefault(t, [])
+                if len(ex) < 3:
+                    ex.append(query)
 
         # Create patterns from common words
         patterns = []
@@ -88,21 +158,32 @@ class FeedbackLearner:
 
         return patterns
 
-    def get_knowledge_gaps(self) -> List[Dict[str, Any]]:
+    @_ttl_cached()
+    def get_knowledge_gaps(
+        self,
+        missing_info: Optional[List[sqlite3.Row]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Identify topics where the chatbot lacks information.
 
+        Args:
+            missing_info: Pre-fetched missing-info rows with "query", "comment"
+                and "created_at" fields (fetched if None)
+
         Returns:
             List of knowledge gap reports
         """
-        missing_info = self.store.get_by_type(FeedbackType.MISSING_INFO, limit=100)
+        if missing_info is None:
+            missing_info = self.store.get_fields_by_type(
+                FeedbackType.MISSING_INFO, _GAP_FIELDS, limit=100
+            )
 
         gaps = []
-        for fb in missing_info:
+        for row in missing_info:
             gaps.append({
-                "query": fb.query,
-                "comment": fb.comment,
-                "date": fb.created_at.isoformat() if fb.created_at else None
+                "query": row["query"],
+                "comment": row["comment"],
+                "date": row["created_at"]  # stored as ISO text
             })
 
         return gaps
@@ -114,16 +195,18 @@ class FeedbackLearner:
         Returns:
             List of correction examples
         """
-        corrections = self.store.get_by_type(FeedbackType.CORRECTION, limit=limit)
+        corrections = self.store.get_fields_by_type(
+            FeedbackType.CORRECTION, ("query", "response", "correction", "comment"), limit=limit
+        )
 
         examples = []
-        for fb in corrections:
-            if fb.correction:
+        for row in corrections:
+            if row["correction"]:
                 examples.append({
-                    "query": fb.query,
-                    "original_response": fb.response,
-                    "user_correction": fb.correction,
-                    "comment": fb.comment
+                    "query": row["query"],
+                    "original_response": row["response"],
+                    "user_correction": row["correction"],
+                    "comment": row["comment"]
                 })
 
         return examples
@@ -136,17 +219,20 @@ class FeedbackLearner:
         Returns:
             List of good Q&A pairs
         """
-        positive = self.store.get_by_type(FeedbackType.THUMBS_UP, limit=limit)
+        positive = self.store.get_fields_by_type(
+            FeedbackType.THUMBS_UP, ("query", "response"), limit=limit
+        )
 
         pairs = []
-        for fb in positive:
+        for row in positive:
             pairs.append({
-                "question": fb.query,
-                "answer": fb.response
+                "question": row["query"],
+                "answer": row["response"]
             })
 
         return pairs
 
+    @_ttl_cached()
     def get_chunk_performance(self) -> Dict[str, Dict[str, int]]:
         """
         Analyze which chunks lead to positive vs negative feedback.
@@ -154,24 +240,7 @@ class FeedbackLearner:
         Returns:
             Dict mapping chunk_id to {positive: n, negative: n}
         """
-        positive = self.store.get_by_type(FeedbackType.THUMBS_UP, limit=1000)
-        negative = self.store.get_by_type(FeedbackType.THUMBS_DOWN, limit=1000)
-
-        performance = {}
-
-        for fb in positive:
-            for chunk_id in fb.chunk_ids:
-                if chunk_id not in performance:
-                    performance[chunk_id] = {"positive": 0, "negative": 0}
-                performance[chunk_id]["positive"] += 1
-
-        for fb in negative:
-            for chunk_id in fb.chunk_ids:
-                if chunk_id not in performance:
-                    performance[chunk_id] = {"positive": 0, "negative": 0}
-                performance[chunk_id]["negative"] += 1
-
-        return performance
+        return self.store.get_chunk_feedback_counts(limit_per_type=1000)
 
     def generate_improvement_report(self) -> str:
         """
@@ -183,6 +252,18 @@ class FeedbackLearner:
         report = ["# Chatbot Improvement Report"]
         report.append(f"\nGenerated: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n")
 
+        # Fetch all feedback the sections below need in a single query; negative
+        # feedback is only needed when the store can't mine patterns itself
+        negative_types = (
+            [] if self.store.fts_available
+            else [FeedbackType.THUMBS_DOWN, FeedbackType.CORRECTION]
+        )
+        by_type = self.store.get_fields_by_types(
+            negative_types + [FeedbackType.MISSING_INFO],
+            _GAP_FIELDS,
+            limit_per_type=500
+        )
+
         # Performance summary
         summary = self.get_performance_summary()
         report.append("## Performance Summary")
@@ -195,7 +276,9 @@ class FeedbackLearner:
         report.append("")
 
         # Problem patterns
-        patterns = self.identify_problem_patterns()
+        patterns = self.identify_problem_patterns(
+            negative=sum((by_type[t] for t in negative_types), []) if negative_types else None
+        )
         if patterns:
             report.append("## Problem Patterns")
             for p in patterns[:5]:
@@ -207,7 +290,7 @@ class FeedbackLearner:
             report.append("")
 
         # Knowledge gaps
-        gaps = self.get_knowledge_gaps()
+        gaps = self.get_knowledge_gaps(missing_info=by_type[FeedbackType.MISSING_INFO][:100])
         if gaps:
             report.append("## Knowledge Gaps")
             for g in gaps[:10]:
@@ -2,13 +2,43 @@
 SQLite storage for user feedback.
 """
 import sqlite3
-from typing import List, Optional
+import threading
+from dataclasses import replace
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
 import uuid
 from pathlib import Path
 from .models import Feedback, FeedbackType, FeedbackStats
 from ..config import config
 
+# Bump when _migrate() gains new DDL; databases at this version skip it on startup
+_SCHEMA_VERSION = 1
+
+# Columns that may be requested from get_fields_by_type(s)
+_FEEDBACK_COLUMNS = frozenset({
+    "id", "query", "response", "feedback_type", "correction", "comment", "chunk_ids", "created_at"
+})
+
+# Feedback types mined for problem patterns, as an SQL literal list
+_NEGATIVE_TYPES_SQL = f"('{FeedbackType.THUMBS_DOWN.value}', '{FeedbackType.CORRECTION.value}')"
+
+
+def _latest_per_type_sql(columns: str, n_types: int) -> str:
+    """
+    SQL for the newest rows of each of `n_types` feedback types.
+
+    Each type gets its own LIMITed branch, so every branch is a bounded range
+    scan of idx_feedback_type_date. Parameters are (type, limit) pairs.
+    """
+    branch = f"""
+        SELECT * FROM (
+            SELECT {columns} FROM feedback
+            WHERE feedback_type = ?
+            ORDER BY created_at DESC
+            LIMIT ?
+        )"""
+    return " UNION ALL ".join([branch] * n_types)
+
 
 class FeedbackStore:
     """
@@ -22,38 +52,167 @@ class FeedbackStore:
         Args:
             db_path: Path to SQLite database
         """
+        config.ensure_dirs()
         self.db_path = db_path or config.feedback_db_path
+        # One persistent connection shared across calls; the lock serializes
+        # access from FastAPI/Streamlit worker threads and guards the caches.
+        self._lock = threading.RLock()
+        self._conn = self._connect()
+        # Aggregates memoized until the next write through this store; the
+        # generation counter lets callers key their own caches on it
+        self.generation = 0
+        self._stats_cache: Optional[FeedbackStats] = None
+        self._count_cache: Optional[int] = None
         self._init_db()
 
+    def _connect(self) -> sqlite3.Connection:
+        """Open the persistent database connection."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache
+        conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+        return conn
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _invalidate_caches(self):
+        """Drop memoized aggregates after a write."""
+        with self._lock:
+            self._stats_cache = None
+            self._count_cache = None
+            self.generation += 1
+
     def _init_db(self):
-        """Initialize the database schema."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS feedback (
-                    id TEXT PRIMARY KEY,
-                    query TEXT NOT NULL,
-                    response TEXT NOT NULL,
-                    feedback_type TEXT NOT NULL,
-                    correction TEXT,
-                    comment TEXT,
-                    chunk_ids TEXT,
-                    created_at TEXT NOT NULL
-                )
+        """Initialize the database schema, running the DDL only when it is outdated."""
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= _SCHEMA_VERSION:
+                self.fts_available = self._table_exists("feedback_fts")
+            else:
+                self._migrate()
+                self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+        # Refresh planner statistics so the composite index gets picked
+        self._conn.execute("PRAGMA optimize")
+
+    def _table_exists(self, name: str) -> bool:
+        """Whether a table (or virtual table) with this name exists."""
+        return self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)
+        ).fetchone() is not None
+
+    def _migrate(self):
+        """Create or upgrade every table, index and trigger. All statements are idempotent."""
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS feedback (
+                id TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                response TEXT NOT NULL,
+                feedback_type TEXT NOT NULL,
+                correction TEXT,
+                comment TEXT,
+                chunk_ids TEXT,
+                created_at TEXT NOT NULL
+            )
+        """)
+
+        # Index for querying by type, newest first; serves both the filter and
+        # the ORDER BY, and makes the old type-only index redundant
+        self._conn.execute("DROP INDEX IF EXISTS idx_feedback_type")
+        self._conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_feedback_type_date
+            ON feedback(feedback_type, created_at DESC)
+        """)
+
+        # Index for date range queries
+        self._conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_feedback_date
+            ON feedback(created_at)
+        """)
+
+        # One row per (feedback, chunk) so chunk aggregates are plain SQL;
+        # feedback.chunk_ids is kept so Feedback objects round-trip unchanged
+        self._init_chunk_table()
+
+        # Full-text index over negative feedback queries, for pattern mining
+        self.fts_available = self._init_fts()
+
+    def _init_chunk_table(self):
+        """Create the normalized feedback -> chunk table, backfilling it on first run."""
+        exists = self._table_exists("feedback_chunks")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS feedback_chunks (
+                feedback_id TEXT NOT NULL,
+                chunk_id TEXT NOT NULL,
+                PRIMARY KEY (feedback_id, chunk_id)
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_fc_chunk
+            ON feedback_chunks(chunk_id)
+        """)
+        self._conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS feedback_chunks_ad AFTER DELETE ON feedback BEGIN
+                DELETE FROM feedback_chunks WHERE feedback_id = old.id;
+            END
+        """)
+
+        if not exists:
+            self._conn.execute("""
+                INSERT OR IGNORE INTO feedback_chunks (feedback_id, chunk_id)
+                SELECT f.id, je.value
+                FROM feedback f, json_each(f.chunk_ids) je
+                WHERE json_valid(f.chunk_ids)
             """)
 
-            # Index for querying by type
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_feedback_type
-                ON feedback(feedback_type)
+    def _init_fts(self) -> bool:
+        """Create the FTS5 index of negative queries. Returns False if FTS5 is unavailable."""
+        exists = self._table_exists("feedback_fts")
+        try:
+            self._conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS feedback_fts USING fts5(
+                    query,
+                    content='feedback',
+                    content_rowid='rowid',
+                    tokenize='unicode61'
+                )
             """)
-
-            # Index for date range queries
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_feedback_date
-                ON feedback(created_at)
+            self._conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS feedback_fts_vocab
+                USING fts5vocab(feedback_fts, 'row')
             """)
-
-            conn.commit()
+        except sqlite3.OperationalError:
+            print("[FeedbackStore] FTS5 not available, pattern mining will run in Python")
+            return False
+
+        # Only thumbs-down and correction rows are indexed
+        self._conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS feedback_fts_ai AFTER INSERT ON feedback
+            WHEN new.feedback_type IN {_NEGATIVE_TYPES_SQL} BEGIN
+                INSERT INTO feedback_fts(rowid, query) VALUES (new.rowid, new.query);
+            END
+        """)
+        self._conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS feedback_fts_ad AFTER DELETE ON feedback
+            WHEN old.feedback_type IN {_NEGATIVE_TYPES_SQL} BEGIN
+                INSERT INTO feedback_fts(feedback_fts, rowid, query) VALUES ('delete', old.rowid, old.query);
+            END
+        """)
+
+        if not exists:
+            # Index negative feedback stored before the FTS table existed
+            self._conn.execute(f"""
+                INSERT INTO feedback_fts(rowid, query)
+                SELECT rowid, query FROM feedback WHERE feedback_type IN {_NEGATIVE_TYPES_SQL}
+            """)
+        return True
 
     def add(self, feedback: Feedback) -> str:
         """
@@ -65,15 +224,27 @@ class FeedbackStore:
         Returns:
             Feedback ID
         """
-        if not feedback.id:
-            feedback.id = f"fb_{uuid.uuid4().hex[:12]}"
+        return self.add_many([feedback])[0]
 
-        with sqlite3.connect(self.db_path) as conn:
-            data = feedback.to_dict()
-            conn.execute("""
-                INSERT INTO feedback (id, query, response, feedback_type, correction, comment, chunk_ids, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+    def add_many(self, feedbacks: List[Feedback]) -> List[str]:
+        """
+        Add several feedback entries in a single transaction.
+
+        Use this for bulk loads (log replay, migrations, seeding) so the
+        whole batch costs one commit instead of one per row.
+
+        Args:
+            feedbacks: Feedback objects; missing ids are generated
+
+        Returns:
+            Feedback IDs, in input order
+        """
+        for feedback in feedbacks:
+            if not feedback.id:
+                feedback.id = f"fb_{uuid.uuid4().hex[:12]}"
+
+        rows = [
+            (
                 data["id"],
                 data["query"],
                 data["response"],
@@ -82,10 +253,28 @@ class FeedbackStore:
                 data["comment"],
                 data["chunk_ids"],
                 data["created_at"]
-            ))
-            conn.commit()
+            )
+            for data in (feedback.to_dict() for feedback in feedbacks)
+        ]
+        chunk_rows = [
+            (feedback.id, chunk_id)
+            for feedback in feedbacks
+            for chunk_id in feedback.chunk_ids or []
+        ]
+
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany("""
+                INSERT INTO feedback (id, query, response, feedback_type, correction, comment, chunk_ids, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO feedback_chunks (feedback_id, chunk_id) VALUES (?, ?)",
+                chunk_rows
+            )
 
-        return feedback.id
+        self._invalidate_caches()
+        return [feedback.id for feedback in feedbacks]
 
     def get(self, feedback_id: str) -> Optional[Feedback]:
         """
@@ -97,9 +286,8 @@ class FeedbackStore:
         Returns:
             Feedback object or None
         """
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
                 "SELECT * FROM feedback WHERE id = ?",
                 (feedback_id,)
             )
@@ -124,16 +312,121 @@ class FeedbackStore:
         Returns:
             List of Feedback objects
         """
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute("""
-                SELECT * FROM feedback
-                WHERE feedback_type = ?
-                ORDER BY created_at DESC
-                LIMIT ?
-            """, (feedback_type.value, limit))
+        return list(self.iter_by_type(feedback_type, limit))
+
+    def iter_by_type(
+        self,
+        feedback_type: FeedbackType,
+        limit: int = 100
+    ) -> Iterator[Feedback]:
+        """
+        Stream feedback by type, newest first, without materializing all rows.
+
+        Args:
+            feedback_type: Type of feedback
+            limit: Maximum number of results
+
+        Yields:
+            Feedback objects
+        """
+        return self._iter_feedback("""
+            SELECT * FROM feedback
+            WHERE feedback_type = ?
+            ORDER BY created_at DESC
+            LIMIT ?
+        """, (feedback_type.value, limit))
+
+    def get_by_types(
+        self,
+        feedback_types: List[FeedbackType],
+        limit_per_type: int = 100
+    ) -> Dict[FeedbackType, List[Feedback]]:
+        """
+        Get feedback for several types in one query.
+
+        Args:
+            feedback_types: Types of feedback to fetch
+            limit_per_type: Maximum number of results per type
+
+        Returns:
+            Dict mapping each type to its most recent Feedback objects
+        """
+        results = {feedback_type: [] for feedback_type in feedback_types}
+        if not feedback_types:
+            return results
+
+        columns = "id, query, response, feedback_type, correction, comment, chunk_ids, created_at"
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                _latest_per_type_sql(columns, len(feedback_types)),
+                [arg for t in feedback_types for arg in (t.value, limit_per_type)]
+            )
+
+            for row in cursor.fetchall():
+                feedback = Feedback.from_dict(dict(row))
+                results[feedback.feedback_type].append(feedback)
+
+        return results
+
+    def get_fields_by_type(
+        self,
+        feedback_type: FeedbackType,
+        fields: Tuple[str, ...],
+        limit: int = 100
+    ) -> List[sqlite3.Row]:
+        """
+        Get selected columns of feedback by type, without building Feedback objects.
+
+        Values are returned as stored: chunk_ids is a JSON string and
+        created_at an ISO timestamp.
+
+        Args:
+            feedback_type: Type of feedback
+            fields: Column names to select
+            limit: Maximum number of results
 
-            return [Feedback.from_dict(dict(row)) for row in cursor.fetchall()]
+        Returns:
+            List of rows (indexable by column name), most recent first
+        """
+        return self.get_fields_by_types([feedback_type], fields, limit)[feedback_type]
+
+    def get_fields_by_types(
+        self,
+        feedback_types: List[FeedbackType],
+        fields: Tuple[str, ...],
+        limit_per_type: int = 100
+    ) -> Dict[FeedbackType, List[sqlite3.Row]]:
+        """
+        Get selected columns of feedback for several types in one query.
+
+        Args:
+            feedback_types: Types of feedback to fetch
+            fields: Column names to select
+            limit_per_type: Maximum number of results per type
+
+        Returns:
+            Dict mapping each type to its most recent rows
+        """
+        unknown = set(fields) - _FEEDBACK_COLUMNS
+        if unknown or not fields:
+            raise ValueError(f"Unknown feedback fields: {sorted(unknown) or fields}")
+
+        results = {feedback_type: [] for feedback_type in feedback_types}
+        if not feedback_types:
+            return results
+
+        by_value = {t.value: t for t in feedback_types}
+        columns = "feedback_type AS _type, " + ", ".join(fields)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                _latest_per_type_sql(columns, len(by_value)),
+                [arg for value in by_value for arg in (value, limit_per_type)]
+            )
+
+            for row in cursor.fetchall():
+                results[by_value[row["_type"]]].append(row)
+
+        return results
 
     def get_recent(self, limit: int = 100) -> List[Feedback]:
         """
@@ -145,15 +438,48 @@ class FeedbackStore:
         Returns:
             List of Feedback objects
         """
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute("""
-                SELECT * FROM feedback
-                ORDER BY created_at DESC
-                LIMIT ?
-            """, (limit,))
+        return list(self.iter_recent(limit))
+
+    def iter_recent(self, limit: int = 100) -> Iterator[Feedback]:
+        """
+        Stream recent feedback, newest first, without materializing all rows.
+
+        Args:
+            limit: Maximum number of results
+
+        Yields:
+            Feedback objects
+        """
+        return self._iter_feedback("""
+            SELECT * FROM feedback
+            ORDER BY created_at DESC
+            LIMIT ?
+        """, (limit,))
+
+    def _iter_feedback(
+        self,
+        sql: str,
+        params: tuple,
+        batch_size: int = 256
+    ) -> Iterator[Feedback]:
+        """
+        Run a SELECT * over feedback and yield Feedback objects in fetchmany batches.
 
-            return [Feedback.from_dict(dict(row)) for row in cursor.fetchall()]
+        The lock is held per batch, not across yields, so a slow consumer
+        doesn't block writers.
+        """
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+        try:
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield Feedback.from_dict(dict(row))
+        finally:
+            cursor.close()
 
     def get_stats(self) -> FeedbackStats:
         """
@@ -162,8 +488,13 @@ class FeedbackStore:
         Returns:
             FeedbackStats object
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
+        with self._lock:
+            if self._stats_cache is not None:
+                # Hand out a copy so callers can't mutate the cached value
+                return replace(self._stats_cache)
+
+        with self._lock, self._conn:
+            cursor = self._conn.execute("""
                 SELECT feedback_type, COUNT(*) as count
                 FROM feedback
                 GROUP BY feedback_type
@@ -183,7 +514,9 @@ class FeedbackStore:
                 elif feedback_type == FeedbackType.MISSING_INFO.value:
                     stats.missing_info = count
 
-            return stats
+        with self._lock:
+            self._stats_cache = stats
+        return replace(stats)
 
     def get_negative_feedback_chunks(self) -> List[str]:
         """
@@ -192,20 +525,95 @@ class FeedbackStore:
         Returns:
             List of chunk IDs
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT chunk_ids FROM feedback
-                WHERE feedback_type = ?
+        with self._lock, self._conn:
+            cursor = self._conn.execute("""
+                SELECT fc.chunk_id
+                FROM feedback_chunks fc
+                JOIN feedback f ON f.id = fc.feedback_id
+                WHERE f.feedback_type = ?
             """, (FeedbackType.THUMBS_DOWN.value,))
 
-            chunk_ids = []
-            import json
-            for row in cursor.fetchall():
-                if row[0]:
-                    ids = json.loads(row[0])
-                    chunk_ids.extend(ids)
+            return [row[0] for row in cursor.fetchall()]
+
+    def get_chunk_feedback_counts(self, limit_per_type: int = 1000) -> Dict[str, Dict[str, int]]:
+        """
+        Count thumbs-up/down feedback per chunk, aggregated in SQLite.
 
-            return chunk_ids
+        Args:
+            limit_per_type: Only consider this many recent rows of each type
+
+        Returns:
+            Dict mapping chunk_id to {positive: n, negative: n}
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute("""
+                SELECT
+                    fc.chunk_id,
+                    SUM(CASE WHEN f.feedback_type = ? THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN f.feedback_type = ? THEN 1 ELSE 0 END)
+                FROM (
+                    SELECT id, feedback_type, ROW_NUMBER() OVER (
+                        PARTITION BY feedback_type ORDER BY created_at DESC
+                    ) AS rn
+                    FROM feedback
+                    WHERE feedback_type IN (?, ?)
+                ) f
+                JOIN feedback_chunks fc ON fc.feedback_id = f.id
+                WHERE f.rn <= ?
+                GROUP BY fc.chunk_id
+            """, (
+                FeedbackType.THUMBS_UP.value,
+                FeedbackType.THUMBS_DOWN.value,
+                FeedbackType.THUMBS_UP.value,
+                FeedbackType.THUMBS_DOWN.value,
+                limit_per_type
+            ))
+
+            return {
+                chunk_id: {"positive": positive, "negative": negative}
+                for chunk_id, positive, negative in cursor.fetchall()
+            }
+
+    def get_negative_query_terms(
+        self,
+        min_count: int = 2,
+        limit: int = 10,
+        examples_per_term: int = 3,
+        exclude: Iterable[str] = ()
+    ) -> List[Tuple[str, int, List[str]]]:
+        """
+        Most frequent words in thumbs-down and correction queries, counted by FTS5.
+
+        Args:
+            min_count: Minimum occurrences for a word to be returned
+            limit: Maximum number of words
+            examples_per_term: Example queries to return per word
+            exclude: Words to leave out (e.g. stopwords)
+
+        Returns:
+            List of (word, count, example queries), most frequent first
+        """
+        exclude = list(exclude)
+        placeholders = ", ".join("?" * len(exclude))
+        with self._lock, self._conn:
+            terms = self._conn.execute(f"""
+                SELECT term, cnt FROM feedback_fts_vocab
+                WHERE length(term) > 3 AND cnt >= ? AND term NOT IN ({placeholders})
+                ORDER BY cnt DESC
+                LIMIT ?
+            """, (min_count, *exclude, limit)).fetchall()
+
+            results = []
+            for term, count in terms:
+                examples = self._conn.execute("""
+                    SELECT query FROM feedback_fts
+                    WHERE feedback_fts MATCH ?
+                    ORDER BY rowid DESC
+                    LIMIT ?
+                """, ('"' + term.replace('"', '""') + '"', examples_per_term)).fetchall()
+                results.append((term, count, [row[0] for row in examples]))
+
+        return results
 
     def search_queries(self, search_term: str, limit: int = 50) -> List[Feedback]:
         """
@@ -218,19 +626,22 @@ class FeedbackStore:
         Returns:
             List of matching Feedback objects
         """
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute("""
-                SELECT * FROM feedback
-                WHERE query LIKE ?
-                ORDER BY created_at DESC
-                LIMIT ?
-            """, (f"%{search_term}%", limit))
-
-            return [Feedback.from_dict(dict(row)) for row in cursor.fetchall()]
+        return list(self._iter_feedback("""
+            SELECT * FROM feedback
+            WHERE query LIKE ?
+            ORDER BY created_at DESC
+            LIMIT ?
+        """, (f"%{search_term}%", limit)))
 
     def count(self) -> int:
         """Get total feedback count."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT COUNT(*) FROM feedback")
-            return cursor.fetchone()[0]
+        with self._lock:
+            if self._count_cache is not None:
+                return self._count_cache
+
+        with self._lock, self._conn:
+            count = self._conn.execute("SELECT COUNT(*) FROM feedback").fetchone()[0]
+
+        with self._lock:
+            self._count_cache = count
+        return count
@@ -1,5 +1,19 @@
-from .llm import OllamaLLM
-from .prompts import PromptTemplates
-from .rag_chain import RAGChain
+import importlib
+
+# Exports are resolved lazily: importing any generation submodule would
+# otherwise load ollama and ChromaDB through llm/rag_chain
+_LAZY = {
+    "OllamaLLM": ".llm",
+    "PromptTemplates": ".prompts",
+    "RAGChain": ".rag_chain",
+}
 
 __all__ = ["OllamaLLM", "PromptTemplates", "RAGChain"]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
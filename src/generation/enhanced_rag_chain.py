@@ -3,17 +3,21 @@ Enhanced RAG chain with query expansion, hybrid search, analytics, feedback lear
 conversation history (multi-turn), and auto-quality evaluation.
 """
 import time
-import ollama
-from typing import Dict, Any, List, Generator, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Any, List, Generator, Iterator, Optional, Tuple, Union
 from dataclasses import dataclass, field
-from .llm import OllamaLLM
-from .prompts import PromptTemplates, sanitize_user_input
-from ..retrieval.hybrid_retriever import HybridRetriever
-from ..retrieval.query_expansion import QueryExpander
-from ..analytics.query_logger import QueryLogger
-from ..feedback.feedback_learner import FeedbackLearner
+from functools import cached_property
+from .prompts import PromptTemplates, ConversationHistory, sanitize_user_input, split_confidence, EMPTY_METADATA
 from ..config import config
 
+if TYPE_CHECKING:
+    from .llm import OllamaLLM
+
+
+def _elapsed(start: float) -> float:
+    """Seconds since a time.perf_counter() start, at millisecond resolution."""
+    return round(time.perf_counter() - start, 3)
+
 
 @dataclass
 class EnhancedRAGResponse:
@@ -30,20 +34,34 @@ class EnhancedRAGResponse:
     low_confidence: bool = False  # True if system is not confident in answer
 
 
+@dataclass
+class _PreparedQuery:
+    """Retrieval results and prompt for one question, ready for generation."""
+    chunks: List[Dict[str, Any]]
+    chunk_ids: List[str]
+    prompt: str
+    retrieval_scores: List[float]
+    expanded_query: Optional[str] = None
+    question_embedding: Optional[List[float]] = None
+
+
 class EnhancedRAGChain:
     """
     Enhanced RAG pipeline with:
     - Query expansion (optional)
     - Hybrid search (semantic + BM25)
     - Query logging for analytics
+    - Semantic response cache for near-duplicate questions
     """
 
     def __init__(
         self,
-        llm: Optional[OllamaLLM] = None,
+        llm: Optional["OllamaLLM"] = None,
         use_query_expansion: bool = True,
         use_hybrid_search: bool = True,
-        use_logging: bool = True
+        use_logging: bool = True,
+        use_semantic_cache: bool = True,
+        semantic_cache_threshold: float = 0.95
     ):
         """
         Initialize the enhanced RAG chain.
@@ -53,34 +71,64 @@ class EnhancedRAGChain:
             use_query_expansion: Enable query expansion
             use_hybrid_search: Enable hybrid search (semantic + BM25)
             use_logging: Enable query logging
+            use_semantic_cache: Answer near-duplicate questions from the response cache
+            semantic_cache_threshold: Minimum cosine similarity for a semantic cache hit
         """
-        self.llm = llm or OllamaLLM()
+        # Components are imported here, and only when enabled, so importing
+        # this module doesn't load ollama or ChromaDB
+        if llm is None:
+            from .llm import OllamaLLM
+            llm = OllamaLLM()
+        self.llm = llm
         self.prompts = PromptTemplates()
 
         # Feature flags
         self.use_query_expansion = use_query_expansion
         self.use_hybrid_search = use_hybrid_search
         self.use_logging = use_logging
+        self.semantic_cache_threshold = semantic_cache_threshold
 
         # Initialize components
-        self.hybrid_retriever = HybridRetriever() if use_hybrid_search else None
-        self.query_expander = QueryExpander() if use_query_expansion else None
-        self.query_logger = QueryLogger() if use_logging else None
-        self.feedback_learner = FeedbackLearner()
+        self.hybrid_retriever = None
+        if use_hybrid_search:
+            from ..retrieval.hybrid_retriever import HybridRetriever
+            self.hybrid_retriever = HybridRetriever()
+        self.query_expander = None
+        if use_query_expansion:
+            from ..retrieval.query_expansion import QueryExpander
+            self.query_expander = QueryExpander()
+        self.query_logger = None
+        if use_logging:
+            from ..analytics.query_logger import QueryLogger
+            self.query_logger = QueryLogger()
+        self.response_cache = None
+        if use_semantic_cache:
+            from ..analytics.response_cache import get_response_cache
+            self.response_cache = get_response_cache()
+
+        # Runs query expansion while retrieval inputs are prepared
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="rag-prep")
 
         # Fallback to basic retriever if hybrid not used
         if not use_hybrid_search:
             from ..retrieval.retriever import Retriever
             self.basic_retriever = Retriever()
 
+    @cached_property
+    def feedback_learner(self):
+        """Feedback learner, opened on first use so building a chain does no database I/O."""
+        from ..feedback.feedback_learner import get_feedback_learner
+        return get_feedback_learner()
+
     def query(
         self,
         question: str,
         top_k: int = 5,
         temperature: float = 0.7,
         use_hyde: bool = False,
-        conversation_history: Optional[List[Dict]] = None,
-        evaluate_confidence: bool = False
+        conversation_history: Optional[Union[List[Dict], ConversationHistory]] = None,
+        evaluate_confidence: bool = False,
+        use_cache: bool = True
     ) -> EnhancedRAGResponse:
         """
         Process a question through the enhanced RAG pipeline.
@@ -92,166 +140,465 @@ class EnhancedRAGChain:
             use_hyde: Use Hypothetical Document Embedding
             conversation_history: Previous conversation messages for multi-turn context
             evaluate_confidence: Run auto-quality evaluation on the response
+            use_cache: Look up and store the answer in the semantic response cache
+                (skipped for follow-ups, whose answers depend on conversation_history)
 
         Returns:
             EnhancedRAGResponse with answer, sources, and metadata
         """
         timings = {}
-        total_start = time.time()
-        expanded_query = None
+        total_start = time.perf_counter()
 
         # Sanitize input
         question = sanitize_user_input(question)
 
-        # Step 1: Query Expansion (optional)
+        # Step 0: Semantic cache - skip the whole pipeline for near-duplicate questions
+        retrieval_future = self._prefetch_retrieval(question, top_k)
+        cache_settings = self._cache_settings(top_k, use_hyde)
+        use_cache = use_cache and not conversation_history
+        question_embedding, cached = self._lookup_cache(question, cache_settings, use_cache, timings)
+        if cached:
+            return self._cached_response(question, cached, timings, total_start)
+
+        # Steps 1-3: Expansion, retrieval, feedback adjustments, prompt
+        prepared = self._prepare(
+            question, top_k, use_hyde, conversation_history, question_embedding, timings,
+            evaluate_confidence, retrieval_future
+        )
+
+        # Step 4: Generate response with LLM
+        print(f"[EnhancedRAG] Starting LLM generation...")
+        t0 = time.perf_counter()
+        answer = self.llm.generate(
+            prompt=prepared.prompt,
+            system_prompt=self.prompts.system_prompt,
+            temperature=temperature
+        )
+        timings["llm_generation"] = _elapsed(t0)
+        print(f"[EnhancedRAG] LLM generation took {timings['llm_generation']}s")
+
+        # Step 4b: Confidence rating, emitted by the same generation
+        confidence_score = None
+        if evaluate_confidence:
+            answer, confidence_score = self.prompts.split_confidence(answer)
+
+        # Extract sources
+        sources = self._extract_sources(prepared.chunks)
+
+        return self._finish(
+            question, answer, sources, prepared, cache_settings,
+            timings, total_start, evaluate_confidence, confidence_score
+        )
+
+    def query_stream(
+        self,
+        question: str,
+        top_k: int = 5,
+        temperature: float = 0.7,
+        use_hyde: bool = False,
+        conversation_history: Optional[Union[List[Dict], ConversationHistory]] = None,
+        evaluate_confidence: bool = False,
+        use_cache: bool = True
+    ) -> Generator[str, None, EnhancedRAGResponse]:
+        """
+        Process a question through the enhanced RAG pipeline, streaming the answer.
+
+        Takes the same arguments as query(). Use `response = yield from
+        chain.query_stream(...)` or catch StopIteration to get the final response.
+
+        Yields:
+            Answer text chunks as the LLM produces them
+
+        Returns:
+            EnhancedRAGResponse with answer, sources, and metadata
+        """
+        timings = {}
+        total_start = time.perf_counter()
+
+        question = sanitize_user_input(question)
+
+        retrieval_future = self._prefetch_retrieval(question, top_k)
+        cache_settings = self._cache_settings(top_k, use_hyde)
+        use_cache = use_cache and not conversation_history
+        question_embedding, cached = self._lookup_cache(question, cache_settings, use_cache, timings)
+        if cached:
+            yield cached["answer"]
+            return self._cached_response(question, cached, timings, total_start)
+
+        prepared = self._prepare(
+            question, top_k, use_hyde, conversation_history, question_embedding, timings,
+            evaluate_confidence, retrieval_future
+        )
+
+        print("[EnhancedRAG] Starting LLM generation (streaming)...")
+        t0 = time.perf_counter()
+        parts = []
+        stream = self.llm.generate_stream(
+            prompt=prepared.prompt,
+            system_prompt=self.prompts.system_prompt,
+            temperature=temperature
+        )
+        if evaluate_confidence:
+            stream = self._hold_back_confidence(stream, parts)
+        for text_chunk in stream:
+            if "first_token" not in timings:
+                timings["first_token"] = _elapsed(t0)
+            if not evaluate_confidence:
+                parts.append(text_chunk)
+            yield text_chunk
+        timings["llm_generation"] = _elapsed(t0)
+        print(f"[EnhancedRAG] LLM generation took {timings['llm_generation']}s")
+
+        answer, confidence_score = "".join(parts), None
+        if evaluate_confidence:
+            answer, confidence_score = self.prompts.split_confidence(answer)
+
+        # Post-processing runs after the last token has been handed out
+        return self._finish(
+            question, answer, self._extract_sources(prepared.chunks), prepared, cache_settings,
+            timings, total_start, evaluate_confidence, confidence_score
+        )
+
+    def query_events(
+        self,
+        question: str,
+        **kwargs
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        query_stream() as the event dicts used by RAGChain.query_stream and /chat/stream.
+
+        Args:
+            question: User's question
+            **kwargs: Any other query_stream() argument
+
+        Yields:
+            {"type": "chunk", "data": text} per token, then {"type": "sources", ...}
+            and a final {"type": "done", "data": {...}} with the response fields
+        """
+        stream = self.query_stream(question, **kwargs)
+        while True:
+            try:
+                text_chunk = next(stream)
+            except StopIteration as stop:
+                response = stop.value
+                break
+            yield {"type": "chunk", "data": text_chunk}
+
+        yield {"type": "sources", "data": response.sources}
+        yield {
+            "type": "done",
+            "data": {
+                "answer": response.answer,
+                "sources": response.sources,
+                "query": response.query,
+                "chunk_ids": response.chunk_ids,
+                "log_id": response.log_id,
+                "confidence_score": response.confidence_score,
+                "timings": response.timings
+            }
+        }
+
+    @staticmethod
+    def _hold_back_confidence(
+        stream: Iterator[str],
+        parts: List[str]
+    ) -> Iterator[str]:
+        """
+        Pass tokens through, except a trailing CONFIDENCE=<score> line.
+
+        Raw tokens are appended to `parts` for split_confidence(). A line is
+        held back while it is, or could still become, the trailer.
+        """
+        pending, at_line_start = "", True
+        for text_chunk in stream:
+            parts.append(text_chunk)
+            pending += text_chunk
+            while pending:
+                if at_line_start:
+                    tail = pending.lstrip(" \t*")
+                    if tail.startswith("CONFIDENCE") or "CONFIDENCE".startswith(tail):
+                        break  # is, or may still become, the trailer
+                newline = pending.find("\n")
+                if newline == -1:
+                    yield pending
+                    pending, at_line_start = "", False
+                else:
+                    yield pending[:newline + 1]
+                    pending, at_line_start = pending[newline + 1:], True
+        if pending and split_confidence(pending)[1] is None:
+            yield pending
+
+    def _cache_settings(self, top_k: int, use_hyde: bool) -> Dict[str, Any]:
+        """Settings that distinguish cached answers."""
+        return {
+            "top_k": top_k,
+            "use_expansion": self.use_query_expansion,
+            "use_hybrid": self.use_hybrid_search,
+            "use_hyde": use_hyde
+        }
+
+    def _prefetch_retrieval(self, question: str, top_k: int) -> Optional[Future]:
+        """
+        Start basic retrieval while the response cache is checked.
+
+        Only when the search query is already known: hybrid search and
+        expanded queries are retrieved in _prepare().
+        """
+        if self.use_hybrid_search:
+            return None
+        if self.use_query_expansion and self.query_expander and self.query_expander.needs_expansion(question):
+            return None
+        return self.basic_retriever.retrieve_async(question, top_k=top_k, with_scores=True)
+
+    def _lookup_cache(
+        self,
+        question: str,
+        cache_settings: Dict[str, Any],
+        use_cache: bool,
+        timings: Dict[str, float]
+    ) -> Tuple[Optional[List[float]], Optional[Dict[str, Any]]]:
+        """
+        Look the question up in the semantic cache.
+
+        Returns:
+            (question embedding or None, cached entry or None)
+        """
+        if not (use_cache and self.response_cache):
+            return None, None
+
+        t0 = time.perf_counter()
+        question_embedding = self._get_embedder().embed_query(question)
+        cached = self.response_cache.get_similar(
+            question_embedding, cache_settings, threshold=self.semantic_cache_threshold
+        )
+        timings["cache"] = _elapsed(t0)
+
+        if cached:
+            print(f"[EnhancedRAG] Semantic cache hit (similarity {cached['similarity']:.3f})")
+        return question_embedding, cached
+
+    def _cached_response(
+        self,
+        question: str,
+        cached: Dict[str, Any],
+        timings: Dict[str, float],
+        total_start: float
+    ) -> EnhancedRAGResponse:
+        """Build a response from a semantic cache hit."""
+        timings["total"] = _elapsed(total_start)
+        return EnhancedRAGResponse(
+            answer=cached["answer"],
+            sources=cached["sources"],
+            retrieved_chunks=[],
+            chunk_ids=[],
+            query=question,
+            timings=timings
+        )
+
+    def _prepare(
+        self,
+        question: str,
+        top_k: int,
+        use_hyde: bool,
+        conversation_history: Optional[Union[List[Dict], ConversationHistory]],
+        question_embedding: Optional[List[float]],
+        timings: Dict[str, float],
+        with_confidence: bool = False,
+        retrieval_future: Optional[Future] = None
+    ) -> "_PreparedQuery":
+        """Run query expansion, retrieval and prompt building."""
+        expanded_query = None
+
+        # Step 1: Query Expansion (optional), started in the background
         search_query = question
-        if self.use_query_expansion and self.query_expander:
+        expansion_future = None
+        if self.use_query_expansion and self.query_expander and not self.query_expander.needs_expansion(question):
+            timings["query_expansion"] = 0.0
+            print("[EnhancedRAG] Skipping query expansion for a short query")
+        elif self.use_query_expansion and self.query_expander:
             print("[EnhancedRAG] Expanding query...")
-            t0 = time.time()
-
-            if use_hyde:
-                expanded_query = self.query_expander.generate_hyde(question)
-                search_query = expanded_query
-            else:
-                expanded_query = self.query_expander.expand_query(question)
-                search_query = expanded_query
+            expand = self.query_expander.generate_hyde if use_hyde else self.query_expander.expand_query
+            expansion_future = self._pool.submit(self._timed, expand, question)
 
-            timings["query_expansion"] = round(time.time() - t0, 2)
-            print(f"[EnhancedRAG] Query expansion took {timings['query_expansion']}s")
+        # Step 1b: While expansion runs, embed the original question, run the
+        # dense search and refresh the BM25 index - none depend on the expanded query
+        semantic_results = None
+        if self.use_hybrid_search and self.hybrid_retriever:
+            t0 = time.perf_counter()
+            if question_embedding is None:
+                question_embedding = self.hybrid_retriever.embedder.embed_query(question)
+            semantic_results = self.hybrid_retriever.dense_search(question, top_k, question_embedding)
+            self.hybrid_retriever.prepare()
+            timings["retrieval_prep"] = _elapsed(t0)
+
+        if expansion_future:
+            t0 = time.perf_counter()
+            expanded_query, timings["query_expansion"] = expansion_future.result()
+            search_query = expanded_query
+            timings["query_expansion_wait"] = _elapsed(t0)
+            print(f"[EnhancedRAG] Query expansion took {timings['query_expansion']}s "
+                  f"({timings['query_expansion_wait']}s not overlapped)")
 
         # Step 2: Retrieve relevant chunks
         print("[EnhancedRAG] Starting retrieval...")
-        t0 = time.time()
+        t0 = time.perf_counter()
 
         if self.use_hybrid_search and self.hybrid_retriever:
             chunks = self.hybrid_retriever.retrieve(
                 query=question,  # Original for embedding
                 top_k=top_k,
-                expanded_query=expanded_query  # Expanded for BM25
+                expanded_query=expanded_query,  # Expanded for BM25
+                query_embedding=question_embedding,
+                semantic_results=semantic_results
             )
             retrieval_scores = self.hybrid_retriever.get_retrieval_scores(chunks)
         else:
-            chunks = self.basic_retriever.retrieve_with_scores(search_query, top_k=top_k)
+            if retrieval_future is not None:
+                chunks = retrieval_future.result()  # prefetched, search_query is the question
+            else:
+                chunks = self.basic_retriever.retrieve_with_scores(search_query, top_k=top_k)
             retrieval_scores = [c.get("distance", 0) for c in chunks]
 
-        timings["retrieval"] = round(time.time() - t0, 2)
+        timings["retrieval"] = _elapsed(t0)
         print(f"[EnhancedRAG] Retrieval took {timings['retrieval']}s - found {len(chunks)} chunks")
 
         # Step 2b: Apply feedback-based adjustments
-        chunks = self.feedback_learner.apply_adjustments_to_results(chunks)
+        chunks = self.feedback_learner.apply_adjustments_to_results(chunks, top_k=top_k)
+        chunks = self._dedupe_chunks(chunks)
 
         # Extract chunk IDs for feedback tracking
         chunk_ids = [c.get("id", "") for c in chunks if c.get("id")]
 
         # Step 3: Build prompt with context and conversation history
-        t0 = time.time()
-        prompt = self.prompts.build_rag_prompt(question, chunks, conversation_history)
-        timings["prompt_build"] = round(time.time() - t0, 2)
+        t0 = time.perf_counter()
+        prompt = self.prompts.build_rag_prompt(
+            question, chunks, conversation_history, with_confidence=with_confidence
+        )
+        timings["prompt_build"] = _elapsed(t0)
 
-        # Step 4: Generate response with LLM
-        print(f"[EnhancedRAG] Starting LLM generation...")
-        t0 = time.time()
-        answer = self.llm.generate(
+        return _PreparedQuery(
+            chunks=chunks,
+            chunk_ids=chunk_ids,
             prompt=prompt,
-            system_prompt=self.prompts.system_prompt,
-            temperature=temperature
+            retrieval_scores=retrieval_scores,
+            expanded_query=expanded_query,
+            question_embedding=question_embedding
         )
-        timings["llm_generation"] = round(time.time() - t0, 2)
-        print(f"[EnhancedRAG] LLM generation took {timings['llm_generation']}s")
-
-        # Extract sources
-        sources = self._extract_sources(chunks)
 
-        # Step 4b: Auto-quality evaluation (optional, adds ~1-2s)
-        confidence_score = None
-        low_confidence = False
-        if evaluate_confidence:
-            confidence_score = self._evaluate_confidence(question, chunks, answer)
-            low_confidence = confidence_score is not None and confidence_score < 0.5
+    def _finish(
+        self,
+        question: str,
+        answer: str,
+        sources: List[Dict[str, str]],
+        prepared: "_PreparedQuery",
+        cache_settings: Dict[str, Any],
+        timings: Dict[str, float],
+        total_start: float,
+        evaluate_confidence: bool,
+        confidence_score: Optional[float] = None
+    ) -> EnhancedRAGResponse:
+        """Cache and log a generated answer."""
+        low_confidence = confidence_score is not None and confidence_score < 0.5
+        if evaluate_confidence and confidence_score is None:
+            # Unparseable trailer: keep the tail around for prompt tuning
+            print(f"[EnhancedRAG] No confidence score in answer tail: {answer[-80:]!r}")
+        elif evaluate_confidence:
             print(f"[EnhancedRAG] Confidence score: {confidence_score}")
 
-        timings["total"] = round(time.time() - total_start, 2)
+        timings["total"] = _elapsed(total_start)
         print(f"[EnhancedRAG] Total time: {timings['total']}s")
 
-        # Step 5: Log query for analytics
+        # Store for future near-duplicate questions (only when the cache was
+        # consulted), written in the background
+        if self.response_cache and "cache" in timings:
+            self.response_cache.set_async(
+                question, cache_settings, answer, sources, embedding=prepared.question_embedding
+            )
+
+        # Step 5: Log query for analytics (written in the background)
         log_id = None
         if self.use_logging and self.query_logger:
-            log_id = self.query_logger.log(
+            log_id = self.query_logger.log_async(
                 query=question,
-                retrieval_scores=retrieval_scores,
+                retrieval_scores=prepared.retrieval_scores,
                 response_time_ms=int(timings["total"] * 1000),
-                expanded_query=expanded_query,
+                expanded_query=prepared.expanded_query,
                 model_used=config.llm_model
             )
 
         return EnhancedRAGResponse(
             answer=answer,
             sources=sources,
-            retrieved_chunks=chunks,
-            chunk_ids=chunk_ids,
+            retrieved_chunks=prepared.chunks,
+            chunk_ids=prepared.chunk_ids,
             query=question,
-            expanded_query=expanded_query,
+            expanded_query=prepared.expanded_query,
             timings=timings,
             log_id=log_id,
             confidence_score=confidence_score,
             low_confidence=low_confidence
         )
 
-    def _evaluate_confidence(
-        self,
-        question: str,
-        chunks: List[Dict],
-        answer: str
-    ) -> Optional[float]:
-        """
-        Auto-evaluate response quality using the LLM.
-
-        Returns a confidence score between 0 and 1, or None on failure.
-        """
-        try:
-            context_summary = " | ".join(
-                c.get("metadata", {}).get("title", "") for c in chunks[:3]
-            )
-            eval_prompt = self.prompts.confidence_eval_prompt.format(
-                question=question,
-                context_summary=context_summary,
-                answer=answer[:500]
-            )
-            client = ollama.Client(host=config.ollama_base_url)
-            response = client.generate(
-                model=config.llm_model,
-                prompt=eval_prompt,
-                options={"temperature": 0.1, "num_predict": 10}
-            )
-            score_str = response["response"].strip()
-            score = float(score_str)
-            return max(0.0, min(1.0, score))
-        except Exception:
-            return None
+    @staticmethod
+    def _timed(func, *args):
+        """Call func(*args) and return (result, elapsed seconds)."""
+        t0 = time.perf_counter()
+        result = func(*args)
+        return result, _elapsed(t0)
+
+    def _get_embedder(self):
+        """Embedder used by the active retriever."""
+        if self.hybrid_retriever:
+            return self.hybrid_retriever.embedder
+        return self.basic_retriever.embedder
+
+    def clear_caches(self):
+        """Drop cached query expansions and query embeddings."""
+        if self.query_expander:
+            self.query_expander.clear_cache()
+        self._get_embedder().clear_cache()
 
     def update_feedback(self, log_id: int, feedback: str):
         """Update feedback for a logged query."""
         if self.query_logger:
             self.query_logger.update_feedback(log_id, feedback)
 
+    @staticmethod
+    def _dedupe_chunks(chunks: List[Dict]) -> List[Dict]:
+        """
+        Drop repeated chunks, keeping the highest-ranked copy.
+
+        Chunks match by ID, or by their first 100 characters (whitespace
+        normalized) to catch the same passage stored under different IDs,
+        e.g. a post scraped from two URLs.
+        """
+        seen_ids, seen_text, unique = set(), set(), []
+        for chunk in chunks:
+            chunk_id = chunk.get("id")
+            fingerprint = " ".join(chunk.get("text", "")[:100].split())
+            if (chunk_id and chunk_id in seen_ids) or (fingerprint and fingerprint in seen_text):
+                continue
+            seen_ids.add(chunk_id)
+            seen_text.add(fingerprint)
+            unique.append(chunk)
+        return unique
+
     def _extract_sources(self, chunks: List[Dict]) -> List[Dict[str, str]]:
-        """Extract unique sources from chunks."""
-        seen_urls = set()
-        sources = []
+        """Extract unique sources from chunks, in first-seen order."""
+        by_url = {}
 
         for chunk in chunks:
-            meta = chunk.get("metadata", {})
+            meta = chunk.get("metadata") or EMPTY_METADATA
             url = meta.get("url", "")
 
-            if url and url not in seen_urls:
-                seen_urls.add(url)
-                sources.append({
+            if url and url not in by_url:
+                by_url[url] = {
                     "title": meta.get("title", "Unknown"),
                     "author": meta.get("author", "Unknown"),
                     "url": url
-                })
+                }
 
-        return sources
+        return list(by_url.values())
 
     def get_analytics_stats(self) -> Dict[str, Any]:
         """Get analytics statistics."""
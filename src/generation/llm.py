@@ -2,8 +2,8 @@
 Ollama LLM wrapper for generating responses.
 """
 from typing import Generator, Optional
-import ollama
 from ..config import config
+from ..ollama_client import get_client
 
 
 class OllamaLLM:
@@ -19,7 +19,7 @@ class OllamaLLM:
             model: Ollama model name
         """
         self.model = model or config.llm_model
-        self._client = ollama.Client(host=config.ollama_base_url)
+        self._client = get_client()
 
     def generate(
         self,
@@ -53,7 +53,8 @@ class OllamaLLM:
             options={
                 "temperature": temperature,
                 "num_predict": max_tokens
-            }
+            },
+            keep_alive=config.ollama_keep_alive
         )
 
         return response["message"]["content"]
@@ -91,7 +92,8 @@ class OllamaLLM:
             options={
                 "temperature": temperature,
                 "num_predict": max_tokens
-            }
+            },
+            keep_alive=config.ollama_keep_alive
         )
 
         for chunk in stream:
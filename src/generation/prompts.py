@@ -2,7 +2,11 @@
 Prompt templates for the RAG chatbot.
 Supports Portuguese and English, conversation history, and prompt injection protection.
 """
-from typing import List, Dict, Optional
+import re
+from collections import deque
+from types import MappingProxyType
+from typing import List, Dict, Optional, Tuple, Union
+from ..config import config
 
 SYSTEM_PROMPT = """És um assistente da Near Partner, uma empresa portuguesa de consultoria tecnológica especializada em transformação digital, desenvolvimento de software e soluções de IA.
 
@@ -47,24 +51,73 @@ PERGUNTA: {question}
 
 Fornece uma resposta útil e precisa baseada no contexto acima. Responde em Português de Portugal (ou em inglês se a pergunta for em inglês). Não menciones números de fonte na resposta."""
 
-CONFIDENCE_EVAL_PROMPT = """Avalia a qualidade desta resposta RAG numa escala de 0 a 1.
+# RAG_PROMPT_TEMPLATE split once at import around its two fields, so building a
+# prompt is a plain join instead of re-parsing the format string every request
+_RAG_HEAD, _, _rest = RAG_PROMPT_TEMPLATE.partition("{context}")
+_RAG_MIDDLE, _, _RAG_TAIL = _rest.partition("{question}")
 
-Pergunta: {question}
-Contexto recuperado (resumo): {context_summary}
-Resposta gerada: {answer}
+_HISTORY_HEADER = "HISTÓRICO DA CONVERSA:\n"
+_HISTORY_FOOTER = "\n\n"
 
-Critérios:
-- 0.9-1.0: Excelente, totalmente suportada pelo contexto
-- 0.7-0.8: Boa, maioritariamente suportada
-- 0.5-0.6: Aceitável, parcialmente suportada
-- 0.3-0.4: Fraca, pouco suportada
-- 0.0-0.2: Muito fraca ou inventada
+# Appended to the RAG prompt so the answer and its self-rated confidence
+# come from a single generation; split_confidence() removes the trailer
+CONFIDENCE_INSTRUCTION = """
 
-Responde APENAS com um número decimal entre 0 e 1. Nada mais."""
+No fim da resposta, numa linha nova, escreve apenas CONFIDENCE=<número entre 0 e 1> a indicar quão bem a resposta é suportada pelo contexto (1 = totalmente suportada, 0.5 = parcialmente, 0 = inventada)."""
 
+# Shared stand-in for chunks without metadata (Chroma can return None)
+EMPTY_METADATA = MappingProxyType({})
 
-def _format_conversation_history(history: List[Dict]) -> str:
+_CONTEXT_SEPARATOR = "\n---\n"
+
+# Removed from user input in one str.translate pass: C0 control characters
+# (except tab/newline/CR), zero-width characters and bidi overrides, which
+# can hide instructions from anyone reading the conversation
+_STRIP_CHARS = dict.fromkeys(
+    [c for c in range(0x20) if c not in (0x09, 0x0A, 0x0D)]
+    + [0x7F, 0x200B, 0x200C, 0x200D, 0x2060, 0xFEFF]
+    + list(range(0x202A, 0x202F)) + list(range(0x2066, 0x206A))
+)
+
+# Trailing CONFIDENCE line; tolerates "CONFIDENCE: 0.8", markdown bold and
+# trailing commentary, and takes the first number on the line
+_CONFIDENCE_RE = re.compile(
+    r"\s*\**CONFIDENCE\**\s*[=:]\**\s*([0-9]+(?:[.,][0-9]+)?|[.,][0-9]+)[^\n]*\s*$"
+)
+
+
+class ConversationHistory:
+    """
+    Rolling prompt history for one conversation.
+
+    Keeps the last 3 turns already truncated and labelled, and rebuilds the
+    formatted block only when a message is added, so callers that own a
+    conversation (e.g. a UI session) avoid re-formatting it on every query.
+    Pass it wherever a conversation_history list is accepted.
+    """
+
+    def __init__(self, max_messages: int = 6):
+        self._lines = deque(maxlen=max_messages)
+        self.text = ""
+
+    def append(self, role: str, content: str):
+        """Add a message and refresh the formatted history block."""
+        label = "Utilizador" if role == "user" else "Assistente"
+        self._lines.append(f"{label}: {content[:300]}")
+        self.text = _HISTORY_HEADER + "\n".join(self._lines) + _HISTORY_FOOTER
+
+    def clear(self):
+        self._lines.clear()
+        self.text = ""
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+
+def _format_conversation_history(history: Union[List[Dict], ConversationHistory]) -> str:
     """Format conversation history for inclusion in prompt."""
+    if isinstance(history, ConversationHistory):
+        return history.text
     if not history:
         return ""
     lines = []
@@ -72,45 +125,85 @@ def _format_conversation_history(history: List[Dict]) -> str:
         role = "Utilizador" if msg.get("role") == "user" else "Assistente"
         content = msg.get("content", "")[:300]
         lines.append(f"{role}: {content}")
-    return "HISTÓRICO DA CONVERSA:\n" + "\n".join(lines) + "\n\n"
+    return _HISTORY_HEADER + "\n".join(lines) + _HISTORY_FOOTER
+
+
+def _smart_truncate(text: str, max_chars: int) -> str:
+    """Cut text to max_chars, preferring the last sentence end before the limit."""
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(". ", 0, max_chars)
+    # Only back off to a sentence boundary if it keeps most of the budget
+    if cut < max_chars // 2:
+        return text[:max_chars]
+    return text[:cut + 1]
 
 
 def format_context(retrieved_chunks: list) -> str:
-    """Format retrieved chunks into a context string."""
+    """
+    Format retrieved chunks into a context string.
+
+    Each chunk is capped at config.max_chunk_chars, and chunks are added in
+    rank order until the context, source headers and separators included,
+    would exceed config.max_prompt_tokens (estimated at 4 chars/token).
+    The first chunk is always kept.
+    """
     if not retrieved_chunks:
         return "Não foi encontrado contexto relevante."
 
+    max_chars = config.max_chunk_chars
+    budget = config.max_prompt_tokens * 4
+    used = 0
     context_parts = []
     for i, chunk in enumerate(retrieved_chunks, 1):
-        title = chunk.get("metadata", {}).get("title", "Desconhecido")
-        author = chunk.get("metadata", {}).get("author", "Near Partner")
-        text = chunk.get("text", "")
-        context_parts.append(f"[Fonte {i}: \"{title}\" por {author}]\n{text}\n")
+        meta = chunk.get("metadata") or EMPTY_METADATA
+        part = (
+            f'[Fonte {i}: "{meta.get("title", "Desconhecido")}" por {meta.get("author", "Near Partner")}]\n'
+            f'{_smart_truncate(chunk.get("text", ""), max_chars)}\n'
+        )
+        used += len(part) + (len(_CONTEXT_SEPARATOR) if context_parts else 0)
+        if context_parts and used > budget:
+            break
+        context_parts.append(part)
 
-    return "\n---\n".join(context_parts)
+    return _CONTEXT_SEPARATOR.join(context_parts)
 
 
 def build_rag_prompt(
     question: str,
     retrieved_chunks: list,
-    conversation_history: Optional[List[Dict]] = None
+    conversation_history: Optional[Union[List[Dict], ConversationHistory]] = None,
+    with_confidence: bool = False
 ) -> str:
-    """Build the full RAG prompt with context and optional conversation history."""
-    context = format_context(retrieved_chunks)
-    history_str = _format_conversation_history(conversation_history or [])
-
-    if history_str:
-        return f"{history_str}{RAG_PROMPT_TEMPLATE.format(context=context, question=question)}"
-    return RAG_PROMPT_TEMPLATE.format(context=context, question=question)
+    """
+    Build the full RAG prompt with context and optional conversation history.
+
+    With with_confidence, the model is also asked to end with a CONFIDENCE=<0..1>
+    line; pass its output through split_confidence().
+    """
+    return "".join((
+        _format_conversation_history(conversation_history or []),
+        _RAG_HEAD, format_context(retrieved_chunks),
+        _RAG_MIDDLE, question,
+        _RAG_TAIL,
+        CONFIDENCE_INSTRUCTION if with_confidence else ""
+    ))
+
+
+def split_confidence(answer: str) -> Tuple[str, Optional[float]]:
+    """Strip a trailing CONFIDENCE=<score> line. Returns (answer, score clamped to 0-1, or None)."""
+    match = _CONFIDENCE_RE.search(answer)
+    if not match:
+        return answer.strip(), None
+    score = float("0" + match.group(1).replace(",", "."))
+    return answer[:match.start()].strip(), max(0.0, min(1.0, score))
 
 
 def sanitize_user_input(text: str) -> str:
     """Sanitize user input to reduce prompt injection risk."""
     if not text:
         return text
-    text = text[:1000]
-    text = text.replace('\x00', '')
-    return text.strip()
+    return text[:1000].translate(_STRIP_CHARS).strip()
 
 
 class PromptTemplates:
@@ -118,20 +211,9 @@ class PromptTemplates:
 
     system_prompt = SYSTEM_PROMPT
     rag_template = RAG_PROMPT_TEMPLATE
-    confidence_eval_prompt = CONFIDENCE_EVAL_PROMPT
-
-    @staticmethod
-    def format_context(chunks: list) -> str:
-        return format_context(chunks)
-
-    @staticmethod
-    def build_rag_prompt(
-        question: str,
-        chunks: list,
-        conversation_history: Optional[List[Dict]] = None
-    ) -> str:
-        return build_rag_prompt(question, chunks, conversation_history)
-
-    @staticmethod
-    def sanitize_input(text: str) -> str:
-        return sanitize_user_input(text)
+
+    # The module functions themselves, so calls skip a wrapper frame
+    format_context = staticmethod(format_context)
+    build_rag_prompt = staticmethod(build_rag_prompt)
+    split_confidence = staticmethod(split_confidence)
+    sanitize_input = staticmethod(sanitize_user_input)
@@ -1,5 +1,20 @@
-from .chunker import TextChunker
-from .embedder import Embedder
-from .ingest import IngestPipeline
+import importlib
 
-__all__ = ["TextChunker", "Embedder", "IngestPipeline"]
+# Lazy so the chunker can be used without importing the embedder/ollama stack
+_LAZY = {
+    "TextChunker": ".chunker",
+    "Embedder": ".embedder",
+    "CachedEmbedder": ".embedder",
+    "BatchingEmbedder": ".embedder",
+    "IngestPipeline": ".ingest",
+}
+
+__all__ = ["TextChunker", "Embedder", "CachedEmbedder", "BatchingEmbedder", "IngestPipeline"]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
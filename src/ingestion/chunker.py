@@ -3,13 +3,27 @@ Smart text chunking for blog posts.
 Respects paragraph and heading boundaries for better semantic coherence.
 """
 import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 from typing import List, Dict, Any
 from dataclasses import dataclass
 
+_PARAGRAPH_BREAK_RE = re.compile(r'\n\n+')
+
+# Heading detection: a short paragraph is a heading unless it ends like a
+# sentence or starts like a list item
+_SENTENCE_END_CHARS = frozenset('.!?:')
+_LIST_MARKER_CHARS = frozenset('-*•')
+
 
 @dataclass
 class Chunk:
-    """A text chunk with metadata."""
+    """
+    A text chunk with metadata.
+
+    Chunks from the same post share one metadata dict (treat it as
+    read-only); the per-chunk index lives on chunk_index.
+    """
     text: str
     metadata: Dict[str, Any]
     chunk_index: int
@@ -67,7 +81,7 @@ class TextChunker:
     def _split_into_paragraphs(self, text: str) -> List[str]:
         """Split text into paragraphs, keeping headings with their content."""
         # Split on double newlines (paragraph breaks)
-        raw_paragraphs = re.split(r'\n\n+', text)
+        raw_paragraphs = _PARAGRAPH_BREAK_RE.split(text)
 
         paragraphs = []
         current_heading = None
@@ -80,8 +94,8 @@ class TextChunker:
             # Check if this looks like a heading (short, no punctuation at end)
             is_heading = (
                 len(para) < 100 and
-                not para.endswith(('.', '!', '?', ':')) and
-                not para.startswith(('-', '*', '•'))
+                para[-1] not in _SENTENCE_END_CHARS and
+                para[0] not in _LIST_MARKER_CHARS
             )
 
             if is_heading:
@@ -119,7 +133,7 @@ class TextChunker:
                 chunk_text = "\n\n".join(current_chunk)
                 chunks.append(Chunk(
                     text=chunk_text,
-                    metadata={**base_metadata, "chunk_index": chunk_index},
+                    metadata=base_metadata,
                     chunk_index=chunk_index
                 ))
                 chunk_index += 1
@@ -140,22 +154,29 @@ class TextChunker:
             chunk_text = "\n\n".join(current_chunk)
             chunks.append(Chunk(
                 text=chunk_text,
-                metadata={**base_metadata, "chunk_index": chunk_index},
+                metadata=base_metadata,
                 chunk_index=chunk_index
             ))
 
         return chunks
 
-    def chunk_all_posts(self, posts: List[Dict[str, Any]]) -> List[Chunk]:
+    def chunk_all_posts(self, posts: List[Dict[str, Any]], parallel: bool = False) -> List[Chunk]:
         """
         Chunk all blog posts.
 
         Args:
             posts: List of blog post dicts
+            parallel: Chunk posts across CPU cores (worth it for thousands of
+                posts; process start-up dominates for small batches)
 
         Returns:
             List of all chunks from all posts
         """
+        if parallel:
+            with ProcessPoolExecutor() as executor:
+                results = executor.map(self.chunk_blog_post, posts, chunksize=32)
+                return list(chain.from_iterable(results))
+
         all_chunks = []
         for post in posts:
             chunks = self.chunk_blog_post(post)
@@ -1,9 +1,19 @@
 """
 Embedding generation using Ollama's nomic-embed-text model.
 """
-from typing import List
-import ollama
+import hashlib
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+from ollama import ResponseError
 from ..config import config
+from ..ollama_client import get_client
 
 
 class Embedder:
@@ -19,7 +29,11 @@ class Embedder:
             model: Ollama embedding model name
         """
         self.model = model or config.embedding_model
-        self._client = ollama.Client(host=config.ollama_base_url)
+        self._client = get_client()
+        self._legacy_api = False  # set if the server lacks the batch /api/embed endpoint
+
+        # Repeated questions skip the embedding call (per instance, so per model)
+        self._embed_query_cached = lru_cache(maxsize=2048)(self.embed_text)
 
     def embed_text(self, text: str) -> List[float]:
         """
@@ -31,15 +45,14 @@ class Embedder:
         Returns:
             Embedding vector as list of floats
         """
-        response = self._client.embeddings(
-            model=self.model,
-            prompt=text
-        )
-        return response["embedding"]
+        return self.embed_texts([text])[0]
 
     def embed_texts(self, texts: List[str]) -> List[List[float]]:
         """
-        Generate embeddings for multiple texts.
+        Generate embeddings for multiple texts in one request.
+
+        Uses the batch /api/embed endpoint; servers that predate it get one
+        /api/embeddings call per text instead.
 
         Args:
             texts: List of texts to embed
@@ -47,16 +60,38 @@ class Embedder:
         Returns:
             List of embedding vectors
         """
-        embeddings = []
-        for text in texts:
-            embedding = self.embed_text(text)
-            embeddings.append(embedding)
-        return embeddings
+        if not texts:
+            return []
+        if not self._legacy_api:
+            try:
+                response = self._client.embed(
+                    model=self.model,
+                    input=texts,
+                    keep_alive=config.ollama_keep_alive
+                )
+                return list(response["embeddings"])
+            except ResponseError as e:
+                if e.status_code != 404:
+                    raise
+                print("[Embedder] /api/embed not available, falling back to /api/embeddings")
+                self._legacy_api = True
+
+        return [
+            self._client.embeddings(
+                model=self.model,
+                prompt=text,
+                keep_alive=config.ollama_keep_alive
+            )["embedding"]
+            for text in texts
+        ]
 
     def embed_query(self, query: str) -> List[float]:
         """
         Generate embedding for a search query.
-        Same as embed_text but semantically named for clarity.
+
+        Results are cached (LRU, 2048 entries) by the query lowercased with
+        whitespace collapsed; nomic-embed-text's tokenizer is uncased, so the
+        normalized text embeds the same. Treat the returned list as read-only.
 
         Args:
             query: Search query
@@ -64,4 +99,197 @@ class Embedder:
         Returns:
             Embedding vector
         """
-        return self.embed_text(query)
+        return self._embed_query_cached(" ".join(query.lower().split()))
+
+    def clear_cache(self):
+        """Drop cached query embeddings."""
+        self._embed_query_cached.cache_clear()
+
+    def query_cache_stats(self) -> Dict[str, float]:
+        """Hit/miss counters of the query-embedding LRU."""
+        info = self._embed_query_cached.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "max_size": info.maxsize,
+            "hit_rate": round(info.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+class CachedEmbedder(Embedder):
+    """
+    Embedder backed by a persistent SQLite cache of document embeddings.
+
+    Entries are keyed by blake2b(model, normalized text), so re-ingesting
+    unchanged content costs no embedding calls and switching models never
+    returns stale vectors.
+    """
+
+    def __init__(self, model: str = None, db_path: Optional[Path] = None):
+        """
+        Initialize cached embedder.
+
+        Args:
+            model: Ollama embedding model name
+            db_path: Path to the SQLite cache (defaults to data/embedding_cache.db)
+        """
+        super().__init__(model)
+        config.ensure_dirs()
+        self.db_path = db_path or config.data_dir / "embedding_cache.db"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vec BLOB NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def _key(self, text: str) -> bytes:
+        """Cache key: the model name plus the lowercased, whitespace-collapsed text."""
+        normalized = " ".join(text.lower().split())
+        return hashlib.blake2b(f"{self.model}\0{normalized}".encode(), digest_size=16).digest()
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for multiple texts, only embedding cache misses.
+
+        Args:
+            texts: List of texts to embed
+
+        Returns:
+            List of embedding vectors
+        """
+        if not texts:
+            return []
+        keys = [self._key(t) for t in texts]
+
+        with self._lock:
+            found: Dict[bytes, List[float]] = {}
+            unique = list(dict.fromkeys(keys))
+            for i in range(0, len(unique), 500):  # stay under SQLite's parameter limit
+                part = unique[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vec FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                    part
+                ).fetchall()
+                for key, vec in rows:
+                    found[key] = np.frombuffer(vec, dtype=np.float32).tolist()
+
+        misses = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                misses.setdefault(key, text)
+        if misses:
+            vectors = super().embed_texts(list(misses.values()))
+            new_rows = [
+                (key, np.asarray(vec, dtype=np.float32).tobytes())
+                for key, vec in zip(misses, vectors)
+            ]
+            with self._lock:
+                self._conn.executemany("INSERT OR IGNORE INTO embeddings VALUES (?, ?)", new_rows)
+                self._conn.commit()
+            found.update(zip(misses, vectors))
+
+        return [found[key] for key in keys]
+
+    def close(self):
+        """Close the cache database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class BatchingEmbedder:
+    """
+    Coalesces concurrent query embeddings into batch requests.
+
+    Queries that miss the LRU are queued; a background worker collects
+    whatever arrives within a short window (up to max_batch texts) and embeds
+    them with one embed_texts call, so N users asking at once cost one round
+    trip instead of N serialized ones. Single queries wait at most window_ms.
+    """
+
+    def __init__(self, inner: Optional[Embedder] = None, window_ms: float = 20, max_batch: int = 32):
+        """
+        Initialize batching embedder.
+
+        Args:
+            inner: Embedder that does the actual embedding calls
+            window_ms: How long to wait for more queries after the first one
+            max_batch: Maximum texts per batch request
+        """
+        self.inner = inner or Embedder()
+        self.model = self.inner.model
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+        self._embed_query_cached = lru_cache(maxsize=2048)(self._embed_batched)
+
+    def _embed_batched(self, text: str) -> List[float]:
+        """Queue one text for the worker and wait for its vector."""
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, daemon=True)
+                    self._worker.start()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def _run(self):
+        """Worker loop: drain a window of queued texts and embed them together."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                vectors = self.inner.embed_texts([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), vec in zip(batch, vectors):
+                future.set_result(vec)
+
+    def embed_text(self, text: str) -> List[float]:
+        """Embed a single text directly (not coalesced)."""
+        return self.inner.embed_text(text)
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of texts directly (already one batch)."""
+        return self.inner.embed_texts(texts)
+
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Generate embedding for a search query, batched with concurrent queries.
+
+        Cached like Embedder.embed_query; treat the returned list as read-only.
+
+        Args:
+            query: Search query
+
+        Returns:
+            Embedding vector
+        """
+        return self._embed_query_cached(" ".join(query.lower().split()))
+
+    def clear_cache(self):
+        """Drop cached query embeddings."""
+        self._embed_query_cached.cache_clear()
+
+    def query_cache_stats(self) -> Dict[str, float]:
+        """Hit/miss counters of the query-embedding LRU."""
+        return Embedder.query_cache_stats(self)
@@ -3,13 +3,49 @@ Main ingestion pipeline for processing content into the vector store.
 Handles both blog posts and company pages.
 """
 import json
-from typing import List, Dict, Any, Optional
+from concurrent.futures import Executor, ThreadPoolExecutor
+from itertools import chain, islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 from pathlib import Path
 from .chunker import TextChunker, Chunk
-from .embedder import Embedder
+from .embedder import Embedder, CachedEmbedder
 from ..retrieval.vector_store import VectorStore
 from ..config import config
 
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Chunks embedded and written to the vector store per round; bounds how much
+# of the corpus (chunks + vectors) is held in memory during ingestion
+INGEST_WINDOW = 256
+
+
+def _iter_json_array(json_path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the items of a top-level JSON array.
+
+    Streams with ijson when installed; otherwise parses the whole file,
+    with orjson when available.
+    """
+    if IJSON_AVAILABLE:
+        with open(json_path, "rb") as f:
+            yield from ijson.items(f, "item", use_float=True)
+    elif ORJSON_AVAILABLE:
+        with open(json_path, "rb") as f:
+            yield from orjson.loads(f.read())
+    else:
+        with open(json_path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+
 
 class IngestPipeline:
     """
@@ -27,40 +63,62 @@ class IngestPipeline:
 
         Args:
             chunker: TextChunker instance
-            embedder: Embedder instance
+            embedder: Embedder instance (defaults to a CachedEmbedder)
             vector_store: VectorStore instance
         """
         self.chunker = chunker or TextChunker(
             chunk_size=config.chunk_size,
             chunk_overlap=config.chunk_overlap
         )
-        self.embedder = embedder or Embedder()
+        self.embedder = embedder or CachedEmbedder()
         self.vector_store = vector_store or VectorStore()
 
-    def load_blog_posts(self, json_path: Optional[Path] = None) -> List[Dict[str, Any]]:
+    def _iter_content(self, json_path: Path, page_type: str, label: str) -> Iterator[Dict[str, Any]]:
+        """Yield items from a content JSON file, defaulting their page_type."""
+        if not json_path.exists():
+            print(f"{label} file not found: {json_path}")
+            return
+
+        for item in _iter_json_array(json_path):
+            item["page_type"] = item.get("page_type", page_type)
+            yield item
+
+    def iter_blog_posts(self, json_path: Optional[Path] = None) -> Iterator[Dict[str, Any]]:
         """
-        Load blog posts from JSON file.
+        Lazily read blog posts from a JSON file.
 
         Args:
             json_path: Path to the JSON file
 
-        Returns:
-            List of blog post dicts
+        Yields:
+            Blog post dicts
         """
-        json_path = json_path or config.blog_posts_path
+        return self._iter_content(json_path or config.blog_posts_path, "blog_post", "Blog posts")
 
-        if not json_path.exists():
-            print(f"Blog posts file not found: {json_path}")
-            return []
+    def iter_company_pages(self, json_path: Optional[Path] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily read company pages from a JSON file.
 
-        with open(json_path, "r", encoding="utf-8") as f:
-            posts = json.load(f)
+        Args:
+            json_path: Path to the JSON file
 
-        # Mark as blog posts
-        for post in posts:
-            post["page_type"] = post.get("page_type", "blog_post")
+        Yields:
+            Company page dicts
+        """
+        return self._iter_content(json_path or config.company_pages_path, "company_page", "Company pages")
 
-        print(f"Loaded {len(posts)} blog posts from {json_path}")
+    def load_blog_posts(self, json_path: Optional[Path] = None) -> List[Dict[str, Any]]:
+        """
+        Load blog posts from JSON file.
+
+        Args:
+            json_path: Path to the JSON file
+
+        Returns:
+            List of blog post dicts
+        """
+        posts = list(self.iter_blog_posts(json_path))
+        print(f"Loaded {len(posts)} blog posts from {json_path or config.blog_posts_path}")
         return posts
 
     def load_company_pages(self, json_path: Optional[Path] = None) -> List[Dict[str, Any]]:
@@ -73,20 +131,8 @@ class IngestPipeline:
         Returns:
             List of company page dicts
         """
-        json_path = json_path or config.company_pages_path
-
-        if not json_path.exists():
-            print(f"Company pages file not found: {json_path}")
-            return []
-
-        with open(json_path, "r", encoding="utf-8") as f:
-            pages = json.load(f)
-
-        # Mark as company pages
-        for page in pages:
-            page["page_type"] = page.get("page_type", "company_page")
-
-        print(f"Loaded {len(pages)} company pages from {json_path}")
+        pages = list(self.iter_company_pages(json_path))
+        print(f"Loaded {len(pages)} company pages from {json_path or config.company_pages_path}")
         return pages
 
     def load_all_content(self) -> List[Dict[str, Any]]:
@@ -119,70 +165,101 @@ class IngestPipeline:
         Returns:
             List of posts not yet in the vector store
         """
-        existing_urls = set(self.vector_store.get_all_urls())
-        new_posts = [p for p in posts if p.get("url") not in existing_urls]
+        new_posts = list(self.iter_new_posts(posts))
 
         print(f"Found {len(new_posts)} new posts (out of {len(posts)} total)")
         return new_posts
 
+    def iter_new_posts(
+        self,
+        posts: Iterable[Dict[str, Any]],
+        batch_size: int = 500
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily filter out posts already in the vector store.
+
+        Posts are checked in batches against the store by URL, so only the
+        candidates' URLs are looked up rather than every URL in the collection.
+
+        Args:
+            posts: Blog post dicts (list or any iterable)
+            batch_size: Posts checked per vector store query
+
+        Yields:
+            Posts not yet in the vector store
+        """
+        posts = iter(posts)
+        while True:
+            batch = list(islice(posts, batch_size))
+            if not batch:
+                return
+            existing_urls = self.vector_store.get_existing_urls([p.get("url") for p in batch])
+            yield from (p for p in batch if p.get("url") not in existing_urls)
+
     def ingest_posts(
         self,
-        posts: List[Dict[str, Any]],
+        posts: Iterable[Dict[str, Any]],
         show_progress: bool = True
     ) -> Dict[str, int]:
         """
         Ingest blog posts into the vector store.
 
+        Posts are consumed lazily and embedded/stored in windows of
+        INGEST_WINDOW chunks, so a generator (e.g. iter_blog_posts()) keeps
+        memory bounded regardless of corpus size.
+
         Args:
-            posts: List of blog post dicts
+            posts: Blog post dicts (list or any iterable)
             show_progress: Whether to print progress
 
         Returns:
             Stats dict with counts
         """
-        if not posts:
-            return {"posts": 0, "chunks": 0}
-
-        # Chunk all posts
         if show_progress:
-            print(f"Chunking {len(posts)} posts...")
+            # Chunk settings decide the vector DB layout; log them so a config change is visible
+            print(
+                f"Chunking and embedding posts "
+                f"(chunk_size={self.chunker.chunk_size}, overlap={self.chunker.chunk_overlap})..."
+            )
+
+        post_count = 0
+        added = 0
+        window: List[Chunk] = []
+        with ThreadPoolExecutor(max_workers=config.embedding_concurrency) as executor:
+            for post in posts:
+                post_count += 1
+                window.extend(self.chunker.chunk_blog_post(post))
+                if len(window) >= INGEST_WINDOW:
+                    added += self._embed_and_store(window, executor)
+                    window = []
+                    if show_progress:
+                        print(f"  Ingested {added} chunks from {post_count} posts")
+            if window:
+                added += self._embed_and_store(window, executor)
 
-        all_chunks = self.chunker.chunk_all_posts(posts)
         if show_progress:
-            print(f"Created {len(all_chunks)} chunks")
+            print(f"Added {added} chunks from {post_count} posts to vector store")
+            print(f"Total chunks in store: {self.vector_store.count()}")
 
-        if not all_chunks:
-            return {"posts": len(posts), "chunks": 0}
+        return {"posts": post_count, "chunks": added}
 
-        # Generate embeddings
-        if show_progress:
-            print(f"Generating embeddings for {len(all_chunks)} chunks...")
+    def _embed_and_store(self, chunks: List[Chunk], executor: Executor) -> int:
+        """Embed a window of chunks and add them to the vector store. Returns the number added."""
+        # Put chunks sharing a heading prefix next to each other (grouped by post)
+        # so consecutive inputs reuse Ollama's cached prompt prefix; chunks and
+        # embeddings stay aligned because both follow this order
+        chunks.sort(key=lambda c: (c.metadata.get("url", ""), c.text[:128]))
 
-        texts = [chunk.text for chunk in all_chunks]
+        # One embedding request per batch, a few in flight so the next batch
+        # is already queued on the server; map() keeps results in order
+        texts = [chunk.text for chunk in chunks]
+        batch_size = 32
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
         embeddings = []
-
-        # Process in batches to show progress
-        batch_size = 10
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            batch_embeddings = self.embedder.embed_texts(batch)
+        for batch_embeddings in executor.map(self.embedder.embed_texts, batches):
             embeddings.extend(batch_embeddings)
 
-            if show_progress:
-                progress = min(i + batch_size, len(texts))
-                print(f"  Embedded {progress}/{len(texts)} chunks")
-
-        # Add to vector store
-        if show_progress:
-            print("Adding chunks to vector store...")
-
-        added = self.vector_store.add_chunks(all_chunks, embeddings)
-
-        if show_progress:
-            print(f"Added {added} chunks to vector store")
-            print(f"Total chunks in store: {self.vector_store.count()}")
-
-        return {"posts": len(posts), "chunks": added}
+        return self.vector_store.add_chunks(chunks, embeddings)
 
     def ingest_from_file(
         self,
@@ -199,19 +276,17 @@ class IngestPipeline:
         Returns:
             Stats dict with counts
         """
-        # Load posts
-        posts = self.load_blog_posts(json_path)
+        # Stream posts straight into ingestion
+        posts = self.iter_blog_posts(json_path)
 
         # Filter to new posts if incremental
         if incremental:
-            posts = self.get_new_posts(posts)
+            posts = self.iter_new_posts(posts)
 
-        if not posts:
+        stats = self.ingest_posts(posts)
+        if not stats["posts"]:
             print("No new posts to ingest.")
-            return {"posts": 0, "chunks": 0}
-
-        # Ingest
-        return self.ingest_posts(posts)
+        return stats
 
     def reingest_all(self, json_path: Optional[Path] = None) -> Dict[str, int]:
         """
@@ -230,11 +305,8 @@ class IngestPipeline:
             # Ingest specific file
             return self.ingest_from_file(json_path, incremental=False)
         else:
-            # Ingest all content
-            all_content = self.load_all_content()
-
-            if not all_content:
+            # Ingest all content, streamed from both files
+            stats = self.ingest_posts(chain(self.iter_blog_posts(), self.iter_company_pages()))
+            if not stats["posts"]:
                 print("No content to ingest.")
-                return {"posts": 0, "chunks": 0}
-
-            return self.ingest_posts(all_content)
+            return stats
@@ -0,0 +1,18 @@
+"""
+Shared Ollama client.
+"""
+from functools import lru_cache
+from typing import Optional
+import ollama
+from .config import config
+
+
+@lru_cache(maxsize=None)
+def get_client(host: Optional[str] = None) -> ollama.Client:
+    """
+    Shared Ollama client for a host (defaults to config.ollama_base_url).
+
+    The client keeps a pooled, thread-safe HTTP connection, so the LLM, query
+    expander and embedder reuse one pool instead of opening their own.
+    """
+    return ollama.Client(host=host or config.ollama_base_url)
@@ -1,4 +1,17 @@
-from .vector_store import VectorStore
-from .retriever import Retriever
+import importlib
+
+# Resolved on first access so `import src.retrieval.<module>` doesn't load ChromaDB
+_LAZY = {
+    "VectorStore": ".vector_store",
+    "Retriever": ".retriever",
+}
 
 __all__ = ["VectorStore", "Retriever"]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,13 +1,26 @@
 """
 Hybrid retriever combining semantic search with BM25 keyword search.
 """
+import hashlib
+import heapq
+import os
+import pickle
 import re
+from pathlib import Path
 from typing import List, Dict, Any, Optional
-from rank_bm25 import BM25Okapi
+import numpy as np
+from .bm25 import BM25Index
 from .vector_store import VectorStore
-from ..ingestion.embedder import Embedder
+from ..ingestion.embedder import Embedder, BatchingEmbedder
 from ..config import config
 
+_TOKEN_RE = re.compile(r'\w+')
+
+# Reciprocal Rank Fusion constant, and 1 / (k + rank + 1) for the ranks
+# retrieve() can produce, so fusion multiplies instead of dividing
+RRF_K = 60
+_RRF_INV = tuple(1.0 / (RRF_K + rank + 1) for rank in range(256))
+
 
 class HybridRetriever:
     """
@@ -35,7 +48,7 @@ class HybridRetriever:
             bm25_weight: Weight for BM25 scores (0-1)
         """
         self.vector_store = vector_store or VectorStore()
-        self.embedder = embedder or Embedder()
+        self.embedder = embedder or BatchingEmbedder()
         self.semantic_weight = semantic_weight
         self.bm25_weight = bm25_weight
 
@@ -47,12 +60,9 @@ class HybridRetriever:
         self._index_doc_count = 0  # Track count to detect stale index
 
     def _build_bm25_index(self):
-        """Build BM25 index from all documents in vector store."""
-        print("[HybridRetriever] Building BM25 index...")
-
+        """Build BM25 index from all documents in vector store, reusing the on-disk copy if current."""
         # Get all documents from ChromaDB
-        collection = self.vector_store._collection
-        all_data = collection.get(include=["documents", "metadatas"])
+        all_data = self.vector_store._collection.get(include=["documents", "metadatas"])
 
         if not all_data["documents"]:
             print("[HybridRetriever] No documents found")
@@ -63,18 +73,67 @@ class HybridRetriever:
         self._corpus_ids = all_data["ids"]
         self._index_doc_count = len(self._corpus_docs)
 
+        # Fingerprint IDs (in order) and content: re-ingested chunks keep
+        # their IDs, so the IDs alone would not notice edited posts
+        digest = hashlib.blake2b(digest_size=16)
+        for chunk_id, doc in zip(self._corpus_ids, self._corpus_docs):
+            digest.update(chunk_id.encode())
+            digest.update(b"\0")
+            digest.update(doc.encode())
+            digest.update(b"\0")
+        fingerprint = digest.hexdigest()
+
+        cached = self._load_bm25_cache(fingerprint)
+        if cached:
+            self._bm25 = cached
+            print(f"[HybridRetriever] BM25 index loaded from disk ({self._index_doc_count} documents)")
+            return
+
+        print("[HybridRetriever] Building BM25 index...")
+
         # Tokenize documents for BM25
         tokenized_corpus = [self._tokenize(doc) for doc in self._corpus_docs]
-        self._bm25 = BM25Okapi(tokenized_corpus)
+        self._bm25 = BM25Index(tokenized_corpus)
 
         print(f"[HybridRetriever] BM25 index built with {len(self._corpus_docs)} documents")
+        self._save_bm25_cache(fingerprint)
+
+    @property
+    def _bm25_cache_path(self) -> Path:
+        return config.data_dir / f"bm25_{self.vector_store.collection_name}.pkl"
+
+    def _load_bm25_cache(self, fingerprint: str) -> Optional[BM25Index]:
+        """Load the index saved for this fingerprint, or None."""
+        try:
+            with open(self._bm25_cache_path, "rb") as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[HybridRetriever] Ignoring unreadable BM25 cache: {e}")
+            return None
+        if data.get("fingerprint") != fingerprint:
+            return None
+        return data["index"]
+
+    def _save_bm25_cache(self, fingerprint: str):
+        """Write the current index to disk; a failed write only costs a rebuild next start."""
+        path = self._bm25_cache_path
+        tmp = path.with_suffix(".tmp")
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump({
+                    "fingerprint": fingerprint,
+                    "index": self._bm25
+                }, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[HybridRetriever] Could not save BM25 index: {e}")
 
     def _tokenize(self, text: str) -> List[str]:
         """Simple tokenization for BM25."""
         # Lowercase and split on non-alphanumeric
-        text = text.lower()
-        tokens = re.findall(r'\b\w+\b', text)
-        return tokens
+        return _TOKEN_RE.findall(text.lower())
 
     def _normalize_scores(self, scores: List[float]) -> List[float]:
         """Normalize scores to 0-1 range."""
@@ -89,12 +148,28 @@ class HybridRetriever:
 
         return [(s - min_s) / (max_s - min_s) for s in scores]
 
+    def prepare(self) -> bool:
+        """
+        Build or rebuild the BM25 index if it is missing or stale.
+
+        Safe to call ahead of retrieve() (e.g. while query expansion runs).
+
+        Returns:
+            True if a BM25 index is available
+        """
+        current_count = self.vector_store._collection.count()
+        if self._bm25 is None or current_count != self._index_doc_count:
+            self._build_bm25_index()
+        return self._bm25 is not None
+
     def retrieve(
         self,
         query: str,
         top_k: int = None,
         use_expansion: bool = False,
-        expanded_query: str = None
+        expanded_query: str = None,
+        query_embedding: Optional[List[float]] = None,
+        semantic_results: Optional[List[Dict[str, Any]]] = None
     ) -> List[Dict[str, Any]]:
         """
         Retrieve documents using hybrid search.
@@ -104,23 +179,23 @@ class HybridRetriever:
             top_k: Number of results to return
             use_expansion: Whether query expansion was used
             expanded_query: The expanded query (if used)
+            query_embedding: Precomputed embedding of `query` (computed if None)
+            semantic_results: Candidates from dense_search() with the same top_k,
+                e.g. fetched while query expansion was still running
 
         Returns:
             List of results with combined scores
         """
         top_k = top_k or config.top_k
 
-        # Build or rebuild BM25 index if needed
-        current_count = self.vector_store._collection.count()
-        if self._bm25 is None or current_count != self._index_doc_count:
-            self._build_bm25_index()
+        # Get semantic results (fetch more for merging)
+        if semantic_results is None:
+            semantic_results = self.dense_search(query, top_k, query_embedding)
 
-        if self._bm25 is None:
+        # Build or rebuild BM25 index if needed
+        if not self.prepare():
             # Fallback to semantic only
-            return self._semantic_search(query, top_k)
-
-        # Get semantic results (fetch more for merging)
-        semantic_results = self._semantic_search(query, top_k * 2)
+            return semantic_results[:top_k]
 
         # Get BM25 results
         bm25_query = expanded_query if expanded_query else query
@@ -135,18 +210,38 @@ class HybridRetriever:
 
         return merged
 
-    def _semantic_search(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+    def dense_search(
+        self,
+        query: str,
+        top_k: int = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Semantic candidates for retrieve(): 2 * top_k results, ready for fusion.
+
+        Only needs the original query, so it can run before BM25's expanded
+        query is known.
+        """
+        return self._semantic_search(query, (top_k or config.top_k) * 2, query_embedding)
+
+    def _semantic_search(
+        self,
+        query: str,
+        top_k: int,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
         """Perform semantic search."""
         # Embed query
-        query_embedding = self.embedder.embed_query(query)
+        if query_embedding is None:
+            query_embedding = self.embedder.embed_query(query)
 
         # Search vector store
         results = self.vector_store.search(query_embedding, top_k=top_k)
 
         # Convert distance to similarity score (lower distance = higher similarity)
-        for r in results:
-            # ChromaDB uses L2 distance, convert to similarity
-            r["semantic_score"] = 1 / (1 + r.get("distance", 0))
+        scores = self.vector_store.similarity([r.get("distance", 0) for r in results])
+        for r, score in zip(results, scores.tolist()):
+            r["semantic_score"] = score
 
         return results
 
@@ -155,13 +250,16 @@ class HybridRetriever:
         tokenized_query = self._tokenize(query)
         scores = self._bm25.get_scores(tokenized_query)
 
-        # Get top results
-        scored_docs = list(zip(range(len(scores)), scores))
-        scored_docs.sort(key=lambda x: x[1], reverse=True)
-        top_docs = scored_docs[:top_k]
+        # Partial selection of the top_k instead of sorting the whole corpus
+        if top_k < len(scores):
+            top_idx = np.argpartition(scores, -top_k)[-top_k:]
+        else:
+            top_idx = np.arange(len(scores))
+        top_idx = top_idx[np.argsort(scores[top_idx])[::-1]]
 
         results = []
-        for idx, score in top_docs:
+        for idx in top_idx.tolist():
+            score = float(scores[idx])
             if score > 0:  # Only include matches
                 results.append({
                     "text": self._corpus_docs[idx],
@@ -177,7 +275,7 @@ class HybridRetriever:
         semantic_results: List[Dict],
         bm25_results: List[Dict],
         top_k: int,
-        k: int = 60
+        k: int = RRF_K
     ) -> List[Dict[str, Any]]:
         """
         Merge results using Reciprocal Rank Fusion (RRF).
@@ -185,54 +283,30 @@ class HybridRetriever:
         RRF is a simple but effective method to combine ranked lists.
         Score = sum(1 / (k + rank)) for each list where the doc appears.
         """
-        doc_scores = {}
-
-        # Score from semantic results
-        for rank, result in enumerate(semantic_results):
-            doc_id = result.get("id", result.get("text", "")[:50])
-            rrf_score = self.semantic_weight / (k + rank + 1)
-
-            if doc_id not in doc_scores:
-                doc_scores[doc_id] = {
-                    "result": result,
-                    "rrf_score": 0,
-                    "semantic_rank": None,
-                    "bm25_rank": None
-                }
-
-            doc_scores[doc_id]["rrf_score"] += rrf_score
-            doc_scores[doc_id]["semantic_rank"] = rank + 1
-
-        # Score from BM25 results
-        for rank, result in enumerate(bm25_results):
-            doc_id = result.get("id", result.get("text", "")[:50])
-            rrf_score = self.bm25_weight / (k + rank + 1)
-
-            if doc_id not in doc_scores:
-                doc_scores[doc_id] = {
-                    "result": result,
-                    "rrf_score": 0,
-                    "semantic_rank": None,
-                    "bm25_rank": None
-                }
-
-            doc_scores[doc_id]["rrf_score"] += rrf_score
-            doc_scores[doc_id]["bm25_rank"] = rank + 1
-
-        # Sort by RRF score and return top_k
-        sorted_docs = sorted(
-            doc_scores.values(),
-            key=lambda x: x["rrf_score"],
-            reverse=True
-        )[:top_k]
-
-        # Format results
+        # Flat per-id maps; only the top_k survivors are copied into results
+        scores: Dict[str, float] = {}
+        results: Dict[str, Dict] = {}
+        ranks = ({}, {})  # (semantic, bm25): id -> 1-based rank
+
+        for ranked, weight, rank_of in (
+            (semantic_results, self.semantic_weight, ranks[0]),
+            (bm25_results, self.bm25_weight, ranks[1])
+        ):
+            inv = _RRF_INV if k == RRF_K and len(ranked) <= len(_RRF_INV) else [
+                1.0 / (k + rank + 1) for rank in range(len(ranked))
+            ]
+            for rank, result in enumerate(ranked):
+                doc_id = result.get("id") or result.get("text", "")[:50]
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * inv[rank]
+                results.setdefault(doc_id, result)
+                rank_of[doc_id] = rank + 1
+
         final_results = []
-        for doc in sorted_docs:
-            result = doc["result"].copy()
-            result["combined_score"] = doc["rrf_score"]
-            result["semantic_rank"] = doc["semantic_rank"]
-            result["bm25_rank"] = doc["bm25_rank"]
+        for doc_id in heapq.nlargest(top_k, scores, key=scores.__getitem__):
+            result = results[doc_id].copy()
+            result["combined_score"] = scores[doc_id]
+            result["semantic_rank"] = ranks[0].get(doc_id)
+            result["bm25_rank"] = ranks[1].get(doc_id)
             final_results.append(result)
 
         return final_results
@@ -1,9 +1,15 @@
 """
 Query expansion techniques to improve retrieval.
 """
+import hashlib
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+from pathlib import Path
 from typing import List, Optional
-import ollama
 from ..config import config
+from ..ollama_client import get_client
 
 
 EXPANSION_PROMPT = """You are a search query optimizer. Given a user's question, generate an expanded version that includes:
@@ -28,15 +34,92 @@ Question: {query}
 
 Answer:"""
 
+# Greetings and pleasantries: nothing to expand, and expansion only adds noise to BM25
+_SMALL_TALK_RE = re.compile(
+    r"^\W*(hi|hello|hey|olá|ola|oi|bom dia|boa tarde|boa noite|obrigad[oa]|thanks|thank you)\b",
+    re.IGNORECASE
+)
+
+# Questions shorter than this are treated as keyword lookups
+MIN_EXPANSION_WORDS = 4
+
 
 class QueryExpander:
     """
     Expands user queries to improve retrieval performance.
     """
 
-    def __init__(self, model: str = None):
+    def __init__(self, model: str = None, db_path: Optional[Path] = None):
+        """
+        Initialize query expander.
+
+        Args:
+            model: Ollama model used for rewriting
+            db_path: SQLite file for persisted expansions (defaults to data/query_expansions.db)
+        """
         self.model = model or config.llm_model
-        self._client = ollama.Client(host=config.ollama_base_url)
+        self._client = get_client()
+
+        # Expansions persist across restarts; the LRU in front of the table
+        # serves repeats without touching SQLite
+        config.ensure_dirs()
+        self.db_path = db_path or config.data_dir / "query_expansions.db"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS expansions (key BLOB PRIMARY KEY, text TEXT NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+        # Repeated questions skip the LLM call; failures raise and are not cached
+        self._generate_cached = lru_cache(maxsize=512)(self._generate)
+
+    def _generate(self, template: str, query: str, temperature: float) -> str:
+        """Run one generation for a prompt template and return the stripped text."""
+        # Keyed on model and template too, so changing either never serves stale text
+        key = hashlib.blake2b(
+            f"{self.model}\0{template}\0{query}".encode(), digest_size=16
+        ).digest()
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM expansions WHERE key = ?", (key,)).fetchone()
+        if row:
+            return row[0]
+
+        response = self._client.generate(
+            model=self.model,
+            prompt=template.format(query=query),
+            options={"temperature": temperature, "num_predict": 150},
+            keep_alive=config.ollama_keep_alive
+        )
+        text = response["response"].strip()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO expansions VALUES (?, ?)", (key, text))
+            self._conn.commit()
+        return text
+
+    @staticmethod
+    def _normalize(query: str) -> str:
+        """Cache key for a question: lowercased, whitespace collapsed."""
+        return " ".join(query.lower().split())
+
+    def clear_cache(self):
+        """Drop cached expansions and HyDE passages, in memory and on disk."""
+        self._generate_cached.cache_clear()
+        with self._lock:
+            self._conn.execute("DELETE FROM expansions")
+            self._conn.commit()
+
+    @staticmethod
+    def needs_expansion(query: str) -> bool:
+        """
+        Cheap check for whether an LLM rewrite is likely to help.
+
+        Short keyword queries and greetings are left as-is: expansion costs an
+        LLM round-trip and adds no recall for them.
+        """
+        return len(query.split()) >= MIN_EXPANSION_WORDS and not _SMALL_TALK_RE.match(query)
 
     def expand_query(self, query: str) -> str:
         """
@@ -48,17 +131,12 @@ class QueryExpander:
         Returns:
             Expanded query string
         """
-        # Skip expansion for very short queries (greetings)
-        if len(query.split()) <= 2:
+        # Skip expansion for short queries and greetings
+        if not self.needs_expansion(query):
             return query
 
         try:
-            response = self._client.generate(
-                model=self.model,
-                prompt=EXPANSION_PROMPT.format(query=query),
-                options={"temperature": 0.3, "num_predict": 150}
-            )
-            expanded = response["response"].strip()
+            expanded = self._generate_cached(EXPANSION_PROMPT, self._normalize(query), 0.3)
 
             # Combine original + expanded for best results
             return f"{query} {expanded}"
@@ -80,17 +158,12 @@ class QueryExpander:
         Returns:
             Hypothetical answer to embed
         """
-        # Skip for greetings
-        if len(query.split()) <= 2:
+        # Skip for short queries and greetings
+        if not self.needs_expansion(query):
             return query
 
         try:
-            response = self._client.generate(
-                model=self.model,
-                prompt=HYDE_PROMPT.format(query=query),
-                options={"temperature": 0.5, "num_predict": 150}
-            )
-            return response["response"].strip()
+            return self._generate_cached(HYDE_PROMPT, self._normalize(query), 0.5)
 
         except Exception as e:
             print(f"[QueryExpander] HyDE generation failed: {e}")
@@ -119,7 +192,8 @@ Variants:"""
             response = self._client.generate(
                 model=self.model,
                 prompt=prompt,
-                options={"temperature": 0.7, "num_predict": 200}
+                options={"temperature": 0.7, "num_predict": 200},
+                keep_alive=config.ollama_keep_alive
             )
 
             # Parse variants
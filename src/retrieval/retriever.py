@@ -1,12 +1,73 @@
 """
 Retriever for finding relevant chunks from the vector store.
 """
+import os
+import threading
 import time
-from typing import List, Dict, Any, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+try:
+    import simsimd
+    SIMSIMD_AVAILABLE = True
+except ImportError:
+    SIMSIMD_AVAILABLE = False
+
 from .vector_store import VectorStore
-from ..ingestion.embedder import Embedder
+from ..ingestion.embedder import Embedder, BatchingEmbedder
 from ..config import config
 
+# Shared by all retrievers for searches started ahead of when they're needed
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="retrieve")
+
+# Below this many candidates, topk_rerank scores in one call (thread dispatch costs more)
+PARALLEL_RERANK_MIN = 2048
+# Separate from _executor so a rerank called from a retrieval task can't
+# wait on blocks queued behind other retrievals in the same pool
+_RERANK_WORKERS = min(os.cpu_count() or 1, 8)
+_rerank_executor = ThreadPoolExecutor(max_workers=_RERANK_WORKERS, thread_name_prefix="rerank")
+
+
+def _cosine_similarities(query: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+    """Cosine similarity of a unit-length query to each unit-length row (SIMD kernel if available)."""
+    if SIMSIMD_AVAILABLE:
+        distances = simsimd.cdist(query[np.newaxis], vectors, metric="cosine")
+        return 1 - np.asarray(distances, dtype=np.float32)[0]
+    return vectors @ query
+
+
+def _sq_distances(query: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+    """||v - q||^2 for each row, up to the constant ||q||^2, as one matrix-vector product."""
+    return np.einsum("ij,ij->i", vectors, vectors) - 2 * (vectors @ query)
+
+
+def topk_rerank(query: np.ndarray, candidates: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k candidate vectors closest (L2) to the query, nearest first.
+
+    Args:
+        query: Query vector, shape (d,)
+        candidates: Candidate vectors, shape (n, d)
+        k: Number of indices to return
+
+    Returns:
+        Array of at most k row indices into candidates
+    """
+    candidates = np.asarray(candidates, dtype=np.float32)
+    query = np.asarray(query, dtype=np.float32)
+    k = min(k, len(candidates))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if len(candidates) >= PARALLEL_RERANK_MIN:
+        # NumPy releases the GIL in these kernels, so blocks score in parallel
+        blocks = np.array_split(candidates, _RERANK_WORKERS)
+        dist = np.concatenate(list(_rerank_executor.map(lambda b: _sq_distances(query, b), blocks)))
+    else:
+        dist = _sq_distances(query, candidates)
+    top = np.argpartition(dist, k - 1)[:k] if k < len(dist) else np.arange(len(dist))
+    return top[np.argsort(dist[top], kind="stable")]
+
 
 class Retriever:
     """
@@ -23,13 +84,23 @@ class Retriever:
 
         Args:
             vector_store: VectorStore instance
-            embedder: Embedder instance
+            embedder: Embedder instance; defaults to a BatchingEmbedder that
+                coalesces concurrent queries. Query embeddings are LRU-cached
+                in memory, wrap a CachedEmbedder to also persist them on disk
         """
         self.vector_store = vector_store or VectorStore()
-        self.embedder = embedder or Embedder()
+        self.embedder = embedder or BatchingEmbedder()
         self.top_k = config.top_k
         self.similarity_threshold = config.similarity_threshold
 
+        # Semantic result cache: a ring buffer of recent unit-normalized query
+        # embeddings (rows of _cache_vecs) and the results they returned
+        self._cache_lock = threading.Lock()
+        self._cache_vecs: Optional[np.ndarray] = None  # allocated on first store
+        self._cache_entries: List[Optional[tuple]] = [None] * config.retrieval_cache_size
+        self._cache_next = 0
+        self._cache_token = None
+
     def retrieve(
         self,
         query: str,
@@ -55,6 +126,13 @@ class Retriever:
         embed_time = round(time.time() - t0, 2)
         print(f"  [Retriever] Embedding query took {embed_time}s")
 
+        # Paraphrases of a recent question reuse its results
+        if not filter_categories:
+            cached = self._cached_results(query_embedding, top_k)
+            if cached is not None:
+                print("  [Retriever] Reusing results of a near-identical recent query")
+                return cached
+
         # Build filter if categories specified
         where_filter = None
         if filter_categories:
@@ -76,10 +154,101 @@ class Retriever:
         search_time = round(time.time() - t0, 2)
         print(f"  [Retriever] Vector search took {search_time}s - got {len(results)} results")
 
+        if not filter_categories:
+            self._store_results(query_embedding, top_k, results)
+
         # Return all results - let the LLM decide relevance
         # ChromaDB already returns sorted by distance (lower = more similar)
         return results
 
+    def retrieve_arrays(
+        self,
+        query: str,
+        top_k: Optional[int] = None
+    ) -> Tuple[List[str], List[str], np.ndarray, List[Dict[str, Any]]]:
+        """
+        Retrieve chunks as parallel columns, for vectorized reranking.
+
+        Bypasses the result cache; scores are vector_store.similarity(distances).
+
+        Args:
+            query: User's question
+            top_k: Number of chunks to retrieve
+
+        Returns:
+            (ids, documents, distances array, metadatas), best first
+        """
+        query_embedding = self.embedder.embed_query(query)
+        return self.vector_store.search_arrays(query_embedding, top_k or self.top_k)
+
+    def retrieve_async(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        filter_categories: Optional[List[str]] = None,
+        with_scores: bool = False
+    ) -> Future:
+        """
+        Start retrieval in the background, so callers can prefetch while doing other work.
+
+        Args:
+            query: User's question
+            top_k: Number of chunks to retrieve
+            filter_categories: Optional list of categories to filter by
+            with_scores: Return retrieve_with_scores() results instead of retrieve()
+
+        Returns:
+            Future resolving to the list of chunk dicts
+        """
+        if with_scores:
+            return _executor.submit(self.retrieve_with_scores, query, top_k)
+        return _executor.submit(self.retrieve, query, top_k, filter_categories)
+
+    def _cached_results(self, query_embedding: List[float], top_k: int) -> Optional[List[Dict[str, Any]]]:
+        """Results of the most similar recent query, if close enough and for the same top_k."""
+        # Changes whenever the store's contents may have changed
+        token = (self.vector_store.generation, self.vector_store.count())
+        with self._cache_lock:
+            if token != self._cache_token:
+                self._cache_vecs = None
+                self._cache_entries = [None] * len(self._cache_entries)
+                self._cache_next = 0
+                self._cache_token = token
+                return None
+            if self._cache_vecs is None:
+                return None
+
+            q = np.asarray(query_embedding, dtype=np.float32)
+            norm = np.linalg.norm(q)
+            if not norm:
+                return None
+            sims = _cosine_similarities(q / norm, self._cache_vecs)
+            for i in np.argsort(sims)[::-1]:
+                if sims[i] < config.retrieval_cache_threshold:
+                    break
+                entry = self._cache_entries[i]
+                if entry is not None and entry[0] == top_k:
+                    return [dict(r) for r in entry[1]]
+        return None
+
+    def _store_results(self, query_embedding: List[float], top_k: int, results: List[Dict[str, Any]]):
+        """Remember a query's results, overwriting the oldest slot when full."""
+        q = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if not norm:
+            return
+        with self._cache_lock:
+            if self._cache_vecs is None:
+                self._cache_vecs = np.zeros((len(self._cache_entries), q.shape[0]), dtype=np.float32)
+            slot = self._cache_next
+            self._cache_vecs[slot] = q / norm
+            self._cache_entries[slot] = (top_k, [dict(r) for r in results])
+            self._cache_next = (slot + 1) % len(self._cache_entries)
+
+    def embed_cache_stats(self) -> Dict[str, float]:
+        """Hit rate and size of the query-embedding cache."""
+        return self.embedder.query_cache_stats()
+
     def retrieve_with_scores(
         self,
         query: str,
@@ -97,11 +266,12 @@ class Retriever:
         """
         results = self.retrieve(query, top_k)
 
-        # Convert distance to similarity score
-        for r in results:
-            # L2 distance to similarity: 1 / (1 + distance)
-            distance = r.get("distance", 0)
-            r["score"] = 1 / (1 + distance)
+        # Convert distances to similarity scores in one pass
+        distances = np.fromiter(
+            (r.get("distance", 0) for r in results), dtype=np.float64, count=len(results)
+        )
+        for r, score in zip(results, self.vector_store.similarity(distances).tolist()):
+            r["score"] = score
 
         return results
 
@@ -115,20 +285,19 @@ class Retriever:
         Returns:
             List of unique sources with title, author, url
         """
-        seen_urls = set()
-        sources = []
+        # Dicts keep insertion order: first occurrence of each URL wins
+        by_url: Dict[str, Dict[str, str]] = {}
 
         for r in results:
             metadata = r.get("metadata", {})
             url = metadata.get("url", "")
 
-            if url and url not in seen_urls:
-                seen_urls.add(url)
-                sources.append({
+            if url and url not in by_url:
+                by_url[url] = {
                     "title": metadata.get("title", "Unknown"),
                     "author": metadata.get("author", "Unknown"),
                     "url": url,
                     "published_date": metadata.get("published_date", "")
-                })
+                }
 
-        return sources
+        return list(by_url.values())
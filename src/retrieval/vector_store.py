@@ -1,7 +1,8 @@
 """
 ChromaDB vector store operations.
 """
-from typing import List, Dict, Any, Optional, TYPE_CHECKING
+from typing import List, Dict, Any, Optional, Set, Tuple, TYPE_CHECKING
+import numpy as np
 import chromadb
 from chromadb.config import Settings
 from ..config import config
@@ -9,6 +10,18 @@ from ..config import config
 if TYPE_CHECKING:
     from ..ingestion.chunker import Chunk
 
+# New collections rank by cosine distance (1 - cos) over unit-length vectors
+COLLECTION_METADATA = {"description": "Near Partner blog post chunks", "hnsw:space": "cosine"}
+
+# Chunks per collection.add() call, bounding the size of each write
+ADD_BATCH_SIZE = 1024
+
+
+def _normalize(vectors) -> np.ndarray:
+    """L2-normalize the rows of a 2-D array (float32)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / (np.linalg.norm(vectors, axis=-1, keepdims=True) + 1e-12)
+
 
 class VectorStore:
     """
@@ -24,6 +37,7 @@ class VectorStore:
             persist_directory: Path to persist the database
         """
         self.collection_name = collection_name or config.collection_name
+        config.ensure_dirs()
         self.persist_directory = persist_directory or str(config.chroma_db_path)
 
         # Initialize ChromaDB client with persistence
@@ -35,8 +49,23 @@ class VectorStore:
         # Get or create collection
         self._collection = self._client.get_or_create_collection(
             name=self.collection_name,
-            metadata={"description": "Near Partner blog post chunks"}
+            metadata=COLLECTION_METADATA
         )
+        # Collections created before the switch to cosine keep L2 until re-ingested
+        self.space = (self._collection.metadata or {}).get("hnsw:space", "l2")
+        if self.space != "cosine":
+            print(f"[VectorStore] Collection '{self.collection_name}' uses {self.space} distance; "
+                  "clear and re-ingest to switch to cosine")
+
+        # Bumped on every write through this instance, so callers can key
+        # their own caches of search results on it
+        self.generation = 0
+
+        # URLs in the collection, loaded on first get_all_urls() and kept up to
+        # date by writes through this instance; _url_cache_count is the chunk
+        # count it reflects, to notice writes from other processes
+        self._url_cache: Optional[Set[str]] = None
+        self._url_cache_count = 0
 
     def add_chunks(
         self,
@@ -59,6 +88,9 @@ class VectorStore:
         ids = []
         documents = []
         metadatas = []
+        # Chunks of a post share their metadata dict: convert it once per post
+        # (by identity), then each chunk only adds its index
+        converted: Dict[int, Dict[str, Any]] = {}
 
         for i, chunk in enumerate(chunks):
             # Create unique ID from URL and chunk index
@@ -68,19 +100,29 @@ class VectorStore:
             ids.append(chunk_id)
             documents.append(chunk.text)
 
-            # Convert categories list to string for ChromaDB
-            metadata = chunk.metadata.copy()
-            if isinstance(metadata.get("categories"), list):
-                metadata["categories"] = "|".join(metadata["categories"])
-            metadatas.append(metadata)
-
-        # Add to collection
-        self._collection.add(
-            ids=ids,
-            embeddings=embeddings,
-            documents=documents,
-            metadatas=metadatas
-        )
+            base = converted.get(id(chunk.metadata))
+            if base is None:
+                base = chunk.metadata
+                # Convert categories list to string for ChromaDB
+                if isinstance(base.get("categories"), list):
+                    base = {**base, "categories": "|".join(base["categories"])}
+                converted[id(chunk.metadata)] = base
+            metadatas.append({**base, "chunk_index": chunk.chunk_index})
+
+        # Add to collection in batches, as one float32 array rather than nested lists
+        vectors = _normalize(embeddings)
+        for start in range(0, len(ids), ADD_BATCH_SIZE):
+            end = start + ADD_BATCH_SIZE
+            self._collection.add(
+                ids=ids[start:end],
+                embeddings=vectors[start:end],
+                documents=documents[start:end],
+                metadatas=metadatas[start:end]
+            )
+        self.generation += 1
+        if self._url_cache is not None:
+            self._url_cache.update(m["url"] for m in metadatas if "url" in m)
+            self._url_cache_count += len(ids)
 
         return len(chunks)
 
@@ -101,27 +143,45 @@ class VectorStore:
         Returns:
             List of results with text, metadata, and distance
         """
+        ids, docs, distances, metas = self.search_arrays(query_embedding, top_k, where)
+        return [
+            {"text": doc, "metadata": meta, "distance": dist, "id": chunk_id}
+            for doc, meta, dist, chunk_id in zip(docs, metas, distances.tolist(), ids)
+        ]
+
+    def search_arrays(
+        self,
+        query_embedding: List[float],
+        top_k: int = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[str], List[str], np.ndarray, List[Dict[str, Any]]]:
+        """
+        Search for similar chunks, returning columns instead of one dict per result.
+
+        Args:
+            query_embedding: Query embedding vector
+            top_k: Number of results to return
+            where: Optional metadata filter
+
+        Returns:
+            (ids, documents, distances as a float64 array, metadatas), best first
+        """
         top_k = top_k or config.top_k
 
         results = self._collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=_normalize([query_embedding]),
             n_results=top_k,
             where=where,
             include=["documents", "metadatas", "distances"]
         )
 
-        # Format results
-        formatted = []
-        if results["documents"] and results["documents"][0]:
-            for i, doc in enumerate(results["documents"][0]):
-                formatted.append({
-                    "text": doc,
-                    "metadata": results["metadatas"][0][i] if results["metadatas"] else {},
-                    "distance": results["distances"][0][i] if results["distances"] else 0,
-                    "id": results["ids"][0][i] if results["ids"] else ""
-                })
-
-        return formatted
+        # Any missing column falls back to a constant
+        docs = results["documents"][0] if results["documents"] else []
+        n = len(docs)
+        ids = list(results["ids"][0]) if results["ids"] else [""] * n
+        distances = np.asarray(results["distances"][0] if results["distances"] else np.zeros(n), dtype=np.float64)
+        metas = [meta or {} for meta in results["metadatas"][0]] if results["metadatas"] else [{} for _ in docs]
+        return ids, list(docs), distances, metas
 
     def get_all_urls(self) -> List[str]:
         """
@@ -130,16 +190,40 @@ class VectorStore:
         Returns:
             List of unique blog post URLs
         """
-        # Get all items with just metadata
-        all_items = self._collection.get(include=["metadatas"])
+        count = self.count()
+        if self._url_cache is None or count != self._url_cache_count:
+            # Get all items with just metadata
+            all_items = self._collection.get(include=["metadatas"])
+            self._url_cache = {
+                metadata["url"] for metadata in all_items["metadatas"] or []
+                if metadata and "url" in metadata
+            }
+            self._url_cache_count = count
+
+        return list(self._url_cache)
+
+    def get_existing_urls(self, urls: List[str], batch_size: int = 500) -> Set[str]:
+        """
+        Find which of the given URLs already have chunks in the store.
 
-        urls = set()
-        if all_items["metadatas"]:
-            for metadata in all_items["metadatas"]:
-                if metadata and "url" in metadata:
-                    urls.add(metadata["url"])
+        Filters on the DB side, so the cost scales with the candidates rather
+        than the size of the collection.
 
-        return list(urls)
+        Args:
+            urls: Candidate URLs
+            batch_size: URLs per $in query
+
+        Returns:
+            Set of the candidate URLs that are present
+        """
+        existing = set()
+        unique = list(dict.fromkeys(u for u in urls if u))
+        for i in range(0, len(unique), batch_size):
+            part = unique[i:i + batch_size]
+            where = {"url": {"$in": part}} if len(part) > 1 else {"url": part[0]}
+            result = self._collection.get(where=where, include=["metadatas"])
+            existing.update(m["url"] for m in result["metadatas"] or [] if m and "url" in m)
+        return existing
 
     def delete_by_url(self, url: str) -> int:
         """
@@ -151,17 +235,33 @@ class VectorStore:
         Returns:
             Number of chunks deleted
         """
-        # Get IDs matching this URL
-        results = self._collection.get(
-            where={"url": url},
-            include=[]
-        )
+        # Delete by filter in one call; the count delta gives the number removed
+        before = self.count()
+        self._collection.delete(where={"url": url})
+        deleted = before - self.count()
+
+        if deleted:
+            self.generation += 1
+            if self._url_cache is not None:
+                self._url_cache.discard(url)
+                self._url_cache_count -= deleted
+
+        return deleted
+
+    def similarity(self, distances) -> np.ndarray:
+        """
+        Convert search distances to similarity scores in [0, 1].
 
-        if results["ids"]:
-            self._collection.delete(ids=results["ids"])
-            return len(results["ids"])
+        Args:
+            distances: Distances as returned by search
 
-        return 0
+        Returns:
+            Array of scores, higher is more similar
+        """
+        distances = np.asarray(distances, dtype=np.float64)
+        if self.space == "cosine":
+            return np.clip(1 - distances, 0.0, 1.0)
+        return 1 / (1 + distances)
 
     def count(self) -> int:
         """Get total number of chunks in the store."""
@@ -170,7 +270,10 @@ class VectorStore:
     def clear(self):
         """Delete all chunks from the store."""
         self._client.delete_collection(self.collection_name)
+        self.generation += 1
         self._collection = self._client.get_or_create_collection(
             name=self.collection_name,
-            metadata={"description": "Near Partner blog post chunks"}
+            metadata=COLLECTION_METADATA
         )
+        self.space = "cosine"
+        self._url_cache, self._url_cache_count = set(), 0
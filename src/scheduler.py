@@ -6,10 +6,13 @@ Runs periodic tasks:
 - Daily cache cleanup
 - Weekly knowledge gap report generation
 """
-import subprocess
+import importlib
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
 from datetime import datetime, timezone
+from typing import Any, Callable, Dict
 
 try:
     from apscheduler.schedulers.background import BackgroundScheduler
@@ -21,22 +24,88 @@ except ImportError:
 BASE_DIR = Path(__file__).parent.parent
 
 
+# Long-lived components shared by all jobs, created on first use: reopening
+# Chroma (HNSW graphs) and the SQLite databases on every tick is the slow part
+_shared: Dict[str, Any] = {}
+_shared_lock = threading.Lock()
+
+
+def _get_shared(name: str, factory: Callable[[], Any]) -> Any:
+    """Return the shared instance called `name`, creating it with factory() once."""
+    with _shared_lock:
+        if name not in _shared:
+            _shared[name] = factory()
+        return _shared[name]
+
+
+def _run_with_timeout(name: str, func: Callable[[], Any], timeout: float) -> Any:
+    """
+    Run func() on a worker thread, waiting at most `timeout` seconds.
+
+    A thread can't be killed, so a timed-out run is left to finish in the background.
+
+    Args:
+        name: Label for the thread and the timeout message
+        func: Function to call
+        timeout: Seconds to wait for it
+
+    Returns:
+        What func() returned
+    """
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = func()
+        except BaseException as e:
+            outcome["error"] = e
+
+    worker = threading.Thread(target=target, name=f"scheduler-{name}", daemon=True)
+    worker.start()
+    worker.join(timeout)
+    if worker.is_alive():
+        raise TimeoutError(f"{name} still running after {timeout}s")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result")
+
+
+def _run_main(module_name: str, timeout: float, *args) -> bool:
+    """
+    Run a script's main() in this process, waiting at most `timeout` seconds.
+
+    Runs in-process so repeated jobs skip interpreter startup and reuse
+    already-imported modules (ChromaDB, the Ollama client).
+
+    Args:
+        module_name: Module with a main() function, relative to the project root
+        timeout: Seconds to wait for it
+        *args: Arguments passed to main()
+
+    Returns:
+        True if main() returned (or exited with status 0) in time
+    """
+    def call_main():
+        if str(BASE_DIR) not in sys.path:
+            sys.path.insert(0, str(BASE_DIR))
+        try:
+            importlib.import_module(module_name).main(*args)
+        except SystemExit as e:
+            return not e.code
+        return True
+
+    return _run_with_timeout(module_name, call_main, timeout)
+
+
 def run_scraper():
     """Run the blog post scraper."""
     print(f"[Scheduler] Running blog scraper at {datetime.now(timezone.utc).isoformat()}")
     try:
-        result = subprocess.run(
-            [sys.executable, "scraper.py"],
-            cwd=str(BASE_DIR),
-            capture_output=True,
-            text=True,
-            timeout=600
-        )
-        if result.returncode == 0:
+        if _run_main("scraper", 600):
             print("[Scheduler] Blog scraping completed successfully")
         else:
-            print(f"[Scheduler] Blog scraping failed: {result.stderr[:500]}")
-    except subprocess.TimeoutExpired:
+            print("[Scheduler] Blog scraping failed")
+    except TimeoutError:
         print("[Scheduler] Blog scraping timed out")
     except Exception as e:
         print(f"[Scheduler] Blog scraping error: {e}")
@@ -46,17 +115,10 @@ def run_company_scraper():
     """Run the company pages scraper."""
     print(f"[Scheduler] Running company pages scraper at {datetime.now(timezone.utc).isoformat()}")
     try:
-        result = subprocess.run(
-            [sys.executable, "scrape_company_pages.py"],
-            cwd=str(BASE_DIR),
-            capture_output=True,
-            text=True,
-            timeout=300
-        )
-        if result.returncode == 0:
+        if _run_main("scrape_company_pages", 300):
             print("[Scheduler] Company pages scraping completed")
         else:
-            print(f"[Scheduler] Company scraping failed: {result.stderr[:500]}")
+            print("[Scheduler] Company scraping failed")
     except Exception as e:
         print(f"[Scheduler] Company scraping error: {e}")
 
@@ -65,17 +127,19 @@ def run_ingestion():
     """Run the ingestion pipeline to update the knowledge base."""
     print(f"[Scheduler] Running ingestion at {datetime.now(timezone.utc).isoformat()}")
     try:
-        result = subprocess.run(
-            [sys.executable, "scripts/ingest_blogs.py"],
-            cwd=str(BASE_DIR),
-            capture_output=True,
-            text=True,
-            timeout=1200
-        )
-        if result.returncode == 0:
-            print("[Scheduler] Ingestion completed successfully")
-        else:
-            print(f"[Scheduler] Ingestion failed: {result.stderr[:500]}")
+        from src.config import config
+
+        # Same guard as scripts/ingest_blogs.py: reingest_all() clears the
+        # store first, so never run it without content to reload
+        if not (config.blog_posts_path.exists() or config.company_pages_path.exists()):
+            print("[Scheduler] Ingestion skipped: no content files found")
+            return
+
+        from src.ingestion import IngestPipeline
+        pipeline = _get_shared("pipeline", IngestPipeline)
+        stats = _run_with_timeout("ingestion", pipeline.reingest_all, 1200)
+        print(f"[Scheduler] Ingestion completed successfully: {stats['posts']} items, "
+              f"{stats['chunks']} chunks")
     except Exception as e:
         print(f"[Scheduler] Ingestion error: {e}")
 
@@ -83,8 +147,9 @@ def run_ingestion():
 def run_full_update():
     """Run scraping + ingestion pipeline."""
     print(f"[Scheduler] Starting full update at {datetime.now(timezone.utc).isoformat()}")
-    run_scraper()
-    run_company_scraper()
+    # The scrapers are independent and network-bound, and write separate files
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="scheduler-scrape") as pool:
+        wait([pool.submit(run_scraper), pool.submit(run_company_scraper)])
     run_ingestion()
     print(f"[Scheduler] Full update completed at {datetime.now(timezone.utc).isoformat()}")
 
@@ -92,8 +157,8 @@ def run_full_update():
 def run_cache_cleanup():
     """Clean up expired cache entries."""
     try:
-        from src.analytics.response_cache import ResponseCache
-        cache = ResponseCache()
+        from src.analytics.response_cache import get_response_cache
+        cache = get_response_cache()
         deleted = cache.clear_expired()
         print(f"[Scheduler] Cache cleanup: removed {deleted} expired entries")
     except Exception as e:
@@ -104,10 +169,10 @@ def generate_weekly_report():
     """Generate a weekly knowledge gap report."""
     try:
         from src.analytics.query_logger import QueryLogger
-        from src.feedback.feedback_learner import FeedbackLearner
+        from src.feedback.feedback_learner import get_feedback_learner
 
-        logger = QueryLogger()
-        learner = FeedbackLearner()
+        logger = _get_shared("logger", QueryLogger)
+        learner = get_feedback_learner()
 
         stats = logger.get_stats()
         learning_stats = learner.get_stats()
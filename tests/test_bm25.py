@@ -0,0 +1,32 @@
+"""Tests for the BM25 keyword index."""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pytest
+from src.retrieval.bm25 import BM25Index
+
+CORPUS = [
+    "salesforce crm implementation for retail".split(),
+    "low code platform with outsystems and mendix".split(),
+    "salesforce low code integration low code".split(),
+    "digital transformation consulting".split(),
+    "ai and machine learning solutions for retail".split(),
+]
+
+
+class TestBM25Index:
+    def test_matches_rank_bm25(self):
+        rank_bm25 = pytest.importorskip("rank_bm25")
+        reference = rank_bm25.BM25Okapi(CORPUS)
+        index = BM25Index(CORPUS)
+        for query in (["salesforce"], ["low", "code", "code"], ["retail", "ai"], ["unknown"]):
+            np.testing.assert_allclose(index.get_scores(query), reference.get_scores(query), rtol=1e-5)
+
+    def test_best_match_ranks_first(self):
+        scores = BM25Index(CORPUS).get_scores(["low", "code"])
+        assert int(np.argmax(scores)) == 2
+
+    def test_unknown_terms_score_zero(self):
+        assert not BM25Index(CORPUS).get_scores(["kubernetes"]).any()
@@ -67,6 +67,11 @@ class TestTextChunker:
         assert "http://one.com" in urls
         assert "http://two.com" in urls
 
+    def test_parallel_chunking_matches_serial(self, chunker):
+        posts = [make_post(("Paragraph text. " * 20 + "\n\n") * 3) for _ in range(3)]
+        serial = chunker.chunk_all_posts(posts)
+        assert chunker.chunk_all_posts(posts, parallel=True) == serial
+
     def test_no_missing_content_between_chunks(self, chunker):
         """Verify all text from a post appears in some chunk."""
         long_para = "Unique word here. " * 15
@@ -0,0 +1,66 @@
+"""Tests for the persistent embedding cache and query batching."""
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+from src.ingestion.embedder import Embedder, CachedEmbedder, BatchingEmbedder
+
+
+class FakeClient:
+    """Stands in for the Ollama client and records what was embedded."""
+
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, model, input, keep_alive=None):
+        self.calls.append(list(input))
+        return {"embeddings": [[float(len(t)), 0.5] for t in input]}
+
+
+@pytest.fixture
+def embedder(tmp_path):
+    emb = CachedEmbedder(model="test-model", db_path=tmp_path / "emb.db")
+    emb._client = FakeClient()
+    yield emb
+    emb.close()
+
+
+class TestCachedEmbedder:
+    def test_only_misses_are_embedded(self, embedder):
+        first = embedder.embed_texts(["alpha", "beta"])
+        second = embedder.embed_texts(["beta", "gamma", "alpha"])
+        assert embedder._client.calls == [["alpha", "beta"], ["gamma"]]
+        assert second == [first[1], [5.0, 0.5], first[0]]
+
+    def test_duplicates_in_one_batch_embedded_once(self, embedder):
+        embedder.embed_texts(["same text", "Same   text", "other"])
+        assert embedder._client.calls == [["same text", "other"]]
+
+    def test_cache_persists_and_is_keyed_by_model(self, embedder, tmp_path):
+        embedder.embed_texts(["alpha"])
+        reopened = CachedEmbedder(model="test-model", db_path=tmp_path / "emb.db")
+        reopened._client = FakeClient()
+        assert reopened.embed_texts(["alpha"]) == [[5.0, 0.5]]
+        assert reopened._client.calls == []
+
+        other_model = CachedEmbedder(model="other-model", db_path=tmp_path / "emb.db")
+        other_model._client = FakeClient()
+        other_model.embed_texts(["alpha"])
+        assert other_model._client.calls == [["alpha"]]
+        reopened.close()
+        other_model.close()
+
+
+class TestBatchingEmbedder:
+    def test_concurrent_queries_share_one_request(self):
+        inner = Embedder(model="test-model")
+        inner._client = FakeClient()
+        batching = BatchingEmbedder(inner, window_ms=200)
+        queries = ["one", "three", "fifteen"]
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            vectors = list(pool.map(batching.embed_query, queries))
+        assert vectors == [[3.0, 0.5], [5.0, 0.5], [7.0, 0.5]]
+        assert len(inner._client.calls) == 1
+        assert sorted(inner._client.calls[0]) == sorted(queries)
@@ -6,6 +6,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import pytest
 from src.feedback.feedback_learner import FeedbackLearner
+from src.analytics.response_cache import ResponseCache
 
 
 @pytest.fixture
@@ -50,6 +51,19 @@ class TestChunkAdjustment:
         assert "chunk_a" in adjustments
         assert "chunk_b" in adjustments
 
+    def test_writes_update_loaded_adjustments_in_place(self, learner):
+        learner.adjust_chunk_score("chunk_a", is_positive=True)
+        learner.get_all_chunk_adjustments()
+        learner.process_feedback("query", is_positive=False, chunk_ids=["chunk_a", "chunk_b"])
+        assert learner._adj_cache_full
+        assert learner.get_all_chunk_adjustments() == pytest.approx({"chunk_a": -0.05, "chunk_b": -0.15})
+
+    def test_writes_from_other_connection_invalidate_cache(self, learner):
+        assert learner.get_chunk_adjustment("chunk_a") == 0.0
+        other = FeedbackLearner(db_path=learner.db_path)
+        other.adjust_chunk_score("chunk_a", is_positive=True)
+        assert learner.get_chunk_adjustment("chunk_a") > 0
+
     def test_apply_adjustments_reorders_results(self, learner):
         # Boost chunk_b so it should rank higher than chunk_a
         learner.adjust_chunk_score("chunk_b", is_positive=True)
@@ -63,6 +77,12 @@ class TestChunkAdjustment:
         # chunk_b should now rank first due to boost
         assert adjusted[0]["id"] == "chunk_b"
 
+    def test_apply_adjustments_keeps_top_k(self, learner):
+        learner.adjust_chunk_score("chunk_9", is_positive=True)
+        results = [{"id": f"chunk_{i}", "combined_score": i / 10} for i in range(10)]
+        adjusted = learner.apply_adjustments_to_results(results, top_k=3)
+        assert [r["id"] for r in adjusted] == ["chunk_9", "chunk_8", "chunk_7"]
+
     def test_apply_adjustments_clamps_to_01(self, learner):
         # Add many boosts
         for _ in range(20):
@@ -116,6 +136,16 @@ class TestQueryMapping:
         similar = learner.get_similar_successful_queries("salesforce")
         assert similar[0]["positive_count"] >= 2
 
+    def test_similar_queries_are_unique(self, learner):
+        learner.learn_successful_query("salesforce reports dashboard", ["chunk_1"])
+        similar = learner.get_similar_successful_queries("salesforce reports dashboard")
+        assert len(similar) == 1
+
+    def test_similar_queries_ignore_fts_syntax(self, learner):
+        learner.learn_successful_query("salesforce reports", ["chunk_1"])
+        similar = learner.get_similar_successful_queries('"salesforce" NEAR(reports*')
+        assert similar[0]["query"] == "salesforce reports"
+
     def test_learned_boosts_returned(self, learner):
         learner.learn_successful_query("low code platform", ["chunk_x"])
         boosts = learner.get_learned_chunk_boosts("low code development")
@@ -144,6 +174,32 @@ class TestProcessFeedback:
         score = learner.get_chunk_adjustment("c1")
         assert score < 0
 
+    def test_negative_feedback_invalidates_cache_for_all_settings(self, learner, tmp_path):
+        cache = ResponseCache(db_path=str(tmp_path / "test_cache.db"))
+        cache.set("What is Near Partner?", {"top_k": 5}, "Answer", [])
+        cache.set("what is near partner?", {"top_k": 10}, "Answer", [])
+        actions = learner.process_feedback(
+            query="  what is near partner?",
+            is_positive=False,
+            chunk_ids=["c1"],
+            cache=cache
+        )
+        assert actions["cache_invalidated"] is True
+        assert cache.get("What is Near Partner?", {"top_k": 5}) is None
+        assert cache.get("what is near partner?", {"top_k": 10}) is None
+
+    def test_positive_feedback_without_chunks_learns_nothing(self, learner):
+        actions = learner.process_feedback(query="Cached answer", is_positive=True, chunk_ids=[])
+        assert actions["query_learned"] is False
+        assert learner.get_stats()["mappings"]["total_queries"] == 0
+
+    def test_async_feedback_is_written_after_flush(self, learner):
+        learner.process_feedback_async("async query", is_positive=True, chunk_ids=["c1"])
+        learner.process_feedback_async("async query", is_positive=False, chunk_ids=["c2"])
+        learner.flush()
+        assert learner.get_chunk_adjustment("c1") > 0
+        assert learner.get_chunk_adjustment("c2") < 0
+
     def test_get_stats_returns_dict(self, learner):
         learner.adjust_chunk_score("c1", True)
         learner.adjust_chunk_score("c2", False)
@@ -4,12 +4,15 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import pytest
+from src.config import config
 from src.generation.prompts import (
     format_context,
     build_rag_prompt,
     sanitize_user_input,
+    split_confidence,
     SYSTEM_PROMPT,
     PromptTemplates,
+    ConversationHistory,
 )
 
 
@@ -41,8 +44,33 @@ class TestFormatContext:
         assert "Content only" in result
         assert "Desconhecido" in result or "Near Partner" in result
 
+    def test_long_chunk_cut_at_sentence_boundary(self, monkeypatch):
+        monkeypatch.setattr(config, "max_chunk_chars", 40)
+        text = "First sentence is here. Second sentence runs well past the cap."
+        result = format_context([{"text": text, "metadata": {}}])
+        assert "First sentence is here." in result
+        assert "Second" not in result
+
+    def test_prompt_budget_drops_lowest_ranked_chunks(self, monkeypatch):
+        monkeypatch.setattr(config, "max_prompt_tokens", 30)
+        chunks = [{"text": f"chunk {i} " + "x" * 50, "metadata": {}} for i in range(5)]
+        result = format_context(chunks)
+        assert "chunk 0" in result
+        assert "chunk 4" not in result
+
+    @pytest.mark.parametrize("tokens", range(30, 90, 7))
+    def test_rendered_context_stays_within_budget(self, monkeypatch, tokens):
+        monkeypatch.setattr(config, "max_prompt_tokens", tokens)
+        chunks = [{"text": "y" * 20, "metadata": {}} for _ in range(20)]
+        assert len(format_context(chunks)) <= tokens * 4
+
 
 class TestBuildRagPrompt:
+    def test_confidence_instruction_only_when_requested(self):
+        chunks = [{"text": "Context", "metadata": {"title": "T", "author": "A"}}]
+        assert "CONFIDENCE=" not in build_rag_prompt("Q?", chunks)
+        assert "CONFIDENCE=" in build_rag_prompt("Q?", chunks, with_confidence=True)
+
     def test_basic_prompt_contains_question(self):
         chunks = [{"text": "Some context", "metadata": {"title": "T", "author": "A"}}]
         prompt = build_rag_prompt("What is Near Partner?", chunks)
@@ -64,6 +92,14 @@ class TestBuildRagPrompt:
         prompt = build_rag_prompt("Question", chunks, [])
         assert "HISTÓRICO" not in prompt
 
+    def test_conversation_history_object_matches_list(self):
+        messages = [{"role": "user" if i % 2 else "assistant", "content": f"Msg {i}"} for i in range(9)]
+        history = ConversationHistory()
+        for m in messages:
+            history.append(m["role"], m["content"])
+        chunks = [{"text": "Context", "metadata": {"title": "T", "author": "A"}}]
+        assert build_rag_prompt("Q", chunks, history) == build_rag_prompt("Q", chunks, messages)
+
     def test_history_truncated_to_last_6_messages(self):
         history = [{"role": "user", "content": f"Message {i}"} for i in range(20)]
         chunks = [{"text": "Context", "metadata": {"title": "T", "author": "A"}}]
@@ -83,6 +119,9 @@ class TestSanitizeInput:
     def test_removes_null_bytes(self):
         assert sanitize_user_input("hello\x00world") == "helloworld"
 
+    def test_removes_control_and_invisible_chars(self):
+        assert sanitize_user_input("a\x07b\u200bc\u202ed\ne") == "abcd\ne"
+
     def test_truncates_to_1000_chars(self):
         long_text = "a" * 2000
         result = sanitize_user_input(long_text)
@@ -119,3 +158,19 @@ class TestPromptTemplates:
     def test_sanitize_input(self):
         pt = PromptTemplates()
         assert pt.sanitize_input("hello") == "hello"
+
+
+class TestSplitConfidence:
+    def test_trailer_is_stripped_and_parsed(self):
+        assert split_confidence("Resposta.\nCONFIDENCE=0.8\n") == ("Resposta.", 0.8)
+
+    def test_comma_decimal_and_clamping(self):
+        assert split_confidence("A\nCONFIDENCE = 0,6")[1] == 0.6
+        assert split_confidence("A\nCONFIDENCE=7")[1] == 1.0
+
+    def test_missing_trailer_returns_none(self):
+        assert split_confidence("Just an answer ") == ("Just an answer", None)
+
+    def test_loose_trailer_formats(self):
+        assert split_confidence("A\n**CONFIDENCE:** 0.8 (bem suportada)") == ("A", 0.8)
+        assert split_confidence("A\nCONFIDENCE=.75")[1] == 0.75
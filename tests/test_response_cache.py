@@ -4,12 +4,23 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import pytest
-from src.analytics.response_cache import ResponseCache
+from src.analytics.response_cache import ResponseCache, get_response_cache
 
 
-@pytest.fixture
-def cache(tmp_path):
-    return ResponseCache(db_path=str(tmp_path / "test_cache.db"), ttl_hours=1)
+@pytest.fixture(scope="module")
+def cache(tmp_path_factory):
+    """One cache per module; opening and creating the schema per test dominated runtime."""
+    cache = get_response_cache(str(tmp_path_factory.mktemp("cache") / "test_cache.db"), ttl_hours=1)
+    yield cache
+    cache.close()
+    get_response_cache.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def _reset(cache):
+    cache.flush()
+    cache.clear()
+    yield
 
 
 SETTINGS = {"top_k": 5, "use_expansion": True, "use_hybrid": True, "use_hyde": False}
@@ -25,6 +36,7 @@ class TestResponseCache:
         assert result is not None
         assert result["answer"] == "Near Partner is a tech company."
         assert result["cached"] is True
+        assert dict(result) == {"answer": "Near Partner is a tech company.", "sources": [], "cached": True}
 
     def test_case_insensitive_key(self, cache):
         cache.set("What Is Near Partner", SETTINGS, "Answer", [])
@@ -62,8 +74,63 @@ class TestResponseCache:
         assert "total_hits" in stats
         assert "avg_hits_per_entry" in stats
 
+    def test_expired_entries_hidden_then_removed(self, tmp_path):
+        expired = ResponseCache(db_path=str(tmp_path / "expired.db"), ttl_hours=0)
+        expired.set("old query", SETTINGS, "Answer", [], embedding=[1.0, 0.0])
+        assert expired.get("old query", SETTINGS) is None
+        assert expired.get_similar([1.0, 0.0], SETTINGS) is None
+        assert expired.clear_expired() == 1
+
+    def test_async_set_visible_after_flush(self, cache):
+        cache.set_async("q1", SETTINGS, "A1", [])
+        cache.set_async("q2", SETTINGS, "A2", [], embedding=[1.0, 0.0])
+        cache.flush()
+        assert cache.get("q1", SETTINGS)["answer"] == "A1"
+        assert cache.get_similar([1.0, 0.0], SETTINGS)["answer"] == "A2"
+
     def test_get_recent_returns_list(self, cache):
         cache.set("recent query", SETTINGS, "answer", [])
         recent = cache.get_recent(limit=5)
         assert len(recent) >= 1
         assert "query" in recent[0]
+
+
+class TestSemanticCache:
+    def test_similar_embedding_hits(self, cache):
+        cache.set("what is near partner", SETTINGS, "Answer", [], embedding=[1.0, 0.0, 0.1])
+        result = cache.get_similar([1.0, 0.0, 0.12], SETTINGS, threshold=0.95)
+        assert result is not None
+        assert result["answer"] == "Answer"
+
+    def test_dissimilar_embedding_misses(self, cache):
+        cache.set("what is near partner", SETTINGS, "Answer", [], embedding=[1.0, 0.0, 0.0])
+        assert cache.get_similar([0.0, 1.0, 0.0], SETTINGS) is None
+
+    def test_different_settings_miss(self, cache):
+        cache.set("query", SETTINGS, "Answer", [], embedding=[1.0, 0.0])
+        assert cache.get_similar([1.0, 0.0], {**SETTINGS, "top_k": 10}) is None
+
+    def test_plain_set_keeps_embedding(self, cache):
+        cache.set("query", SETTINGS, "Answer", [], embedding=[1.0, 0.0])
+        cache.set("query", SETTINGS, "Answer", [])
+        fresh = ResponseCache(db_path=cache.db_path)
+        assert fresh.get_similar([1.0, 0.0], SETTINGS) is not None
+
+    def test_invalidation_from_other_instance(self, cache):
+        cache.set("query", SETTINGS, "Answer", [], embedding=[1.0, 0.0])
+        assert cache.get_similar([1.0, 0.0], SETTINGS) is not None
+        other = ResponseCache(db_path=cache.db_path)
+        other.clear()
+        assert cache.get_similar([1.0, 0.0], SETTINGS) is None
+
+    def test_shared_instance_per_resolved_path(self, cache, monkeypatch):
+        assert get_response_cache(cache.db_path, ttl_hours=1) is cache
+        monkeypatch.chdir(Path(cache.db_path).parent)
+        assert get_response_cache("test_cache.db", ttl_hours=1) is cache
+
+    def test_unusual_top_k_values_are_keyed(self, cache):
+        cache.set("query", {**SETTINGS, "top_k": 5.0}, "Five", [])
+        assert cache.get("query", SETTINGS)["answer"] == "Five"
+        for top_k in (None, 2.5, -1, 2 ** 40):
+            cache.set("query", {**SETTINGS, "top_k": top_k}, str(top_k), [])
+            assert cache.get("query", {**SETTINGS, "top_k": top_k})["answer"] == str(top_k)
@@ -0,0 +1,29 @@
+"""Tests for the retriever's vector helpers."""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pytest
+from src.retrieval.retriever import topk_rerank, PARALLEL_RERANK_MIN
+
+
+class TestTopkRerank:
+    @pytest.mark.parametrize("n", [PARALLEL_RERANK_MIN - 1, PARALLEL_RERANK_MIN, 3 * PARALLEL_RERANK_MIN])
+    def test_matches_argsort(self, n):
+        rng = np.random.default_rng(n)
+        candidates = rng.standard_normal((n, 16)).astype(np.float32)
+        query = rng.standard_normal(16).astype(np.float32)
+        exact = ((candidates.astype(np.float64) - query) ** 2).sum(axis=1)
+
+        top = topk_rerank(query, candidates, 10)
+
+        assert len(top) == 10
+        np.testing.assert_allclose(exact[top], exact[np.argsort(exact)[:10]], rtol=1e-4)
+
+    def test_k_larger_than_candidates(self):
+        candidates = np.array([[3.0, 0.0], [1.0, 0.0], [2.0, 0.0]], dtype=np.float32)
+        assert topk_rerank(np.zeros(2), candidates, 10).tolist() == [1, 2, 0]
+
+    def test_empty(self):
+        assert len(topk_rerank(np.zeros(2), np.empty((0, 2)), 5)) == 0